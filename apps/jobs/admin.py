@@ -0,0 +1,13 @@
+"""
+Admin configuration for jobs app.
+"""
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'priority', 'attempts', 'progress_done', 'progress_total', 'created_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'uuid']
+    readonly_fields = ['uuid', 'attempts', 'result', 'error', 'worker', 'heartbeat_at', 'started_at', 'finished_at']
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+
+        # Every installed app's tasks.py registers its jobs (see registry.task)
+        autodiscover_modules('tasks')
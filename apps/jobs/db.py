@@ -0,0 +1,36 @@
+"""
+Database helpers for the queue's short writes.
+
+SQLite reports a table held by another connection's write as "database
+table is locked" right away (shared-cache locks ignore the busy timeout).
+Claims, progress and outcomes are tiny single-statement writes, so they
+are retried after a short pause instead of losing the outcome or failing
+the job. Other databases and other errors raise immediately.
+"""
+import time
+from typing import Callable, TypeVar
+
+from django.db import OperationalError, connection
+
+LOCK_RETRIES = 20
+LOCK_RETRY_PAUSE = 0.01  # seconds, doubled per attempt up to LOCK_RETRY_MAX_PAUSE
+LOCK_RETRY_MAX_PAUSE = 0.5
+
+T = TypeVar('T')
+
+
+def is_locked_error(error: OperationalError) -> bool:
+    return connection.vendor == 'sqlite' and 'locked' in str(error)
+
+
+def retry_when_locked(operation: Callable[[], T], retries: int = LOCK_RETRIES) -> T:
+    """Run ``operation``, retrying it while SQLite reports a locked database or table."""
+    pause = LOCK_RETRY_PAUSE
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except OperationalError as error:
+            if attempt == retries or not is_locked_error(error):
+                raise
+        time.sleep(pause)
+        pause = min(pause * 2, LOCK_RETRY_MAX_PAUSE)
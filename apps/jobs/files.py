@@ -0,0 +1,24 @@
+"""
+Private storage for files a job reads after the request that uploaded them.
+
+Files are kept under ``JOB_FILES_ROOT`` (not ``MEDIA_ROOT``, which may be
+served); the web process and the workers must share that directory.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+def job_files() -> FileSystemStorage:
+    return FileSystemStorage(location=settings.JOB_FILES_ROOT)
+
+
+def save_upload(upload, folder: str) -> str:
+    """Store an uploaded file under a random name; returns the name to pass in the job payload."""
+    return job_files().save(f'{folder}/{uuid.uuid4().hex}{_suffix(upload.name)}', upload)
+
+
+def _suffix(filename: str) -> str:
+    _, dot, extension = (filename or '').rpartition('.')
+    return f'.{extension.lower()}' if dot and extension.isalnum() and len(extension) <= 8 else ''
@@ -0,0 +1,60 @@
+"""
+Management command running background job workers.
+"""
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.jobs.worker import Worker, lease_seconds, requeue_stale, run_pending
+
+
+def _serve(threads: int, poll_interval: float, lease: int) -> None:
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+    Worker(threads=threads, poll_interval=poll_interval, lease=lease, stop=stop).run()
+
+
+class Command(BaseCommand):
+    help = 'Runs background job workers (SIGTERM/SIGINT finish the running jobs, then exit)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes')
+        parser.add_argument('--threads', type=int, default=2, help='Jobs run concurrently per process')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--lease', type=int, default=None, help='Seconds without heartbeat before a job is requeued')
+        parser.add_argument('--once', action='store_true', help='Run the due jobs in this process and exit')
+
+    def handle(self, *args, **options):
+        lease = options['lease'] or lease_seconds()
+        requeue_stale(lease)
+        if options['once']:
+            self.stdout.write(f'Ran {run_pending():,} job(s)')
+            return
+        if options['processes'] <= 1:
+            _serve(options['threads'], options['poll_interval'], lease)
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(target=_serve, args=(options['threads'], options['poll_interval'], lease))
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} worker process(es) x {options['threads']} thread(s)")
+
+        def forward(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for process in processes:
+            process.join()
@@ -0,0 +1,83 @@
+"""
+Models for the background job queue.
+"""
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.shared.models import BaseModel
+
+from .db import retry_when_locked
+
+
+class Job(BaseModel):
+    """One unit of background work, claimed and run by ``run_workers``."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        SUCCEEDED = 'succeeded', 'Succeeded'
+        FAILED = 'failed', 'Failed'
+
+    name = models.CharField(max_length=100, db_index=True)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    # Higher runs first; equal priorities run in the order they became due
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress_done = models.PositiveBigIntegerField(default=0)
+    progress_total = models.PositiveBigIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-created_at']
+        indexes = [
+            # Claim order over the queued jobs only; finished jobs never enter it
+            models.Index(
+                fields=['-priority', 'run_after', 'id'],
+                condition=Q(status='queued'),
+                name='jobs_claim_order',
+            ),
+            models.Index(fields=['status', 'heartbeat_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return 100.0 if self.status == self.Status.SUCCEEDED else None
+        return round(min(self.progress_done / self.progress_total, 1.0) * 100, 1)
+
+    def set_progress(self, done: int, total=None) -> None:
+        """Record progress (and a heartbeat) with one UPDATE; safe to call often."""
+        self.progress_done = done
+        if total is not None:
+            self.progress_total = total
+        self.heartbeat_at = timezone.now()
+        retry_when_locked(lambda: Job.objects.filter(pk=self.pk).update(
+            progress_done=self.progress_done,
+            progress_total=self.progress_total,
+            heartbeat_at=self.heartbeat_at,
+        ))
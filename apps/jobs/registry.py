@@ -0,0 +1,59 @@
+"""
+Task registry and the enqueue API.
+
+A task is a function taking the running ``Job`` plus the job's payload as
+keyword arguments; whatever JSON-serializable value it returns is stored
+as the job's result::
+
+    @task('movies.reconcile_ratings')
+    def reconcile(job, batch_size=1000):
+        ...
+
+    enqueue('movies.reconcile_ratings', {'batch_size': 500}, priority=5)
+
+Tasks live in each app's ``tasks.py``, imported at startup by
+``JobsConfig.ready``.
+"""
+from typing import Callable, Dict, Optional
+
+from django.utils import timezone
+
+from .models import Job
+
+_tasks: Dict[str, Callable] = {}
+
+
+def task(name: str, max_attempts: int = 3):
+    """Register the decorated function as the task ``name``."""
+    def register(function: Callable) -> Callable:
+        if name in _tasks and _tasks[name] is not function:
+            raise ValueError(f'Task {name!r} is already registered')
+        function.task_name = name
+        function.max_attempts = max_attempts
+        _tasks[name] = function
+        return function
+    return register
+
+
+def get_task(name: str) -> Optional[Callable]:
+    return _tasks.get(name)
+
+
+def registered_tasks() -> Dict[str, Callable]:
+    return dict(_tasks)
+
+
+def enqueue(name: str, payload: Optional[dict] = None, priority: int = 0, user=None,
+            run_after=None, max_attempts: Optional[int] = None) -> Job:
+    """Queue a run of task ``name``; returns the job to report back to the client."""
+    function = get_task(name)
+    if function is None:
+        raise LookupError(f'No task registered as {name!r}')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        created_by=user if user is not None and user.is_authenticated else None,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts or function.max_attempts,
+    )
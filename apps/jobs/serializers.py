@@ -0,0 +1,22 @@
+"""
+Serializers for the jobs application.
+"""
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(source='uuid', read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'priority', 'attempts', 'max_attempts', 'progress',
+            'result', 'error', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        return {'done': obj.progress_done, 'total': obj.progress_total, 'percent': obj.percent}
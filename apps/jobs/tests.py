@@ -0,0 +1,135 @@
+"""
+Tests for the jobs application.
+"""
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .db import retry_when_locked
+from .models import Job
+from .registry import enqueue, task
+from .worker import Worker, claim, execute, requeue_stale, run_pending
+
+calls = []
+
+
+@task('tests.record')
+def record(job, value=None):
+    calls.append(value)
+    job.set_progress(1, 1)
+    return {'value': value}
+
+
+@task('tests.flaky', max_attempts=2)
+def flaky(job):
+    raise RuntimeError('flaky')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claims_by_priority_then_due_time(self):
+        later = enqueue('tests.record', {'value': 'later'}, run_after=timezone.now() + timedelta(hours=1))
+        low = enqueue('tests.record', {'value': 'low'})
+        high = enqueue('tests.record', {'value': 'high'}, priority=5)
+
+        self.assertEqual(claim('w').pk, high.pk)
+        self.assertEqual(claim('w').pk, low.pk)
+        self.assertIsNone(claim('w'))
+        later.refresh_from_db()
+        self.assertEqual((later.status, later.attempts), (Job.Status.QUEUED, 0))
+
+    def test_success_stores_result_and_progress(self):
+        job = enqueue('tests.record', {'value': 3})
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.percent, job.attempts), (Job.Status.SUCCEEDED, {'value': 3}, 100.0, 1))
+        self.assertEqual(calls, [3])
+
+    @override_settings(JOB_RETRY_DELAY=60)
+    def test_failures_back_off_then_fail(self):
+        job = enqueue('tests.flaky')
+        execute(claim('w'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(job.error, 'RuntimeError: flaky')
+        self.assertIsNone(claim('w'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        execute(claim('w'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 2))
+
+    def test_locked_sqlite_writes_are_retried(self):
+        outcomes = [OperationalError('database table is locked'), OperationalError('database is locked'), 'done']
+
+        def write():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        self.assertEqual(retry_when_locked(write), 'done')
+        outcomes.append(OperationalError('no such table: jobs'))
+        with self.assertRaises(OperationalError):
+            retry_when_locked(write)
+
+    def test_stale_running_jobs_are_requeued(self):
+        job = enqueue('tests.record')
+        claim('lost-worker')
+        self.assertEqual(requeue_stale(lease=60), 0)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale(lease=60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.Status.QUEUED, ''))
+
+    def test_run_workers_once(self):
+        enqueue('tests.record', {'value': 1})
+        out = StringIO()
+        call_command('run_workers', '--once', stdout=out)
+        self.assertIn('Ran 1 job(s)', out.getvalue())
+
+    def test_progress_endpoint_is_limited_to_the_owner_and_staff(self):
+        owner = User.objects.create_user(username='owner', password='pass')
+        other = User.objects.create_user(username='other', password='pass')
+        job = enqueue('tests.record', user=owner)
+        url = reverse('jobs:job-detail', kwargs={'uuid': job.uuid})
+        client = APIClient()
+
+        client.force_authenticate(owner)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['status'], 'queued')
+        client.force_authenticate(other)
+        self.assertEqual(client.get(url).status_code, 404)
+        self.assertEqual(client.get(reverse('jobs:job-list')).data['count'], 0)
+
+
+class WorkerThreadsTest(TransactionTestCase):
+    # Any retry would otherwise wait out the default backoff
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_threads_share_the_queue(self):
+        calls.clear()
+        for value in range(6):
+            enqueue('tests.record', {'value': value})
+        stop = threading.Event()
+        worker = Worker(threads=3, poll_interval=0.01, stop=stop)
+        runner = threading.Thread(target=worker.run)
+        runner.start()
+        deadline = timezone.now() + timedelta(seconds=30)
+        while Job.objects.exclude(status=Job.Status.SUCCEEDED).exists() and timezone.now() < deadline:
+            stop.wait(0.02)
+        stop.set()
+        runner.join()
+        self.assertFalse(Job.objects.exclude(status=Job.Status.SUCCEEDED).exists())
+        self.assertEqual(set(calls), set(range(6)))
@@ -0,0 +1,12 @@
+"""
+URL configuration for jobs app v1.
+"""
+from django.urls import path
+from .. import views
+
+app_name = 'jobs'
+
+urlpatterns = [
+    path('', views.JobListView.as_view(), name='job-list'),
+    path('<uuid:uuid>/', views.JobDetailView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,44 @@
+"""
+Views for the jobs application.
+"""
+from rest_framework import generics, permissions
+
+from .models import Job
+from .serializers import JobSerializer
+from apps.shared.utils.custom_response import CustomResponse
+
+
+class OwnJobsMixin:
+    """Staff see every job; other users only the jobs they started."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+
+class JobListView(OwnJobsMixin, generics.ListAPIView):
+    """Recent jobs, newest first; ``?status=`` filters by status."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+
+class JobDetailView(OwnJobsMixin, generics.RetrieveAPIView):
+    """Status, progress and result of one job; poll it after a 202."""
+    lookup_field = 'uuid'
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object())
+        return CustomResponse.success(
+            message_key="SUCCESS_MESSAGE",
+            request=request,
+            data=serializer.data
+        )
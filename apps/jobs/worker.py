@@ -0,0 +1,206 @@
+"""
+Claiming and running jobs.
+
+On databases with ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL) a
+worker locks the next due job in a short transaction; concurrent workers
+skip that row instead of waiting for it. SQLite has no row locks: a worker
+reads a few candidates and claims one with a conditional
+``UPDATE ... WHERE status = 'queued'``, which only one writer can win.
+Claims and outcomes are retried while SQLite reports a locked table
+(``db.retry_when_locked``), so a busy moment never loses an outcome.
+
+A ``Worker`` runs ``threads`` claim loops in one process. Its main thread
+refreshes the heartbeat of the jobs it is running and puts back jobs
+whose worker stopped heartbeating for ``lease`` seconds (a killed process,
+a lost host).
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Optional, Set
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .db import retry_when_locked
+from .models import Job
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+# Rows read per claim attempt where claiming is a compare-and-set
+CLAIM_CANDIDATES = 5
+
+
+def lease_seconds() -> int:
+    return getattr(settings, 'JOB_LEASE_SECONDS', 300)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the ``attempts``-th failure, capped at ``JOB_RETRY_MAX_DELAY``."""
+    base = getattr(settings, 'JOB_RETRY_DELAY', 10)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), getattr(settings, 'JOB_RETRY_MAX_DELAY', 3600)))
+
+
+def due_jobs():
+    return Job.objects.filter(status=Job.Status.QUEUED, run_after__lte=timezone.now()).order_by(
+        '-priority', 'run_after', 'id'
+    )
+
+
+def claim(worker: str) -> Optional[Job]:
+    """Mark the next due job as running for ``worker`` and return it, or ``None``."""
+    return retry_when_locked(lambda: _claim(worker))
+
+
+def _claim(worker: str) -> Optional[Job]:
+    now = timezone.now()
+    changes = {'status': Job.Status.RUNNING, 'worker': worker, 'started_at': now, 'heartbeat_at': now}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job = due_jobs().select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.attempts += 1
+            job.save(update_fields=[*changes, 'attempts', 'updated_at'])
+            return job
+
+    for pk in due_jobs().values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(pk=pk, status=Job.Status.QUEUED).update(
+            attempts=F('attempts') + 1, updated_at=now, **changes
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def execute(job: Job) -> Job:
+    """Run a claimed job and record its outcome; failures are retried while attempts remain."""
+    function = get_task(job.name)
+    try:
+        if function is None:
+            raise LookupError(f'No task registered as {job.name!r}')
+        result = function(job, **job.payload)
+    except Exception as exc:
+        logger.exception(f'Job {job.pk} ({job.name}) failed on attempt {job.attempts}/{job.max_attempts}')
+        # Owners can read the job; the traceback stays in the log
+        job.error = f'{type(exc).__name__}: {exc}'
+        if function is not None and job.attempts < job.max_attempts:
+            job.status = Job.Status.QUEUED
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.Status.SUCCEEDED
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+    job.worker = ''
+    # Progress fields belong to the task (Job.set_progress); leave them as it wrote them
+    retry_when_locked(lambda: job.save(
+        update_fields=['status', 'result', 'error', 'run_after', 'finished_at', 'worker', 'updated_at']
+    ))
+    return job
+
+
+def requeue_stale(lease: Optional[int] = None) -> int:
+    """Put back (or fail, when out of attempts) running jobs without a heartbeat for ``lease`` seconds."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING, heartbeat_at__lt=now - timedelta(seconds=lease or lease_seconds())
+    )
+    error = 'Worker stopped heartbeating'
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.Status.QUEUED, worker='', run_after=now, error=error, updated_at=now
+    )
+    failed = stale.update(status=Job.Status.FAILED, worker='', finished_at=now, error=error, updated_at=now)
+    if requeued or failed:
+        logger.warning(f'Requeued {requeued} and failed {failed} job(s) left by lost workers')
+    return requeued + failed
+
+
+def run_pending(worker: str = 'inline', limit: Optional[int] = None) -> int:
+    """Run due jobs in this thread until none are left (or ``limit`` ran); returns how many ran."""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        ran += 1
+    return ran
+
+
+class Worker:
+    def __init__(self, threads: int = 2, poll_interval: float = 1.0, lease: Optional[int] = None,
+                 name: Optional[str] = None, stop: Optional[threading.Event] = None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.lease = lease or lease_seconds()
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.stop = stop or threading.Event()
+        self.running: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def run(self) -> None:
+        """Block until ``stop`` is set; running jobs are finished before returning."""
+        loops = [
+            threading.Thread(target=self.loop, args=(f'{self.name}/{index}',), name=f'job-worker-{index}')
+            for index in range(self.threads)
+        ]
+        for thread in loops:
+            thread.start()
+        logger.info(f'Worker {self.name} started with {self.threads} thread(s)')
+        try:
+            while not self.stop.wait(max(self.lease / 3, self.poll_interval)):
+                self.housekeeping()
+        finally:
+            self.stop.set()
+            for thread in loops:
+                thread.join()
+            connection.close()
+
+    def loop(self, worker: str) -> None:
+        try:
+            while not self.stop.is_set():
+                try:
+                    job = claim(worker)
+                except DatabaseError:
+                    logger.exception(f'{worker} could not claim a job')
+                    connection.close()
+                    job = None
+                if job is None:
+                    self.stop.wait(self.poll_interval)
+                    continue
+                with self._lock:
+                    self.running.add(job.pk)
+                try:
+                    execute(job)
+                except DatabaseError:
+                    # Still not recorded after the lock retries; the job is requeued once its lease runs out
+                    logger.exception(f'{worker} could not record the outcome of job {job.pk}')
+                    connection.close()
+                finally:
+                    with self._lock:
+                        self.running.discard(job.pk)
+        finally:
+            connection.close()
+
+    def housekeeping(self) -> None:
+        with self._lock:
+            running = list(self.running)
+        try:
+            if running:
+                Job.objects.filter(pk__in=running, status=Job.Status.RUNNING).update(heartbeat_at=timezone.now())
+            requeue_stale(self.lease)
+        except DatabaseError:
+            logger.exception(f'Worker {self.name} housekeeping failed')
+            connection.close()
@@ -2,7 +2,7 @@
 Admin configuration for movies app.
 """
 from django.contrib import admin
-from .models import Movie, Genre, Actor, Review
+from .models import Movie, MovieSlugHistory, Genre, Actor, PosterVariant, Review
 
 
 @admin.register(Genre)
@@ -20,6 +20,27 @@ class ActorAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
 
 
+class PosterVariantInline(admin.TabularInline):
+    model = PosterVariant
+    fields = ['format', 'width', 'height', 'file', 'source']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class MovieSlugHistoryInline(admin.TabularInline):
+    model = MovieSlugHistory
+    fields = ['slug', 'created_at']
+    readonly_fields = fields
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
     list_display = ['title', 'slug', 'release_year', 'created_at']
@@ -27,6 +48,7 @@ class MovieAdmin(admin.ModelAdmin):
     list_filter = ['release_year', 'genres', 'created_at']
     filter_horizontal = ['genres', 'actors']
     prepopulated_fields = {'slug': ('title',)}
+    inlines = [PosterVariantInline, MovieSlugHistoryInline]
 
 
 @admin.register(Review)
@@ -5,6 +5,13 @@ class MoviesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.movies'
 
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from .search.indexing import ensure_search_indexes
+
+        post_migrate.connect(ensure_search_indexes, sender=self)
+
 
 
 
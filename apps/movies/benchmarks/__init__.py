@@ -0,0 +1,43 @@
+"""
+Benchmark regression suite for the v1 API.
+
+Baselines are kept per database engine (``baseline.<vendor>.json`` next to
+this module), because query counts and timings differ between engines: a
+run is only ever compared with numbers recorded on the same one. The
+committed ``baseline.sqlite.json`` is reproducible with the checked-in
+``core.settings_bench``::
+
+    python manage.py migrate --run-syncdb --settings=core.settings_bench
+    python manage.py bench_api --settings=core.settings_bench
+
+Against the configured PostgreSQL, run ``bench_api --update-baseline``
+once to record ``baseline.postgresql.json``.
+"""
+from pathlib import Path
+
+from django.db import connection
+
+from .runner import BenchmarkRunner, ScenarioResult, baseline_document, compare, environment
+from .scenarios import SCENARIOS, SCENARIOS_BY_NAME, BenchContext, Scenario
+
+BASELINE_DIR = Path(__file__).resolve().parent
+
+
+def baseline_path() -> Path:
+    """The baseline for the database engine of the default connection."""
+    return BASELINE_DIR / f'baseline.{connection.vendor}.json'
+
+
+__all__ = [
+    'BASELINE_DIR',
+    'BenchContext',
+    'BenchmarkRunner',
+    'SCENARIOS',
+    'SCENARIOS_BY_NAME',
+    'Scenario',
+    'ScenarioResult',
+    'baseline_document',
+    'baseline_path',
+    'compare',
+    'environment',
+]
@@ -0,0 +1,217 @@
+"""
+In-process runner for the v1 benchmark scenarios and the baseline comparison.
+
+Requests go through the full middleware stack with Django's test client.
+Every scenario is timed over ``iterations`` runs after ``warmup`` runs,
+then replayed ``alloc_iterations`` times under ``tracemalloc`` (which
+slows Python down, so it never overlaps the timed runs).
+
+Shared CI runners change speed from one run to the next, so every run
+also times a fixed pure-Python workload; baseline latencies are scaled by
+the ratio of the two calibrations before they are compared.
+"""
+import gc
+import json
+import math
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from apps.movies import cache
+from apps.shared.utils import response_cache
+
+from .scenarios import BenchContext, Scenario
+
+# Latency moves below this many milliseconds are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 0.5
+# p99 over a few dozen samples is mostly scheduler noise: recorded, not gated
+GATED_LATENCY_METRICS = ('p50_ms', 'p95_ms')
+_CALIBRATION_PAYLOAD = [{'id': i, 'title': f'Movie {i}', 'genres': ['a', 'b', 'c'], 'rating': i / 7} for i in range(200)]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries: int
+    alloc_kib: float
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data['name']
+        return data
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Linear interpolation between the closest ranks."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    low, high = math.floor(position), math.ceil(position)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'password_hasher': settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1],
+    }
+
+
+def calibrate(repeat: int = 15) -> float:
+    """Milliseconds for a fixed serialize/parse workload, median of ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(20):
+            json.loads(json.dumps(_CALIBRATION_PAYLOAD))
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(percentile(timings, 0.50), 3)
+
+
+class _QueryCounter:
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class BenchmarkRunner:
+    def __init__(self, iterations: int = 30, warmup: int = 3, alloc_iterations: int = 5):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.alloc_iterations = alloc_iterations
+        self.client = APIClient()
+        self.calibration_ms = None
+
+    def run(self, scenarios: Iterable[Scenario], context: Optional[BenchContext] = None) -> Dict[str, ScenarioResult]:
+        context = context or BenchContext.from_catalog()
+        before = calibrate()
+        # The test client talks to 'testserver', which production settings do not allow
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            results = {scenario.name: self.run_scenario(scenario, context) for scenario in scenarios}
+        self.calibration_ms = round((before + calibrate()) / 2, 3)
+        return results
+
+    def run_scenario(self, scenario: Scenario, context: BenchContext) -> ScenarioResult:
+        for _ in range(self.warmup):
+            self.request(scenario, context)
+
+        timings, queries = [], []
+        gc.collect()
+        for _ in range(self.iterations):
+            elapsed, count = self.request(scenario, context)
+            timings.append(elapsed * 1000)
+            queries.append(count)
+
+        allocations = []
+        tracemalloc.start()
+        try:
+            for _ in range(self.alloc_iterations):
+                allocations.append(self.request(scenario, context, trace_memory=True))
+        finally:
+            tracemalloc.stop()
+
+        return ScenarioResult(
+            name=scenario.name,
+            iterations=self.iterations,
+            p50_ms=round(percentile(timings, 0.50), 3),
+            p95_ms=round(percentile(timings, 0.95), 3),
+            p99_ms=round(percentile(timings, 0.99), 3),
+            # Queries do not vary between identical requests; the worst run is reported
+            queries=max(queries),
+            alloc_kib=round(percentile(allocations, 0.50), 1) if allocations else 0.0,
+        )
+
+    def request(self, scenario: Scenario, context: BenchContext, trace_memory: bool = False):
+        """Run one iteration; returns ``(seconds, queries)`` or, when tracing, peak KiB allocated."""
+        bench_request = scenario.prepare(context)
+        if not scenario.cached:
+            self.expire_cached_responses(context)
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {bench_request.token}'} if bench_request.token else {}
+        send = getattr(self.client, bench_request.method)
+        counter = _QueryCounter()
+
+        if trace_memory:
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            response = send(bench_request.path, bench_request.data, **headers)
+            peak = tracemalloc.get_traced_memory()[1]
+            self.check(scenario, response)
+            return (peak - start) / 1024
+
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = send(bench_request.path, bench_request.data, **headers)
+            elapsed = time.perf_counter() - started
+        self.check(scenario, response)
+        return elapsed, counter.count
+
+    @staticmethod
+    def expire_cached_responses(context: BenchContext) -> None:
+        response_cache.invalidate(cache.GENRES, cache.ACTORS)
+        cache.invalidate_movies([(context.movie.pk, context.movie.slug)])
+
+    @staticmethod
+    def check(scenario: Scenario, response) -> None:
+        if response.status_code != scenario.expected_status:
+            raise AssertionError(
+                f'{scenario.name}: expected {scenario.expected_status}, got {response.status_code}: '
+                f'{response.content[:300]!r}'
+            )
+
+
+def compare(results: Dict[str, ScenarioResult], baseline: Dict, threshold: float,
+            calibration_ms: Optional[float] = None) -> List[str]:
+    """
+    Regressions of ``results`` against a stored baseline.
+
+    p50/p95 latency and allocations fail when they grow by more than
+    ``threshold`` (0.25 = 25%); any extra query per request fails. With
+    both calibrations known, baseline latencies are first scaled to this
+    machine's current speed.
+    """
+    regressions = []
+    stored = baseline.get('scenarios', {})
+    speed = 1.0
+    if calibration_ms and baseline.get('calibration_ms'):
+        speed = calibration_ms / baseline['calibration_ms']
+    for name, result in results.items():
+        before = stored.get(name)
+        if before is None:
+            continue
+        if result.queries > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {result.queries}")
+        for metric in GATED_LATENCY_METRICS:
+            old, new = before[metric] * speed, getattr(result, metric)
+            if new - old > MIN_LATENCY_DELTA_MS and new > old * (1 + threshold):
+                regressions.append(f'{name}: {metric} {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100:.0f}%)')
+        old, new = before['alloc_kib'], result.alloc_kib
+        if old and new > old * (1 + threshold):
+            regressions.append(f'{name}: alloc_kib {old:.1f} -> {new:.1f} (+{(new / old - 1) * 100:.0f}%)')
+    return regressions
+
+
+def baseline_document(results: Dict[str, ScenarioResult], calibration_ms: float, **metadata) -> Dict:
+    return {
+        'environment': environment(),
+        'calibration_ms': calibration_ms,
+        **metadata,
+        'scenarios': {name: result.to_dict() for name, result in sorted(results.items())},
+    }
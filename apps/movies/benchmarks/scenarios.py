@@ -0,0 +1,131 @@
+"""
+The v1 requests the benchmark suite times.
+
+A scenario names a route and builds one request per iteration from the
+seeded ``BenchContext``. ``prepare`` runs outside the timed section, so
+per-iteration setup (a fresh user for review create or register) never
+counts towards the request's latency, queries or allocations.
+"""
+import itertools
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.movies.models import Movie
+
+BENCH_PASSWORD = 'bench-password-1'
+
+
+@dataclass
+class BenchRequest:
+    method: str
+    path: str
+    data: Optional[dict] = None
+    token: Optional[str] = None
+
+
+@dataclass
+class BenchContext:
+    """Rows the scenarios point at, picked once from the seeded catalog."""
+    movie: Movie
+    search_term: str
+    suggest_prefix: str
+    account: User
+    _sequence: itertools.count = field(default_factory=itertools.count)
+
+    @classmethod
+    def from_catalog(cls) -> 'BenchContext':
+        # The most reviewed movie: the heaviest detail page is the one worth watching
+        movie = Movie.objects.order_by('-rating_count', 'pk').first()
+        if movie is None:
+            raise LookupError('The catalog is empty; seed it before benchmarking')
+        word = next((part for part in movie.title.split() if len(part) >= 3), movie.title)
+        account, created = User.objects.get_or_create(username='bench-account')
+        if created or not account.check_password(BENCH_PASSWORD):
+            account.set_password(BENCH_PASSWORD)
+            account.save(update_fields=['password'])
+        return cls(movie=movie, search_term=word.lower(), suggest_prefix=word[:3].lower(), account=account)
+
+    def unique(self, prefix: str) -> str:
+        return f'{prefix}{next(self._sequence)}'
+
+    def new_user(self) -> User:
+        return User.objects.create_user(username=self.unique('bench-user-'), password=BENCH_PASSWORD)
+
+
+def token_for(user: User) -> str:
+    return str(AccessToken.for_user(user))
+
+
+@dataclass
+class Scenario:
+    name: str
+    url_name: str
+    prepare: Callable[[BenchContext], BenchRequest]
+    # Cold scenarios expire the response cache before every iteration
+    cached: bool = False
+    expected_status: int = 200
+
+
+def _get(path: str, **data) -> Callable[[BenchContext], BenchRequest]:
+    return lambda context: BenchRequest('get', path, data or None)
+
+
+def _movie_detail(lookup: Callable[[Movie], object]) -> Callable[[BenchContext], BenchRequest]:
+    return lambda context: BenchRequest('get', f'/api/v1/movies/{lookup(context.movie)}/')
+
+
+def _search(context: BenchContext) -> BenchRequest:
+    return BenchRequest('get', '/api/v1/movies/search/', {'q': context.search_term})
+
+
+def _suggest(context: BenchContext) -> BenchRequest:
+    return BenchRequest('get', '/api/v1/movies/suggest/', {'q': context.suggest_prefix})
+
+
+def _review_create(context: BenchContext) -> BenchRequest:
+    data = {'movie': context.movie.pk, 'rating': 7, 'text': 'Benchmark review'}
+    return BenchRequest('post', '/api/v1/movies/reviews/create/', data, token_for(context.new_user()))
+
+
+def _register(context: BenchContext) -> BenchRequest:
+    username = context.unique('bench-register-')
+    data = {
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': BENCH_PASSWORD,
+        'password_confirm': BENCH_PASSWORD,
+    }
+    return BenchRequest('post', '/api/v1/auth/register/', data)
+
+
+def _token(context: BenchContext) -> BenchRequest:
+    data = {'username': context.account.username, 'password': BENCH_PASSWORD}
+    return BenchRequest('post', '/api/v1/auth/token/', data)
+
+
+def _profile(context: BenchContext) -> BenchRequest:
+    return BenchRequest('get', '/api/v1/auth/profile/', token=token_for(context.account))
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario('genre-list', 'movies:genre-list', _get('/api/v1/movies/genres/')),
+    Scenario('actor-list', 'movies:actor-list', _get('/api/v1/movies/actors/')),
+    Scenario('movie-list', 'movies:movie-list', _get('/api/v1/movies/')),
+    Scenario('movie-list-cached', 'movies:movie-list', _get('/api/v1/movies/'), cached=True),
+    Scenario('movie-list-page-100', 'movies:movie-list', _get('/api/v1/movies/', page_size=100)),
+    Scenario('movie-detail-slug', 'movies:movie-detail', _movie_detail(lambda movie: movie.slug)),
+    Scenario('movie-detail-id', 'movies:movie-detail', _movie_detail(lambda movie: movie.pk)),
+    Scenario('movie-detail-cached', 'movies:movie-detail', _movie_detail(lambda movie: movie.slug), cached=True),
+    Scenario('movie-search', 'movies:movie-search', _search),
+    Scenario('movie-suggest', 'movies:movie-suggest', _suggest),
+    Scenario('review-list', 'movies:review-list', _get('/api/v1/movies/reviews/')),
+    Scenario('review-create', 'movies:review-create', _review_create, expected_status=201),
+    Scenario('register', 'register', _register, expected_status=201),
+    Scenario('token', 'token-obtain-pair', _token),
+    Scenario('profile', 'profile', _profile),
+]
+
+SCENARIOS_BY_NAME: Dict[str, Scenario] = {scenario.name: scenario for scenario in SCENARIOS}
@@ -0,0 +1,27 @@
+"""
+Response cache namespaces for the movies catalog and their invalidation.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+from apps.shared.utils import response_cache
+
+GENRES = 'genres'
+ACTORS = 'actors'
+MOVIES = 'movies'
+
+
+def movie_namespace(lookup) -> str:
+    """Namespace of one movie detail entry; detail URLs accept a slug or an id."""
+    return f'movie:{lookup}'
+
+
+def movie_namespaces(pk, slug: Optional[str] = None, old_slug: Optional[str] = None) -> List[str]:
+    return [movie_namespace(value) for value in (pk, slug, old_slug) if value]
+
+
+def invalidate_movies(movies: Iterable[Tuple[int, str]], lists: bool = True) -> None:
+    """Invalidate the detail entries of ``(pk, slug)`` pairs and, by default, the movie list."""
+    namespaces = [MOVIES] if lists else []
+    for pk, slug in movies:
+        namespaces.extend(movie_namespaces(pk, slug))
+    response_cache.invalidate(*namespaces)
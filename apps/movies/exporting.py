@@ -0,0 +1,111 @@
+"""
+Streaming export of the whole catalog as CSV or JSON lines.
+
+Movies are read in primary-key order through a server-side cursor
+(``iterator(chunk_size=...)``); for each chunk the genre and actor names
+come from one grouped query per relation, so an export is a single pass
+over the tables and holds one chunk in memory at a time.
+
+The CSV columns are a superset of what ``importing`` reads, so an export
+can be imported elsewhere as is.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Movie
+
+DEFAULT_CHUNK_SIZE = 2000
+MOVIE_COLUMNS = (
+    'id', 'uuid', 'slug', 'title', 'description', 'release_year',
+    'rating_avg', 'rating_count', 'created_at', 'updated_at',
+)
+COLUMNS = (*MOVIE_COLUMNS, 'genres', 'actors')
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _names_by_movie(relation: str, movie_ids: List[int]) -> Dict[int, List[str]]:
+    through = Movie._meta.get_field(relation).remote_field.through
+    target = Movie._meta.get_field(relation).m2m_reverse_field_name()
+    names = defaultdict(list)
+    rows = (
+        through.objects.filter(movie_id__in=movie_ids)
+        .order_by('movie_id', f'{target}__name')
+        .values_list('movie_id', f'{target}__name')
+    )
+    for movie_id, name in rows:
+        names[movie_id].append(name)
+    return names
+
+
+def iter_movies(queryset=None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, object]]:
+    """Every movie as a dict of ``COLUMNS``, genre and actor names sorted."""
+    queryset = Movie.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values_list(*MOVIE_COLUMNS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        movie_ids = [row[0] for row in chunk]
+        genres = _names_by_movie('genres', movie_ids)
+        actors = _names_by_movie('actors', movie_ids)
+        for row in chunk:
+            movie = dict(zip(MOVIE_COLUMNS, row))
+            movie['genres'] = genres.get(row[0], [])
+            movie['actors'] = actors.get(row[0], [])
+            yield movie
+
+
+def _in_chunks(movies: Iterable[Dict[str, object]], size: int) -> Iterator[List[Dict[str, object]]]:
+    movies = iter(movies)
+    while True:
+        chunk = list(islice(movies, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def render_csv(movies: Iterable[Dict[str, object]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """CSV text, one piece per chunk of movies; names are comma separated inside their cell."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for chunk in _in_chunks(movies, chunk_size):
+        for movie in chunk:
+            writer.writerow([
+                *(movie[column] for column in MOVIE_COLUMNS),
+                ','.join(movie['genres']),
+                ','.join(movie['actors']),
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export
+        yield buffer.getvalue()
+
+
+def render_jsonl(movies: Iterable[Dict[str, object]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """One JSON object per line, one piece per chunk of movies."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for chunk in _in_chunks(movies, chunk_size):
+        yield ''.join(encoder.encode(movie) + '\n' for movie in chunk)
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'jsonl': render_jsonl,
+}
+
+
+def export(format: str, queryset=None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """The catalog rendered in ``format`` (a key of ``FORMATS``), lazily."""
+    return RENDERERS[format](iter_movies(queryset, chunk_size), chunk_size)
@@ -0,0 +1,417 @@
+"""
+Streaming, batched CSV import of movies.
+
+The upload is decoded and parsed row by row, so memory depends on the
+batch size rather than on the file. Genre and actor names resolve through
+name -> id maps loaded with one query per table when the import starts;
+names the maps do not know yet are created together, once per batch.
+Each batch of ``batch_size`` valid rows is written in one transaction:
+one insert for the new names, one for the movies and one per M2M
+through table. With a seeding writer (``COPY`` on PostgreSQL, batched
+``executemany`` elsewhere) no model instances are built and new ids are
+read back through their unique slugs; without one, ``bulk_create``.
+
+Expected columns: ``title``, ``description``, ``release_year`` and the
+comma separated ``genres`` and ``actors``. Rows that fail validation are
+reported with their line number and never reach the database.
+
+The engine takes the model classes it writes to, so it serves both the
+catalog (``catalog_importer``) and the legacy ``movies`` app. Bulk writes
+skip model signals; ``on_batch`` is where the caller catches up on the
+work those signals would have done.
+"""
+import csv
+import io
+import time
+import uuid
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+DEFAULT_BATCH_SIZE = 2000
+# Error reports are returned in API responses; past this only the count grows
+MAX_REPORTED_ERRORS = 100
+REQUIRED_COLUMNS = ('title', 'release_year')
+MIN_RELEASE_YEAR, MAX_RELEASE_YEAR = 1850, 2100
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be imported at all (missing columns, not UTF-8 text)."""
+
+
+@dataclass
+class RowError:
+    row: int
+    title: str
+    message: str
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'row': self.row, 'title': self.title, 'message': self.message}
+
+    def __str__(self):
+        return f'Row {self.row} ({self.title or "untitled"}): {self.message}'
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, error: RowError) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': [error.to_dict() for error in self.errors],
+            'seconds': round(self.seconds, 3),
+        }
+
+
+@dataclass
+class ParsedRow:
+    row: int
+    title: str
+    description: str
+    release_year: int
+    genres: Tuple[str, ...]
+    actors: Tuple[str, ...]
+
+
+class Created(NamedTuple):
+    pk: int
+    slug: Optional[str]
+    label: str
+
+
+@dataclass
+class ImportBatch:
+    """What one committed batch wrote, handed to ``on_batch``."""
+    movies: List[Created]
+    rows: List[ParsedRow]
+    genres: List[Created]
+    actors: List[Created]
+
+
+def split_names(value: Optional[str]) -> Tuple[str, ...]:
+    """Comma separated names, stripped, without blanks or repeats."""
+    if not value:
+        return ()
+    return tuple(dict.fromkeys(name for name in (part.strip() for part in value.split(',')) if name))
+
+
+def check_columns(reader: csv.DictReader) -> None:
+    try:
+        columns = reader.fieldnames or []
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f'File is not valid text: {e}')
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ImportFormatError(f'Missing column(s): {", ".join(missing)}')
+
+
+def check_header(file, encoding: str = 'utf-8-sig') -> None:
+    """Fail fast, before queueing an import, on a file whose header cannot be imported; rewinds ``file``."""
+    text = io.TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        check_columns(csv.DictReader(text))
+    finally:
+        text.detach()
+        file.seek(0)
+
+
+class MovieCsvImporter:
+    def __init__(self, movie_model, genre_model, actor_model, batch_size: int = DEFAULT_BATCH_SIZE,
+                 on_batch: Optional[Callable[[ImportBatch], None]] = None, writer=None):
+        self.movie_model = movie_model
+        self.genre_model = genre_model
+        self.actor_model = actor_model
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        # A seeding writer (COPY / executemany) skips model instances; without one rows go through bulk_create
+        self.writer = writer
+        self.genre_ids: Dict[str, int] = {}
+        self.actor_ids: Dict[str, int] = {}
+        # Names the current batch creates, forgotten again if it rolls back
+        self.batch_genres: List[str] = []
+        self.batch_actors: List[str] = []
+        self.limits = {
+            'title': movie_model._meta.get_field('title').max_length,
+            'genre': genre_model._meta.get_field('name').max_length,
+            'actor': actor_model._meta.get_field('name').max_length,
+        }
+
+    def import_file(self, file, encoding: str = 'utf-8-sig') -> ImportReport:
+        """Import a binary file object (an upload, an open file) without reading it whole."""
+        text = io.TextIOWrapper(file, encoding=encoding, newline='')
+        try:
+            return self.import_rows(csv.DictReader(text))
+        finally:
+            # Leave the underlying file to its owner (uploads close themselves)
+            text.detach()
+
+    def import_rows(self, reader: csv.DictReader) -> ImportReport:
+        report = ImportReport()
+        started = time.perf_counter()
+        check_columns(reader)
+        self.load_names()
+        batch: List[ParsedRow] = []
+        rows = iter(reader)
+        while True:
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            except (csv.Error, UnicodeDecodeError) as e:
+                # The reader cannot resynchronise after either; keep what was imported so far
+                report.add_error(RowError(reader.line_num, '', f'Unreadable input, import stopped: {e}'))
+                break
+            report.rows += 1
+            try:
+                batch.append(self.parse(reader.line_num, row))
+            except ValueError as e:
+                report.add_error(RowError(reader.line_num, (row.get('title') or '').strip(), str(e)))
+                continue
+            if len(batch) >= self.batch_size:
+                self.flush(batch, report)
+                batch = []
+        if batch:
+            self.flush(batch, report)
+
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def load_names(self) -> None:
+        self.genre_ids = dict(self.genre_model.objects.order_by().values_list('name', 'id'))
+        # Actor names are not unique; the oldest actor of a name wins, as with get_or_create
+        self.actor_ids = dict(
+            self.actor_model.objects.order_by('-id').values_list('name', 'id').iterator(chunk_size=10000)
+        )
+
+    def parse(self, line: int, row: Dict[str, Optional[str]]) -> ParsedRow:
+        title = (row.get('title') or '').strip()
+        if not title:
+            raise ValueError('title is required')
+        if len(title) > self.limits['title']:
+            raise ValueError(f'title is longer than {self.limits["title"]} characters')
+        try:
+            release_year = int((row.get('release_year') or '').strip())
+        except ValueError:
+            raise ValueError(f'release_year {row.get("release_year")!r} is not a year')
+        if not MIN_RELEASE_YEAR <= release_year <= MAX_RELEASE_YEAR:
+            raise ValueError(f'release_year {release_year} is out of range')
+
+        genres, actors = split_names(row.get('genres')), split_names(row.get('actors'))
+        for kind, names in (('genre', genres), ('actor', actors)):
+            for name in names:
+                if len(name) > self.limits[kind]:
+                    raise ValueError(f'{kind} name {name[:20]!r} is longer than {self.limits[kind]} characters')
+        return ParsedRow(line, title, (row.get('description') or '').strip(), release_year, genres, actors)
+
+    def flush(self, batch: List[ParsedRow], report: ImportReport) -> None:
+        try:
+            with transaction.atomic():
+                written = self.write(batch)
+        except Exception as e:
+            # Names created by the rolled back batch do not exist after all
+            for name in self.batch_genres:
+                self.genre_ids.pop(name, None)
+            for name in self.batch_actors:
+                self.actor_ids.pop(name, None)
+            for parsed in batch:
+                report.add_error(RowError(parsed.row, parsed.title, f'Batch not saved: {e}'))
+            return
+        report.imported += len(written.movies)
+        if self.on_batch is not None:
+            self.on_batch(written)
+
+    def write(self, batch: List[ParsedRow]) -> ImportBatch:
+        self.batch_genres = self.unknown_names(self.genre_ids, (name for parsed in batch for name in parsed.genres))
+        self.batch_actors = self.unknown_names(self.actor_ids, (name for parsed in batch for name in parsed.actors))
+        genres = self.create_names(self.genre_model, self.genre_ids, self.batch_genres)
+        actors = self.create_names(self.actor_model, self.actor_ids, self.batch_actors)
+
+        movies = self.insert(
+            self.movie_model,
+            ('title', 'description', 'release_year'),
+            [(parsed.title, parsed.description, parsed.release_year) for parsed in batch],
+        )
+        for relation, ids, attribute in (('genres', self.genre_ids, 'genres'), ('actors', self.actor_ids, 'actors')):
+            field = self.movie_model._meta.get_field(relation)
+            columns = (f'{field.m2m_field_name()}_id', f'{field.m2m_reverse_field_name()}_id')
+            links = [
+                (movie.pk, ids[name])
+                for movie, parsed in zip(movies, batch)
+                for name in getattr(parsed, attribute)
+            ]
+            self.insert_links(field.remote_field.through, columns, links)
+        return ImportBatch(movies=movies, rows=batch, genres=genres, actors=actors)
+
+    @staticmethod
+    def unknown_names(ids: Dict[str, int], names: Iterable[str]) -> List[str]:
+        return [name for name in dict.fromkeys(names) if name not in ids]
+
+    def create_names(self, model, ids: Dict[str, int], missing: List[str]) -> List[Created]:
+        """Create the ``missing`` names and add them to ``ids``."""
+        if not missing:
+            return []
+        if model._meta.get_field('name').unique:
+            # Another import may have created a name since the maps were loaded; skip it, then read
+            # back whichever row holds each name (unique names are genres: a handful per batch)
+            instances = [model(name=name) for name in missing]
+            for instance, slug in zip(instances, self.unique_slugs(model, missing) or ()):
+                instance.slug = slug
+            model.objects.bulk_create(instances, ignore_conflicts=True)
+            created = [
+                Created(instance.pk, getattr(instance, 'slug', None), instance.name)
+                for instance in model.objects.filter(name__in=missing)
+            ]
+        else:
+            created = self.insert(model, ('name',), [(name,) for name in missing])
+        ids.update((entry.label, entry.pk) for entry in created)
+        return created
+
+    def insert(self, model, columns: Sequence[str], rows: List[tuple]) -> List[Created]:
+        """
+        Insert ``rows`` (the first column is the label a slug is made from)
+        and return them with their ids, in order.
+
+        Without a writer this is ``bulk_create``. With one, the remaining
+        columns are filled with their defaults, the rows are written without
+        model instances, and the ids are read back through the unique slugs.
+        """
+        slugs = self.unique_slugs(model, [row[0] for row in rows])
+        if self.writer is None or slugs is None:
+            instances = [model(**dict(zip(columns, row))) for row in rows]
+            for instance, slug in zip(instances, slugs or ()):
+                instance.slug = slug
+            model.objects.bulk_create(instances)
+            self.ensure_ids(model, instances)
+            return [Created(instance.pk, slugs and instance.slug, row[0]) for instance, row in zip(instances, rows)]
+
+        filler_columns, fill = self.defaults(model, (*columns, 'slug'))
+        self.writer.write(
+            model,
+            (*columns, 'slug', *filler_columns),
+            [(*row, slug, *fill()) for row, slug in zip(rows, slugs)],
+        )
+        ids = dict(model.objects.filter(slug__in=slugs).order_by().values_list('slug', 'id'))
+        return [Created(ids[slug], slug, row[0]) for row, slug in zip(rows, slugs)]
+
+    def insert_links(self, through, columns: Tuple[str, str], links: List[Tuple[int, int]]) -> None:
+        if self.writer is not None:
+            self.writer.write(through, columns, links)
+        else:
+            through.objects.bulk_create(
+                [through(**dict(zip(columns, link))) for link in links], batch_size=self.batch_size
+            )
+
+    @staticmethod
+    def defaults(model, given: Sequence[str]) -> Tuple[List[str], Callable[[], tuple]]:
+        """The columns not in ``given`` and a callable producing their values for one new row."""
+        now = timezone.now()
+        columns, makers = [], []
+        for model_field in model._meta.concrete_fields:
+            if model_field.primary_key or model_field.attname in given:
+                continue
+            columns.append(model_field.attname)
+            if isinstance(model_field, models.UUIDField) and model_field.has_default():
+                # Hex digits are accepted by every backend and by COPY (see seeding.new_uuid)
+                makers.append(lambda: uuid.uuid4().hex)
+            elif getattr(model_field, 'auto_now', False) or getattr(model_field, 'auto_now_add', False):
+                makers.append(lambda: now)
+            else:
+                makers.append(lambda value=model_field.get_default(): value)
+        return columns, lambda: tuple([make() for make in makers])
+
+    @staticmethod
+    def unique_slugs(model, labels: List[str]) -> Optional[List[str]]:
+        """
+        Unique slugs for new rows, at one query per batch; ``None`` for models without slugs.
+
+        Slugs already taken, in the table or earlier in the batch, get a
+        random suffix instead of probing ``-2``, ``-3``... one query at a time.
+        """
+        if not any(f.name == 'slug' for f in model._meta.fields):
+            return None
+        max_length = model._meta.get_field('slug').max_length
+        candidates = [slugify(label)[:max_length].strip('-') for label in labels]
+        taken = set(model.objects.filter(slug__in=set(candidates)).order_by().values_list('slug', flat=True))
+        slugs = []
+        for slug in candidates:
+            if not slug or slug in taken:
+                suffix = uuid.uuid4().hex[:8]
+                slug = f'{slug[:max_length - len(suffix) - 1].rstrip("-")}-{suffix}' if slug else suffix
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    @staticmethod
+    def ensure_ids(model, instances: list) -> None:
+        """Fill primary keys on backends whose bulk inserts do not return them."""
+        if connection.features.can_return_rows_from_bulk_insert or not instances:
+            return
+        if not any(f.name == 'slug' for f in model._meta.fields):
+            raise ImportFormatError(f'{connection.vendor} cannot return ids from bulk inserts into {model.__name__}')
+        ids = dict(model.objects.filter(slug__in=[i.slug for i in instances]).values_list('slug', 'id'))
+        for instance in instances:
+            instance.pk = ids[instance.slug]
+
+
+def refresh_catalog(batch: ImportBatch, search_index: bool = True) -> None:
+    """Index, suggest and cache upkeep for one imported batch (bulk writes skip the signals)."""
+    from . import cache
+    from .search.indexing import document_for, store_documents
+    from .search.suggest import index_if_built
+    from apps.shared.utils import response_cache
+
+    if search_index:
+        # Everything the documents need is in the batch; no need to read the movies back
+        store_documents([
+            document_for(movie.pk, row.title, row.description, sorted(row.genres), sorted(row.actors))
+            for movie, row in zip(batch.movies, batch.rows)
+        ])
+    suggest = index_if_built()
+    if suggest is not None:
+        for kind, created in (('movie', batch.movies), ('genre', batch.genres), ('actor', batch.actors)):
+            for entry in created:
+                suggest.upsert(kind, entry.pk, entry.slug, entry.label)
+    namespaces = [cache.MOVIES]
+    if batch.genres:
+        namespaces.append(cache.GENRES)
+    if batch.actors:
+        namespaces.append(cache.ACTORS)
+    response_cache.invalidate(*namespaces)
+
+
+def catalog_importer(batch_size: int = DEFAULT_BATCH_SIZE, search_index: bool = True) -> MovieCsvImporter:
+    """
+    Importer writing to the catalog and keeping its caches current.
+
+    With ``search_index=False`` the new movies stay out of search until
+    ``rebuild_search_index`` runs; worth it for very large files on SQLite,
+    whose fallback index writes one row per distinct term.
+    """
+    from .models import Actor, Genre, Movie
+    from .seeding import default_writer
+    return MovieCsvImporter(
+        Movie, Genre, Actor,
+        batch_size=batch_size,
+        on_batch=partial(refresh_catalog, search_index=search_index),
+        writer=default_writer(),
+    )
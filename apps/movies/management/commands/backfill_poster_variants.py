@@ -0,0 +1,43 @@
+"""
+Management command to generate variants for posters that have none.
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from apps.jobs.registry import enqueue
+from apps.movies import tasks
+from apps.movies.models import Movie, PosterVariant
+from apps.movies.posters import generate_variants
+
+
+class Command(BaseCommand):
+    help = 'Queues (or runs) poster variant generation for movies whose poster has no up-to-date variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Regenerate every poster, e.g. after changing POSTER_VARIANT_WIDTHS',
+        )
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Generate in this process instead of queueing jobs for run_workers',
+        )
+
+    def handle(self, *args, **options):
+        movies = Movie.objects.exclude(poster='').exclude(poster__isnull=True).order_by('pk')
+        if not options['all']:
+            current = PosterVariant.objects.filter(movie=OuterRef('pk'), source=OuterRef('poster'))
+            movies = movies.exclude(Exists(current))
+
+        count = 0
+        for movie in movies.iterator():
+            if options['inline']:
+                generate_variants(movie)
+            else:
+                # Below uploads, so new posters are not stuck behind the backlog
+                enqueue(tasks.GENERATE_POSTER_VARIANTS, {'movie_id': movie.pk}, priority=-1)
+            count += 1
+        action = 'Generated' if options['inline'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(f'{action} poster variants for {count} movie(s)'))
@@ -0,0 +1,117 @@
+"""
+Management command running the v1 benchmark suite against the stored baseline.
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.movies.benchmarks import (
+    SCENARIOS,
+    SCENARIOS_BY_NAME,
+    BenchmarkRunner,
+    baseline_document,
+    baseline_path,
+    compare,
+    environment,
+)
+from apps.movies.search import rebuild_index
+from apps.movies.seeding import CatalogGenerator, SeedScale
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every v1 endpoint in-process and fails on regressions against the baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--alloc-iterations', type=int, default=5)
+        parser.add_argument('--movies', type=int, default=200, help='Size of the seeded catalog')
+        parser.add_argument(
+            '--use-existing',
+            action='store_true',
+            help='Benchmark the current catalog instead of seeding one',
+        )
+        parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS_BY_NAME), help='Scenarios to run')
+        parser.add_argument(
+            '--baseline',
+            type=Path,
+            help='Baseline file; defaults to the one for the current database engine',
+        )
+        parser.add_argument('--threshold', type=float, default=0.25, help='Allowed growth, 0.25 = 25%%')
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results as the new baseline')
+
+    def handle(self, *args, **options):
+        options['baseline'] = options['baseline'] or baseline_path()
+        scenarios = [SCENARIOS_BY_NAME[name] for name in options['only']] if options['only'] else SCENARIOS
+        runner = BenchmarkRunner(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            alloc_iterations=options['alloc_iterations'],
+        )
+        # Scenarios write (reviews, users); nothing of a run is ever committed
+        try:
+            with transaction.atomic():
+                if not options['use_existing']:
+                    scale = SeedScale(movies=options['movies'], actors=300, users=200)
+                    CatalogGenerator(scale, seed=1).run()
+                    rebuild_index()
+                results = runner.run(scenarios)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.report(results)
+        if options['update_baseline']:
+            self.write_baseline(options, results, runner.calibration_ms)
+            return
+
+        baseline = self.read_baseline(options['baseline'])
+        if baseline is None:
+            return
+        if baseline.get('environment') != environment():
+            self.stderr.write(self.style.WARNING(
+                f"Baseline was recorded on {baseline.get('environment')}, this run is {environment()}; "
+                f"latency comparisons are only indicative"
+            ))
+        self.stdout.write(
+            f"Calibration {runner.calibration_ms:.2f} ms (baseline {baseline.get('calibration_ms', '?')} ms)"
+        )
+        regressions = compare(results, baseline, options['threshold'], runner.calibration_ms)
+        if regressions:
+            raise CommandError('Regressions against the baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {options["baseline"]}'))
+
+    def report(self, results):
+        self.stdout.write(f'{"scenario":<22} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8} {"alloc KiB":>10}')
+        for result in results.values():
+            self.stdout.write(
+                f'{result.name:<22} {result.p50_ms:>8.2f} {result.p95_ms:>8.2f} {result.p99_ms:>8.2f} '
+                f'{result.queries:>8} {result.alloc_kib:>10.1f}'
+            )
+
+    def read_baseline(self, path: Path):
+        if not path.exists():
+            self.stderr.write(self.style.WARNING(f'No baseline at {path}; run with --update-baseline to record one'))
+            return None
+        return json.loads(path.read_text())
+
+    def write_baseline(self, options, results, calibration_ms):
+        path = options['baseline']
+        document = baseline_document(
+            results,
+            calibration_ms,
+            movies=None if options['use_existing'] else options['movies'],
+            iterations=options['iterations'],
+        )
+        if path.exists() and options['only']:
+            # Partial runs only replace the scenarios they measured
+            previous = json.loads(path.read_text())
+            document['scenarios'] = {**previous.get('scenarios', {}), **document['scenarios']}
+        path.write_text(json.dumps(document, indent=2) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
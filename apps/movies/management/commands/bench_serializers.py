@@ -0,0 +1,93 @@
+"""
+Management command comparing ModelSerializer and compiled serializer throughput.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from apps.movies.models import Genre, Movie
+from apps.movies.serializers import MovieListSerializer, CompiledMovieListSerializer
+
+DEFAULT_PAGE_SIZES = [12, 50, 100, 500, 1000]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Times MovieListSerializer against its compiled counterpart (query + serialize + render)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=DEFAULT_PAGE_SIZES)
+        parser.add_argument('--repeat', type=int, default=5, help='Best of N runs per page size')
+        parser.add_argument(
+            '--synthetic',
+            action='store_true',
+            help='Benchmark against generated movies inside a transaction that is rolled back',
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = sorted(options['page_sizes'])
+        try:
+            with transaction.atomic():
+                if options['synthetic']:
+                    self.create_synthetic(max(page_sizes))
+                self.run(page_sizes, options['repeat'])
+                if options['synthetic']:
+                    raise Rollback
+        except Rollback:
+            pass
+
+    def create_synthetic(self, count):
+        genres = [Genre.objects.get_or_create(name=f'Bench genre {i}')[0] for i in range(8)]
+        movies = Movie.objects.bulk_create(
+            Movie(
+                title=f'Bench movie {i}', slug=f'bench-movie-{i}', description='x',
+                release_year=1950 + i % 70, rating_sum=i % 50, rating_count=i % 7,
+            )
+            for i in range(count)
+        )
+        through = Movie.genres.through
+        through.objects.bulk_create(
+            through(movie_id=movie.pk, genre_id=genres[(movie.pk + offset) % len(genres)].pk)
+            for movie in movies
+            for offset in range(3)
+        )
+
+    def run(self, page_sizes, repeat):
+        available = Movie.objects.count()
+        if available < page_sizes[-1]:
+            raise CommandError(f'Only {available} movie(s) in the catalog; use --synthetic or smaller --page-sizes')
+
+        request = RequestFactory().get('/api/v1/movies/')
+        context = {'request': request}
+        renderer = JSONRenderer()
+        queryset = Movie.objects.prefetch_related('genres').order_by('-created_at', '-id')
+
+        def model_serializer(size):
+            return renderer.render(MovieListSerializer(queryset[:size], many=True, context=context).data)
+
+        def compiled_serializer(size):
+            rows = CompiledMovieListSerializer.rows(queryset)[:size]
+            return renderer.render(CompiledMovieListSerializer(rows, many=True, context=context).data)
+
+        self.stdout.write(f'{"page size":>10} {"model ms":>10} {"compiled ms":>12} {"speedup":>8}')
+        for size in page_sizes:
+            if model_serializer(size) != compiled_serializer(size):
+                raise CommandError(f'Outputs differ at page size {size}')
+            model_ms = self.best_of(repeat, model_serializer, size)
+            compiled_ms = self.best_of(repeat, compiled_serializer, size)
+            self.stdout.write(f'{size:>10} {model_ms:>10.2f} {compiled_ms:>12.2f} {model_ms / compiled_ms:>7.1f}x')
+
+    @staticmethod
+    def best_of(repeat, function, size):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function(size)
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
@@ -0,0 +1,26 @@
+"""
+Management command to export the whole catalog as CSV or JSON lines.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.movies import exporting
+
+
+class Command(BaseCommand):
+    help = 'Streams every movie with its genres, actors and rating aggregates to a file or stdout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exporting.FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=exporting.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        pieces = exporting.export(options['format'], chunk_size=options['chunk_size'])
+        if not options['output']:
+            for piece in pieces:
+                self.stdout.write(piece, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as file:
+            for piece in pieces:
+                file.write(piece)
+        self.stderr.write(self.style.SUCCESS(f"Exported movies to {options['output']}"))
@@ -0,0 +1,35 @@
+"""
+Management command importing movies from a CSV file.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.movies.importing import DEFAULT_BATCH_SIZE, ImportFormatError, catalog_importer
+
+
+class Command(BaseCommand):
+    help = 'Imports movies from a CSV file (title, description, release_year, genres, actors)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Leave the new movies out of search until rebuild_search_index runs',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                importer = catalog_importer(options['batch_size'], search_index=not options['skip_search_index'])
+                report = importer.import_file(file)
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(str(error))
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... and {report.failed - len(report.errors):,} more')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.imported:,} of {report.rows:,} row(s) in {report.seconds:.1f}s '
+            f'({report.rows_per_second:,.0f} rows/s)'
+        ))
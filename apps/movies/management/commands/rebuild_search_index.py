@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the movie search index.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.movies.search import rebuild_index
+from apps.movies.search.indexing import ensure_search_indexes
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds search documents (tsvector or inverted index) for every movie'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        ensure_search_indexes()
+        total = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} movie(s)'))
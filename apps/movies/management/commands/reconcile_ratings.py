@@ -0,0 +1,28 @@
+"""
+Management command to repair drift in the stored movie rating aggregates.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.movies.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recomputes rating_sum/rating_count/rating_avg for movies whose aggregates drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many movies drifted',
+        )
+
+    def handle(self, *args, **options):
+        fixed = reconcile_ratings(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{fixed} movie(s) have drifted rating aggregates'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Reconciled rating aggregates for {fixed} movie(s)'))
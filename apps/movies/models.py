@@ -3,9 +3,11 @@ Models for the movies application.
 """
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 from apps.shared.models import BaseModel
+from apps.shared.utils.media import media_storage
 
 
 class Genre(BaseModel):
@@ -37,6 +39,9 @@ class Actor(BaseModel):
     class Meta:
         db_table = 'actors'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
 
     def __str__(self):
         return self.name
@@ -53,17 +58,24 @@ class Movie(BaseModel):
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField()
     release_year = models.IntegerField()
-    poster = models.ImageField(upload_to='posters/', blank=True, null=True)
+    poster = models.ImageField(upload_to='posters/', storage=media_storage, blank=True, null=True)
     genres = models.ManyToManyField(Genre, related_name='movies')
     actors = models.ManyToManyField(Actor, related_name='movies')
+    # Denormalized review aggregates, maintained by apps.movies.ratings
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_avg = models.FloatField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'movies'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['-created_at']),
-            models.Index(fields=['release_year']),
+            # Composite (field, id) indexes back keyset pagination on each allowed ordering
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['release_year', 'id']),
+            models.Index(fields=['title', 'id']),
             models.Index(fields=['slug']),
+            models.Index(fields=['rating_avg']),
         ]
 
     def __str__(self):
@@ -74,13 +86,98 @@ class Movie(BaseModel):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_slug = instance.__dict__.get('slug')
+        instance._loaded_poster = str(instance.__dict__.get('poster') or '')
+        return instance
+
     @property
     def average_rating(self):
-        """Calculate average rating from reviews."""
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
-        return None
+        """Average rating from the stored review aggregates."""
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+
+
+class MovieSlugHistory(models.Model):
+    """A slug a movie used to have; URLs with it redirect to the current one."""
+    slug = models.SlugField(unique=True)
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='slug_history')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'movie_slug_history'
+        verbose_name_plural = 'movie slug history'
+
+    def __str__(self):
+        return f"{self.slug} -> {self.movie_id}"
+
+
+class PosterVariant(models.Model):
+    """Downscaled copy of a movie poster, generated by ``apps.movies.posters``."""
+    JPEG = 'jpeg'
+    WEBP = 'webp'
+    FORMAT_CHOICES = [(JPEG, 'JPEG'), (WEBP, 'WebP')]
+
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='poster_variants')
+    # Poster file the variant was made from; a different name means it is stale
+    source = models.CharField(max_length=255)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.ImageField(upload_to='posters/variants/', storage=media_storage)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'movie_poster_variants'
+        ordering = ['format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['movie', 'format', 'width'], name='unique_poster_variant'),
+        ]
+
+    def __str__(self):
+        return f"{self.movie_id} {self.format} {self.width}w"
+
+
+class MovieSearchDocument(models.Model):
+    """Precomputed full-text search document for a movie."""
+    movie = models.OneToOneField(
+        Movie,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document'
+    )
+    title = models.TextField(blank=True)
+    genres = models.TextField(blank=True)
+    actors = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    # Weighted tsvector, only populated on PostgreSQL (GIN index created post-migrate)
+    vector = SearchVectorField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'movie_search_documents'
+
+    def __str__(self):
+        return self.title
+
+
+class MovieSearchTerm(models.Model):
+    """Inverted index posting used for search on databases without full-text support."""
+    term = models.CharField(max_length=64)
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.FloatField()
+
+    class Meta:
+        db_table = 'movie_search_terms'
+        indexes = [
+            models.Index(fields=['term', 'movie']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.movie_id}"
 
 
 class Review(BaseModel):
@@ -96,10 +193,25 @@ class Review(BaseModel):
         db_table = 'reviews'
         ordering = ['-created_at']
         unique_together = ['user', 'movie']  # One review per user per movie
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['movie', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.movie.title} ({self.rating}/10)"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_rating()
+        return instance
+
+    def _remember_rating(self):
+        """Remember the persisted rating so aggregate deltas can be computed on save."""
+        self._loaded_movie_id = self.__dict__.get('movie_id')
+        self._loaded_rating = self.__dict__.get('rating')
+
 
 
 
@@ -0,0 +1,142 @@
+"""
+Downscaled JPEG and WebP variants of movie posters.
+
+Cards render posters a few hundred pixels wide, so serializers expose
+``poster_variants`` (``{format: {width: url}}``, ready for ``srcset``)
+next to the original upload. Variants are made by a job queued when a
+poster changes (``tasks.GENERATE_POSTER_VARIANTS``), never on the request
+path; ``backfill_poster_variants`` covers posters uploaded before.
+"""
+import io
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import cache
+from .models import Movie, PosterVariant
+
+SAVE_OPTIONS = {
+    PosterVariant.JPEG: ('jpg', {'format': 'JPEG', 'optimize': True, 'progressive': True}),
+    PosterVariant.WEBP: ('webp', {'format': 'WEBP', 'method': 4}),
+}
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+EXIF_ORIENTATION = 0x0112
+
+# (format, width, height, encoded bytes)
+Rendered = Tuple[str, int, int, bytes]
+
+
+def target_widths(original_width: int) -> List[int]:
+    """Configured widths below the original; an image narrower than all of them keeps its own."""
+    widths = sorted({width for width in settings.POSTER_VARIANT_WIDTHS if width < original_width})
+    return widths or [original_width]
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    if image.mode == 'RGB':
+        return image
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variants(file) -> List[Rendered]:
+    """Encode the image in ``file`` at every target width, in every format."""
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        widths = target_widths(width)
+        # JPEGs decode straight at 1/2, 1/4 or 1/8 scale when that still covers the largest width
+        image.draft('RGB', (widths[-1], widths[-1]))
+        source = _flatten(ImageOps.exif_transpose(image))
+
+    rendered = []
+    for width in widths:
+        height = max(1, round(source.height * width / source.width))
+        resized = source if (width, height) == source.size else source.resize(
+            (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+        )
+        for variant_format, (_, options) in SAVE_OPTIONS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, quality=settings.POSTER_VARIANT_QUALITY, **options)
+            rendered.append((variant_format, width, height, buffer.getvalue()))
+    return rendered
+
+
+def generate_variants(movie: Movie) -> List[PosterVariant]:
+    """Replace ``movie``'s variants with ones made from its current poster."""
+    source = movie.poster.name if movie.poster else ''
+    rendered = []
+    if source:
+        with movie.poster.open('rb') as file:
+            rendered = render_variants(file)
+
+    variants = []
+    with transaction.atomic():
+        # File references are taken here and the old ones dropped on commit (post_delete handler)
+        for variant_format, width, height, content in rendered:
+            variant = PosterVariant(movie=movie, source=source, format=variant_format, width=width, height=height)
+            extension = SAVE_OPTIONS[variant_format][0]
+            variant.file.save(f'{movie.slug}-{width}w.{extension}', ContentFile(content), save=False)
+            variants.append(variant)
+        movie.poster_variants.all().delete()
+        PosterVariant.objects.bulk_create(variants)
+        # Variants are part of the movie's representation, so they move the validators
+        Movie.objects.filter(pk=movie.pk).update(updated_at=timezone.now())
+    cache.invalidate_movies([(movie.pk, movie.slug)])
+    return variants
+
+
+def variant_urls(variants: Iterable[Tuple[str, int, str]], request=None) -> Dict[str, Dict[str, str]]:
+    """``{format: {width: url}}`` from ``(format, width, file name)``, widths ascending."""
+    storage = PosterVariant._meta.get_field('file').storage
+    urls: Dict[str, Dict[str, str]] = {}
+    for variant_format, width, name in sorted(variants):
+        url = storage.url(name)
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        urls.setdefault(variant_format, {})[str(width)] = url
+    return urls
+
+
+def variants_by_movie(posters: Dict[int, str], request=None) -> Dict[int, Dict[str, Dict[str, str]]]:
+    """Variant URLs of many movies in one query; ``posters`` maps movie id to its current poster."""
+    found: Dict[int, list] = {}
+    rows = PosterVariant.objects.filter(movie_id__in=list(posters)).values_list(
+        'movie_id', 'source', 'format', 'width', 'file'
+    )
+    for movie_id, source, variant_format, width, name in rows:
+        # Variants of a replaced poster stay until the new ones are generated
+        if source == posters[movie_id]:
+            found.setdefault(movie_id, []).append((variant_format, width, name))
+    return {movie_id: variant_urls(variants, request) for movie_id, variants in found.items()}
+
+
+def poster_variants_of(movie: Movie, request=None) -> Dict[str, Dict[str, str]]:
+    """Variant URLs of one movie, from ``poster_variants`` (prefetched or not)."""
+    if not movie.poster:
+        return {}
+    return variant_urls(
+        (
+            (variant.format, variant.width, variant.file.name)
+            for variant in movie.poster_variants.all()
+            if variant.source == movie.poster.name
+        ),
+        request,
+    )
+
+
+def load_poster_variants(rows: List[dict], context: Optional[dict] = None) -> Dict[int, dict]:
+    """Loader for compiled serializers: variant URLs of every row, queried only for rows with a poster."""
+    posters = {row['id']: row['poster'] for row in rows if row['poster']}
+    found = variants_by_movie(posters, (context or {}).get('request')) if posters else {}
+    return {row['id']: found.get(row['id'], {}) for row in rows}
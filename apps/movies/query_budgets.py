@@ -0,0 +1,21 @@
+"""
+Maximum queries per request for every route in ``urls/v1.py``.
+
+Enforced by ``tests.QueryBudgetTest`` at two data scales; a route whose
+query count grows with the number of rows fails regardless of its budget.
+"""
+QUERY_BUDGETS = {
+    'movies:genre-list': 3,
+    'movies:actor-list': 3,
+    'movies:movie-list': 4,
+    'movies:movie-search': 4,
+    'movies:movie-suggest': 0,
+    'movies:movie-create': 11,
+    'movies:movie-import': 1,
+    'movies:movie-export': 3,
+    'movies:review-list': 2,
+    'movies:review-create': 6,
+    'movies:movie-detail': 5,
+    'movies:movie-update': 12,
+    'movies:movie-delete': 10,
+}
@@ -0,0 +1,105 @@
+"""
+Incremental maintenance of the denormalized rating aggregates on Movie.
+"""
+from django.db import transaction
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Count, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models import Movie, Review
+
+
+def apply_rating_delta(movie_id, sum_delta: int, count_delta: int) -> None:
+    """Shift a movie's rating aggregates in a single atomic UPDATE."""
+    if not movie_id or (not sum_delta and not count_delta):
+        return
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('rating_count') + count_delta
+    Movie.objects.filter(pk=movie_id).update(
+        rating_sum=new_sum,
+        rating_count=new_count,
+        rating_avg=Cast(new_sum, FloatField()) / NullIf(new_count, 0),
+        # The rating is part of the movie's representation, so it moves the validators
+        updated_at=timezone.now(),
+    )
+
+
+def load_stored_rating(review: Review) -> None:
+    """
+    Before saving a review whose persisted movie or rating is unknown (a
+    deferred ``only()`` load, an instance built with an existing pk), read
+    them from its row so the save applies a delta instead of a whole review.
+    """
+    if review.pk is None or (
+        getattr(review, '_loaded_movie_id', None) is not None and getattr(review, '_loaded_rating', None) is not None
+    ):
+        return
+    stored = Review.objects.filter(pk=review.pk)
+    if transaction.get_connection().in_atomic_block:
+        # Holds the row until the save's transaction ends, so a concurrent edit cannot slip in between
+        stored = stored.select_for_update()
+    row = stored.values_list('movie_id', 'rating').first()
+    if row is not None:
+        review._loaded_movie_id, review._loaded_rating = row
+
+
+def review_saved(review: Review, created: bool) -> None:
+    """Apply the aggregate change caused by creating or updating a review."""
+    old_movie_id = getattr(review, '_loaded_movie_id', None)
+    old_rating = getattr(review, '_loaded_rating', None)
+
+    with transaction.atomic():
+        if created or old_movie_id is None or old_rating is None:
+            apply_rating_delta(review.movie_id, review.rating, 1)
+        elif old_movie_id != review.movie_id:
+            apply_rating_delta(old_movie_id, -old_rating, -1)
+            apply_rating_delta(review.movie_id, review.rating, 1)
+        else:
+            apply_rating_delta(review.movie_id, review.rating - old_rating, 0)
+
+    review._remember_rating()
+
+
+def review_deleted(review: Review) -> None:
+    """Remove a deleted review from its movie's aggregates."""
+    movie_id = getattr(review, '_loaded_movie_id', None) or review.movie_id
+    rating = getattr(review, '_loaded_rating', None)
+    if rating is None:
+        rating = review.rating
+    apply_rating_delta(movie_id, -rating, -1)
+
+
+def drifted_movies():
+    """Movies whose stored aggregates disagree with their reviews."""
+    reviews = Review.objects.filter(movie=OuterRef('pk')).order_by().values('movie')
+    return Movie.objects.order_by().annotate(
+        actual_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('rating')).values('total')), Value(0)
+        ),
+        actual_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')), Value(0)
+        ),
+    ).exclude(rating_sum=F('actual_sum'), rating_count=F('actual_count'))
+
+
+def reconcile_ratings(batch_size: int = 1000, dry_run: bool = False) -> int:
+    """Recompute aggregates for every drifted movie. Returns the number of movies fixed."""
+    rows = drifted_movies().values_list('pk', 'actual_sum', 'actual_count')
+    fixed = 0
+    batch = []
+    for pk, actual_sum, actual_count in rows.iterator(chunk_size=batch_size):
+        fixed += 1
+        if dry_run:
+            continue
+        batch.append(Movie(
+            pk=pk,
+            rating_sum=actual_sum,
+            rating_count=actual_count,
+            rating_avg=actual_sum / actual_count if actual_count else None,
+        ))
+        if len(batch) >= batch_size:
+            Movie.objects.bulk_update(batch, ['rating_sum', 'rating_count', 'rating_avg'])
+            batch = []
+    if batch:
+        Movie.objects.bulk_update(batch, ['rating_sum', 'rating_count', 'rating_avg'])
+    return fixed
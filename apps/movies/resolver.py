@@ -0,0 +1,46 @@
+"""
+Movie lookup for the ``<int:pk>/`` and ``<str:slug>/`` detail routes.
+
+Ids go straight to a primary-key lookup and slugs to the unique slug
+index; either way a live movie costs one query. A slug a movie used to
+have resolves through ``MovieSlugHistory`` to ``MovieMoved``, which the
+views turn into a permanent redirect.
+"""
+from typing import Optional
+
+from .models import Movie, MovieSlugHistory
+
+
+class MovieMoved(Exception):
+    """The requested slug is an old one; ``slug`` is the movie's current slug."""
+
+    def __init__(self, slug: str):
+        super().__init__(slug)
+        self.slug = slug
+
+
+def _moved_to(slug: str) -> Optional[str]:
+    return MovieSlugHistory.objects.filter(slug=slug).values_list('movie__slug', flat=True).first()
+
+
+def resolve_movie(queryset, pk: Optional[int] = None, slug: Optional[str] = None) -> Movie:
+    """
+    The movie behind a detail URL, in one query unless the URL is outdated.
+
+    Raises ``Movie.DoesNotExist``, or ``MovieMoved`` for an old slug.
+    """
+    if pk is not None:
+        movie = queryset.filter(pk=pk).first()
+        if movie is not None:
+            return movie
+        # Movies titled with a number ("1917") have digit-only slugs
+        slug = str(pk)
+
+    movie = queryset.filter(slug=slug).first()
+    if movie is not None:
+        return movie
+    current = _moved_to(slug)
+    if current:
+        raise MovieMoved(current)
+    raise Movie.DoesNotExist
+
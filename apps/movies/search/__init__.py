@@ -0,0 +1,9 @@
+from .engine import search_movies, SearchResults
+from .indexing import index_movies, rebuild_index
+
+__all__ = [
+    'search_movies',
+    'SearchResults',
+    'index_movies',
+    'rebuild_index',
+]
@@ -0,0 +1,150 @@
+"""
+Ranked movie search over the precomputed search documents.
+"""
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q, QuerySet
+
+from apps.movies.models import Movie, MovieSearchTerm
+from apps.shared.utils.pagination import keyset_filter
+from .indexing import search_config, uses_postgres
+from .tokenizer import tokenize
+
+MAX_QUERY_TOKENS = 8
+
+
+def parse_query(text: str) -> List[str]:
+    """Tokenize a user query, dropping duplicates while keeping order."""
+    tokens = []
+    for token in tokenize(text):
+        if token not in tokens:
+            tokens.append(token)
+    return tokens[:MAX_QUERY_TOKENS]
+
+
+class SearchResults:
+    """
+    Lazily evaluated, sliceable search result set ordered by relevance.
+
+    Behaves like a queryset for pagination purposes: supports ``count()``,
+    ``len()`` and slicing, which return movies in rank order.
+    """
+
+    def __init__(self, tokens: List[str], queryset: Optional[QuerySet] = None):
+        self.tokens = tokens
+        self.queryset = queryset if queryset is not None else Movie.objects.all()
+        self._ranked: Optional[List[Tuple[float, int]]] = None
+
+    # PostgreSQL: tsvector @@ tsquery served by the GIN index
+
+    def _tsquery(self) -> SearchQuery:
+        terms = self.tokens[:-1] + [f'{self.tokens[-1]}:*']
+        return SearchQuery(' & '.join(terms), config=search_config(), search_type='raw')
+
+    def _postgres_queryset(self) -> QuerySet:
+        query = self._tsquery()
+        return (
+            self.queryset
+            .filter(search_document__vector=query)
+            .annotate(rank=SearchRank(F('search_document__vector'), query))
+            .order_by('-rank', '-id')
+        )
+
+    # Fallback: inverted index postings scored in Python
+
+    def _rank_postings(self) -> List[Tuple[float, int]]:
+        if self._ranked is not None:
+            return self._ranked
+
+        *exact, prefix = self.tokens
+        condition = Q(term__startswith=prefix)
+        if exact:
+            condition |= Q(term__in=exact)
+        postings = MovieSearchTerm.objects.filter(condition).values_list('movie_id', 'term', 'weight')
+
+        matched = defaultdict(set)
+        scores = defaultdict(float)
+        last = len(self.tokens) - 1
+        for movie_id, term, weight in postings.iterator(chunk_size=2000):
+            for position, token in enumerate(self.tokens):
+                if term == token or (position == last and term.startswith(token)):
+                    matched[movie_id].add(position)
+                    scores[movie_id] += weight
+
+        wanted = len(self.tokens)
+        candidates = [movie_id for movie_id, positions in matched.items() if len(positions) == wanted]
+        if candidates and self.queryset.query.has_filters():
+            allowed = set(self.queryset.filter(pk__in=candidates).values_list('pk', flat=True))
+            candidates = [movie_id for movie_id in candidates if movie_id in allowed]
+
+        self._ranked = sorted(((scores[pk], pk) for pk in candidates), reverse=True)
+        return self._ranked
+
+    def _fetch(self, ranked: List[Tuple[float, int]]) -> List[Movie]:
+        by_pk = self.queryset.in_bulk([pk for _, pk in ranked])
+        movies = []
+        for score, pk in ranked:
+            movie = by_pk.get(pk)
+            if movie is not None:
+                movie.rank = score
+                movies.append(movie)
+        return movies
+
+    # Sequence protocol used by paginators
+
+    def count(self) -> int:
+        if not self.tokens:
+            return 0
+        if uses_postgres():
+            return self._postgres_queryset().count()
+        return len(self._rank_postings())
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, item):
+        if not self.tokens:
+            return [] if isinstance(item, slice) else [][item]
+        if uses_postgres():
+            return self._postgres_queryset()[item]
+        ranked = self._rank_postings()
+        if isinstance(item, slice):
+            return self._fetch(ranked[item])
+        return self._fetch([ranked[item]])[0]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    # Keyset protocol used by CatalogPagination's cursor mode
+
+    keyset_ordering = [('rank', True), ('id', True)]
+
+    def keyset_slice(self, position, backwards: bool, limit: int) -> List[Movie]:
+        """Up to ``limit`` movies after (or before) a (rank, id) position, in walk order."""
+        if not self.tokens:
+            return []
+        if uses_postgres():
+            queryset = self._postgres_queryset()
+            if position is not None:
+                queryset = queryset.filter(keyset_filter(self.keyset_ordering, position, after=not backwards))
+            if backwards:
+                queryset = queryset.reverse()
+            return list(queryset[:limit])
+
+        ranked = self._rank_postings()
+        if position is not None:
+            key = (float(position[0]), int(position[1]))
+            if backwards:
+                ranked = [item for item in ranked if item > key][::-1]
+            else:
+                ranked = [item for item in ranked if item < key]
+        elif backwards:
+            ranked = ranked[::-1]
+        return self._fetch(ranked[:limit])
+
+
+def search_movies(text: str, queryset: Optional[QuerySet] = None) -> SearchResults:
+    """Search movies by title, genres, actors and description, best match first."""
+    return SearchResults(parse_query(text), queryset=queryset)
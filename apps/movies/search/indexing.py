@@ -0,0 +1,143 @@
+"""
+Builds and stores the per-movie search documents.
+"""
+from collections import Counter
+from typing import Iterable, List
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import connection, transaction
+
+from apps.movies.models import Movie, MovieSearchDocument, MovieSearchTerm
+from .tokenizer import normalize, tokenize
+
+# Postgres tsvector weight per document field.
+FIELD_WEIGHTS = {
+    'title': 'A',
+    'genres': 'B',
+    'actors': 'B',
+    'description': 'C',
+}
+# Score contributed by one occurrence of a term, mirroring ts_rank's default {0.1, 0.2, 0.4, 1.0}.
+WEIGHT_SCORES = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+GIN_INDEX_NAME = 'movie_search_documents_vector_gin'
+
+
+def search_config() -> str:
+    return getattr(settings, 'MOVIE_SEARCH_CONFIG', 'simple')
+
+
+def uses_postgres() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def build_document(movie: Movie) -> MovieSearchDocument:
+    """Build the normalized search document for a movie with prefetched genres/actors."""
+    return document_for(
+        movie.pk,
+        movie.title,
+        movie.description,
+        [genre.name for genre in movie.genres.all()],
+        [actor.name for actor in movie.actors.all()],
+    )
+
+
+def document_for(movie_id: int, title: str, description: str,
+                 genre_names: Iterable[str], actor_names: Iterable[str]) -> MovieSearchDocument:
+    """Build a search document from values already in memory (bulk imports)."""
+    return MovieSearchDocument(
+        movie_id=movie_id,
+        title=normalize(title),
+        genres=normalize(' '.join(genre_names)),
+        actors=normalize(' '.join(actor_names)),
+        description=normalize(description),
+    )
+
+
+def build_postings(document: MovieSearchDocument) -> List[MovieSearchTerm]:
+    """Turn a document into weighted inverted-index postings, one per distinct term."""
+    scores = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(document, field)):
+            scores[term] += WEIGHT_SCORES[weight]
+    return [
+        MovieSearchTerm(term=term, movie_id=document.movie_id, weight=score)
+        for term, score in scores.items()
+    ]
+
+
+def _weighted_vector():
+    config = search_config()
+    vector = None
+    for field, weight in FIELD_WEIGHTS.items():
+        part = SearchVector(field, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def index_movies(movie_ids: Iterable[int]) -> int:
+    """(Re)build search documents for the given movies. Returns the number indexed."""
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return 0
+
+    movies = (
+        Movie.objects.filter(pk__in=movie_ids)
+        .only('id', 'title', 'description')
+        .prefetch_related('genres', 'actors')
+    )
+    return store_documents([build_document(movie) for movie in movies])
+
+
+def store_documents(documents: List[MovieSearchDocument]) -> int:
+    """Write built documents (and, outside PostgreSQL, their postings). Returns the number stored."""
+    if not documents:
+        return 0
+    indexed_ids = [document.movie_id for document in documents]
+
+    with transaction.atomic():
+        MovieSearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=['movie'],
+            update_fields=['title', 'genres', 'actors', 'description', 'updated_at'],
+        )
+        if uses_postgres():
+            MovieSearchDocument.objects.filter(movie_id__in=indexed_ids).update(
+                vector=_weighted_vector()
+            )
+        else:
+            MovieSearchTerm.objects.filter(movie_id__in=indexed_ids).delete()
+            postings = []
+            for document in documents:
+                postings.extend(build_postings(document))
+            MovieSearchTerm.objects.bulk_create(postings, batch_size=1000)
+    return len(documents)
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """Reindex the whole catalog in batches."""
+    total = 0
+    batch = []
+    for pk in Movie.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size):
+        batch.append(pk)
+        if len(batch) >= batch_size:
+            total += index_movies(batch)
+            batch = []
+    total += index_movies(batch)
+    return total
+
+
+def ensure_search_indexes(using='default', **kwargs) -> None:
+    """Create the GIN index on the tsvector column (PostgreSQL only, idempotent)."""
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    table = MovieSearchDocument._meta.db_table
+    with db.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {GIN_INDEX_NAME} ON {table} USING GIN (vector)'
+        )
@@ -0,0 +1,357 @@
+"""
+Per-process autocomplete index over movie titles, actor names and genre names.
+
+Prefix matches are served from a character trie whose nodes keep the
+best entries of their subtree pre-sorted by popularity, so a lookup is a
+walk of ``len(query)`` nodes plus a slice. When the prefix yields too few
+results, a trigram index supplies typo-tolerant matches.
+
+Each process builds its index once (at worker start, see ``core.wsgi``)
+and afterwards refreshes it in a background thread when it is older than
+``SUGGEST_INDEX_TTL``: the old contents keep answering until the new ones
+are swapped in, so requests never wait for a rebuild.
+"""
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .tokenizer import normalize, tokenize
+
+logger = logging.getLogger(__name__)
+
+TOP_PER_NODE = 32
+MAX_PREFIX_DEPTH = 24
+MAX_PHRASES = 4
+MIN_TRIGRAM_SIMILARITY = 0.3
+# Trigrams shared by more entries than this are too common to narrow anything down.
+MAX_TRIGRAM_POSTINGS = 5000
+
+Key = Tuple[str, int]
+
+
+@dataclass
+class Entry:
+    kind: str
+    id: int
+    slug: str
+    label: str
+    popularity: int = 0
+    phrases: List[str] = field(default_factory=list)
+    trigrams: Set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        self.key: Key = (self.kind, self.id)
+        self.sort_key = (-self.popularity, self.label.lower(), self.kind, self.id)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {'type': self.kind, 'id': self.id, 'slug': self.slug, 'label': self.label}
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'own')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.top: List[Key] = []
+        self.own: Set[Key] = set()
+
+
+def phrases_for(label: str) -> List[str]:
+    """Every word-suffix of the label, so "dark kn" matches "The Dark Knight"."""
+    tokens = tokenize(label)
+    return [' '.join(tokens[i:])[:MAX_PREFIX_DEPTH] for i in range(min(len(tokens), MAX_PHRASES))]
+
+
+def trigrams_for(text: str) -> Set[str]:
+    """pg_trgm-style trigrams of each word, padded with two leading spaces and one trailing."""
+    grams = set()
+    for token in tokenize(text):
+        padded = f'  {token} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SuggestIndex:
+    """Mutable prefix + trigram index. All public methods are thread-safe."""
+
+    def __init__(self, top_per_node: int = TOP_PER_NODE):
+        self.top_per_node = top_per_node
+        self._lock = threading.RLock()
+        # Held by whoever is building: the first request of a cold process, or the refresh thread
+        self._build_lock = threading.Lock()
+        # Changes made while a rebuild reads the database, replayed onto the new contents
+        self._journal: Optional[List[Tuple[str, tuple]]] = None
+        self._reset()
+
+    def _reset(self):
+        self.entries: Dict[Key, Entry] = {}
+        self.root = _Node()
+        self.trigrams: Dict[str, Set[Key]] = {}
+        self.built_at: Optional[float] = None
+
+    # Building
+
+    def build(self) -> None:
+        """
+        Load every movie, actor and genre (three queries) and rebuild from
+        scratch. Lookups keep using the current contents until the swap.
+        """
+        with self._build_lock:
+            self._rebuild()
+
+    def ensure_built(self) -> None:
+        """Build in the caller, unless another thread got there first."""
+        with self._build_lock:
+            if not self.is_built:
+                self._rebuild()
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """Rebuild in a daemon thread, unless a build is already running."""
+        if not self._build_lock.acquire(blocking=False):
+            return None
+        try:
+            thread = threading.Thread(target=self._refresh, name='suggest-index-refresh', daemon=True)
+            thread.start()
+        except Exception:
+            self._build_lock.release()
+            raise
+        return thread
+
+    def _refresh(self) -> None:
+        try:
+            self._rebuild()
+        except Exception as e:
+            # The old contents keep serving; the next stale lookup tries again
+            logger.warning(f"Could not refresh suggest index: {str(e)}")
+        finally:
+            connection.close()
+            self._build_lock.release()
+
+    def _rebuild(self) -> None:
+        from apps.movies.models import Movie, Actor, Genre
+
+        with self._lock:
+            self._journal = []
+        try:
+            entries = [
+                Entry('movie', pk, slug, title, popularity)
+                for pk, slug, title, popularity in Movie.objects.order_by().values_list(
+                    'pk', 'slug', 'title', 'rating_count'
+                )
+            ]
+            for kind, model in (('actor', Actor), ('genre', Genre)):
+                rows = model.objects.order_by().annotate(popularity=Count('movies')).values_list(
+                    'pk', 'slug', 'name', 'popularity'
+                )
+                entries.extend(Entry(kind, pk, slug, name, popularity) for pk, slug, name, popularity in rows)
+
+            # Inserting best-first means every top list is filled by appends only.
+            entries.sort(key=lambda entry: entry.sort_key)
+            fresh = SuggestIndex(self.top_per_node)
+            for entry in entries:
+                fresh._insert(entry)
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+
+        with self._lock:
+            for operation, args in self._journal:
+                getattr(fresh, operation)(*args)
+            self._journal = None
+            self.entries, self.root, self.trigrams = fresh.entries, fresh.root, fresh.trigrams
+            self.built_at = time.monotonic()
+
+    @property
+    def is_built(self) -> bool:
+        return self.built_at is not None
+
+    def is_stale(self, ttl: float) -> bool:
+        return self.built_at is None or (ttl and time.monotonic() - self.built_at > ttl)
+
+    # Incremental maintenance
+
+    def upsert(self, kind: str, pk: int, slug: str, label: str, popularity: Optional[int] = None) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(('upsert', (kind, pk, slug, label, popularity)))
+            previous = self.entries.get((kind, pk))
+            if previous is not None:
+                if popularity is None:
+                    popularity = previous.popularity
+                self._remove(previous)
+            self._insert(Entry(kind, pk, slug, label, popularity or 0))
+
+    def remove(self, kind: str, pk: int) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append(('remove', (kind, pk)))
+            entry = self.entries.get((kind, pk))
+            if entry is not None:
+                self._remove(entry)
+
+    def set_popularity(self, kind: str, pk: int, popularity: int) -> None:
+        """Re-rank an indexed entry, e.g. a movie whose rating count changed."""
+        with self._lock:
+            entry = self.entries.get((kind, pk))
+            if entry is not None and entry.popularity != popularity:
+                self.upsert(kind, pk, entry.slug, entry.label, popularity)
+            elif entry is None and self._journal is not None:
+                self._journal.append(('set_popularity', (kind, pk, popularity)))
+
+    def _insert(self, entry: Entry) -> None:
+        entry.phrases = phrases_for(entry.label)
+        entry.trigrams = trigrams_for(entry.label)
+        self.entries[entry.key] = entry
+
+        key = entry.key
+        sort_key = entry.sort_key
+        cap = self.top_per_node
+        for phrase in entry.phrases:
+            node = self.root
+            depth = 0
+            while True:
+                top = node.top
+                # Cheap rejection first: most nodes near the root are full of better entries.
+                if len(top) < cap or sort_key < self.entries[top[-1]].sort_key:
+                    self._offer(top, key, sort_key)
+                if depth == len(phrase):
+                    break
+                char = phrase[depth]
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                depth += 1
+            node.own.add(key)
+
+        for gram in entry.trigrams:
+            keys = self.trigrams.get(gram)
+            if keys is None:
+                self.trigrams[gram] = {key}
+            else:
+                keys.add(key)
+
+    def _offer(self, top: List[Key], key: Key, sort_key) -> None:
+        """Insert a key into a top list that it ranks high enough for."""
+        if key in top:
+            return
+        position = len(top)
+        while position and self.entries[top[position - 1]].sort_key > sort_key:
+            position -= 1
+        top.insert(position, key)
+        del top[self.top_per_node:]
+
+    def _remove(self, entry: Entry) -> None:
+        key = entry.key
+        for phrase in entry.phrases:
+            path = [self.root]
+            for char in phrase:
+                node = path[-1].children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            path[-1].own.discard(key)
+            for depth in range(len(path) - 1, -1, -1):
+                node = path[depth]
+                if key in node.top:
+                    was_full = len(node.top) >= self.top_per_node
+                    node.top.remove(key)
+                    if was_full:
+                        self._refill(node, exclude=key)
+                if depth and not node.top and not node.children and not node.own:
+                    del path[depth - 1].children[phrase[depth - 1]]
+
+        for gram in entry.trigrams:
+            keys = self.trigrams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.trigrams[gram]
+        self.entries.pop(key, None)
+
+    def _refill(self, node: _Node, exclude: Key) -> None:
+        """Recompute a truncated top list from its children's tops and its own entries."""
+        candidates = set(node.own)
+        for child in node.children.values():
+            candidates.update(child.top)
+        candidates.discard(exclude)
+        ranked = sorted(candidates, key=lambda k: self.entries[k].sort_key)
+        node.top = ranked[:self.top_per_node]
+
+    # Lookup
+
+    def suggest(self, query: str, limit: int = 8) -> List[Entry]:
+        normalized = ' '.join(tokenize(query))[:MAX_PREFIX_DEPTH]
+        if not normalized:
+            return []
+
+        with self._lock:
+            node = self.root
+            for char in normalized:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            results = [self.entries[key] for key in node.top[:limit]] if node is not None else []
+
+            if len(results) < limit and len(normalized) >= 3:
+                seen = {entry.key for entry in results}
+                results.extend(self._fuzzy(normalized, limit - len(results), seen))
+        return results
+
+    def _fuzzy(self, normalized: str, limit: int, seen: Set[Key]) -> List[Entry]:
+        query_grams = trigrams_for(normalized)
+        shared: Dict[Key, int] = {}
+        for gram in query_grams:
+            keys = self.trigrams.get(gram)
+            if not keys or len(keys) > MAX_TRIGRAM_POSTINGS:
+                continue
+            for key in keys:
+                shared[key] = shared.get(key, 0) + 1
+
+        scored = []
+        for key, count in shared.items():
+            if key in seen:
+                continue
+            entry = self.entries[key]
+            similarity = count / (len(query_grams) + len(entry.trigrams) - count)
+            if similarity >= MIN_TRIGRAM_SIMILARITY:
+                score = similarity * (1 + math.log1p(entry.popularity) / 10)
+                scored.append((-score, entry.sort_key, entry))
+        scored.sort(key=lambda item: item[:2])
+        return [entry for _, _, entry in scored[:limit]]
+
+
+_index = SuggestIndex()
+
+
+def get_suggest_index() -> SuggestIndex:
+    """
+    Return this process's index. Only a never-built index is built in the
+    caller; one older than SUGGEST_INDEX_TTL is refreshed in the background.
+    """
+    if not _index.is_built:
+        _index.ensure_built()
+    elif _index.is_stale(getattr(settings, 'SUGGEST_INDEX_TTL', 300)):
+        _index.refresh_in_background()
+    return _index
+
+
+def warm_suggest_index() -> None:
+    """Build the index eagerly at worker startup; failures are logged and retried lazily."""
+    try:
+        get_suggest_index()
+    except Exception as e:
+        logger.warning(f"Could not warm suggest index: {str(e)}")
+
+
+def index_if_built() -> Optional[SuggestIndex]:
+    """The index, but only if already built; signal handlers never trigger a full build."""
+    return _index if _index.is_built else None
@@ -0,0 +1,22 @@
+"""
+Text normalization shared by the search index and query parsing.
+"""
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so "Amélie" and "amelie" index the same."""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized word tokens."""
+    return [token[:MAX_TERM_LENGTH] for token in _TOKEN_RE.findall(normalize(text))]
@@ -0,0 +1,504 @@
+"""
+Synthetic catalog generator for capacity planning and benchmarks.
+
+Rows follow the shapes real catalogs have rather than uniform noise:
+
+* reviews per movie follow a power law (a few blockbusters, a long tail
+  of movies with none);
+* users review with Zipfian activity (a small core writes most reviews);
+* actor popularity is Zipfian, so casts share a recognizable set of stars;
+* genres co-occur with their neighbours in ``GENRES`` (action with
+  adventure, drama with romance) far more often than at random.
+
+Movies are generated in chunks of ``CHUNK_MOVIES`` together with their
+links and reviews, which keeps memory flat at any scale and lets the
+rating aggregates be written with the movie instead of being reconciled
+afterwards. Every chunk draws from its own ``random.Random`` derived from
+the seed and the chunk number, and movie ids are allocated per chunk
+above the current maximum, so the same seed and scale produce the same
+catalog whether chunks run in one process or in several workers.
+
+Rows are written with ``COPY`` on PostgreSQL and with batched
+``executemany`` INSERTs elsewhere; ``BulkCreateWriter`` remains as the
+ORM path (model instances cost roughly ten times more per row).
+"""
+import io
+import multiprocessing
+import random
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+from operator import methodcaller
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils.text import slugify
+
+from .models import Actor, Genre, Movie, Review
+
+# Adjacent genres are related; co-genres are mostly drawn from the neighbourhood
+GENRES = (
+    'Action', 'Adventure', 'Sci-Fi', 'Fantasy', 'Animation', 'Family', 'Comedy', 'Romance',
+    'Drama', 'Biography', 'History', 'War', 'Western', 'Crime', 'Mystery', 'Thriller',
+    'Horror', 'Documentary', 'Music', 'Musical', 'Sport', 'Film-Noir',
+)
+WORDS = (
+    'night', 'river', 'empire', 'shadow', 'garden', 'signal', 'harbor', 'winter', 'machine', 'letter',
+    'island', 'circus', 'frontier', 'mirror', 'orchard', 'station', 'thunder', 'velvet', 'canyon', 'lantern',
+    'glass', 'summer', 'ghost', 'engine', 'silver', 'stranger', 'kingdom', 'desert', 'echo', 'falcon',
+    'harvest', 'iron', 'jungle', 'midnight', 'ocean', 'paper', 'quiet', 'rebel', 'storm', 'tower',
+)
+FIRST_NAMES = (
+    'Ada', 'Bruno', 'Carmen', 'Dmitri', 'Elena', 'Farid', 'Greta', 'Hiro', 'Ines', 'Jonas',
+    'Kamila', 'Luca', 'Malika', 'Nadia', 'Oscar', 'Priya', 'Rustam', 'Sofia', 'Timur', 'Vera',
+)
+LAST_NAMES = (
+    'Abbott', 'Baker', 'Castillo', 'Dubois', 'Eriksen', 'Fischer', 'Gallo', 'Haddad', 'Ivanova', 'Jensen',
+    'Karimov', 'Lindqvist', 'Moreau', 'Novak', 'Okafor', 'Petrov', 'Rahimova', 'Sato', 'Tanaka', 'Yusupov',
+)
+REVIEW_TEXTS = (
+    'Loved it.', 'Not for me.', 'A slow start but worth it.', 'Great cast, weak script.',
+    'Would watch again.', 'Overrated.', 'Beautifully shot.', 'The ending ruined it.',
+)
+# Ratings 1..10 skew high, as on most review sites
+RATING_WEIGHTS = (1, 1, 2, 3, 5, 8, 10, 9, 6, 3)
+CHUNK_MOVIES = 1000
+# Seeded rows get fixed timestamps so runs are reproducible
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+SPAN_SECONDS = 15 * 365 * 24 * 3600
+# Version and variant bits of a version 4 UUID, as uuid.UUID(version=4) sets them
+_UUID_CLEAR = ~((0xf000 << 64) | (0xc000 << 48))
+_UUID_V4 = (0x4000 << 64) | (0x8000 << 48)
+
+MOVIE_COLUMNS = (
+    'id', 'uuid', 'created_at', 'updated_at', 'title', 'slug', 'description', 'release_year',
+    'poster', 'rating_sum', 'rating_count', 'rating_avg',
+)
+# Review ids come from the database sequence: their count per chunk is only known after generating it
+REVIEW_COLUMNS = ('uuid', 'created_at', 'updated_at', 'user_id', 'movie_id', 'rating', 'text')
+
+
+@dataclass
+class SeedScale:
+    movies: int = 10_000
+    actors: int = 5_000
+    users: int = 2_000
+    # Mean reviews per movie (power-law distributed) and cast size
+    reviews_per_movie: float = 10.0
+    cast_size: int = 5
+    genres: int = len(GENRES)
+    # Power-law exponent of reviews per movie and Zipf exponent of user / actor popularity
+    review_alpha: float = 1.6
+    zipf_exponent: float = 1.1
+
+
+@dataclass
+class SeedReport:
+    rows: Dict[str, int]
+    seconds: float
+
+    @property
+    def total(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total / self.seconds if self.seconds else 0.0
+
+
+def zipf_cumulative(count: int, exponent: float) -> List[float]:
+    """Cumulative weights of ranks ``1..count`` under a Zipf law, for ``bisect`` sampling."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+# Writers
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+_INTEGER_FIELDS = {'AutoField', 'BigAutoField', 'IntegerField', 'BigIntegerField', 'PositiveIntegerField', 'ForeignKey'}
+_TEXT_FIELDS = {'CharField', 'TextField', 'SlugField', 'EmailField', 'FileField', 'ImageField'}
+
+
+class _RememberLast:
+    """``function`` remembering its last value: created_at and updated_at are usually the same object."""
+    __slots__ = ('function', 'last', 'result')
+
+    def __init__(self, function: Callable):
+        self.function = function
+        self.last = self.result = None
+
+    def __call__(self, value):
+        if value is not self.last:
+            self.last, self.result = value, self.function(value)
+        return self.result
+
+
+def copy_formatter(model_field, iso_formatter: Optional[_RememberLast] = None) -> Callable[[object], str]:
+    """Formatter of one column's values into PostgreSQL COPY text format."""
+    kind = model_field.get_internal_type()
+    if kind in _TEXT_FIELDS:
+        format_value = methodcaller('translate', _COPY_ESCAPES)
+    elif kind == 'BooleanField':
+        format_value = {True: 't', False: 'f'}.__getitem__
+    elif kind in ('DateTimeField', 'DateField'):
+        format_value = iso_formatter or methodcaller('isoformat')
+    else:
+        format_value = str
+    if not model_field.null:
+        return format_value
+    return lambda value: '\\N' if value is None else format_value(value)
+
+
+class BulkCreateWriter:
+    """Writes through the ORM; works on every backend."""
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+
+    def write(self, model, columns: Sequence[str], rows: List[tuple]) -> None:
+        model.objects.bulk_create(
+            (model(**dict(zip(columns, row))) for row in rows),
+            batch_size=self.batch_size,
+        )
+
+
+class CopyWriter:
+    """Streams rows with ``COPY ... FROM STDIN`` (PostgreSQL only)."""
+
+    def write(self, model, columns: Sequence[str], rows: List[tuple]) -> None:
+        if not rows:
+            return
+        fields = [model._meta.get_field(name) for name in columns]
+        buffer = io.StringIO()
+        if all(model_field.get_internal_type() in _INTEGER_FIELDS for model_field in fields):
+            # Link tables: plain integers, nothing to escape
+            buffer.writelines('\t'.join(map(str, row)) + '\n' for row in rows)
+        else:
+            iso_formatter = _RememberLast(methodcaller('isoformat'))
+            formatters = [copy_formatter(model_field, iso_formatter) for model_field in fields]
+            buffer.writelines(
+                '\t'.join([format_value(value) for format_value, value in zip(formatters, row)]) + '\n'
+                for row in rows
+            )
+        buffer.seek(0)
+        column_names = ', '.join(connection.ops.quote_name(model_field.column) for model_field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} ({column_names}) FROM STDIN',
+                buffer,
+            )
+
+
+class InsertWriter:
+    """Batched ``executemany`` INSERTs with values adapted once per column type."""
+
+    def write(self, model, columns: Sequence[str], rows: List[tuple]) -> None:
+        if not rows:
+            return
+        fields = [model._meta.get_field(name) for name in columns]
+        adapters = [self.adapter(model_field) for model_field in fields]
+        # One memo per column: a row repeats its created_at, an import repeats one timestamp throughout
+        adapters = [adapt and _RememberLast(adapt) for adapt in adapters]
+        if any(adapters):
+            rows = [
+                tuple(value if adapt is None or value is None else adapt(value) for adapt, value in zip(adapters, row))
+                for row in rows
+            ]
+        quote = connection.ops.quote_name
+        sql = (
+            f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(quote(f.column) for f in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))})'
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    @staticmethod
+    def adapter(model_field) -> Optional[Callable]:
+        kind = model_field.get_internal_type()
+        if kind == 'DateTimeField':
+            return connection.ops.adapt_datetimefield_value
+        if kind == 'DateField':
+            return connection.ops.adapt_datefield_value
+        return None
+
+
+def default_writer():
+    return CopyWriter() if connection.vendor == 'postgresql' else InsertWriter()
+
+
+# Generation
+
+def new_uuid(rng: random.Random) -> str:
+    """Random version 4 UUID as 32 hex digits (accepted by every backend and by COPY)."""
+    return f'{rng.getrandbits(128) & _UUID_CLEAR | _UUID_V4:032x}'
+
+
+def timestamp(rng: random.Random) -> datetime:
+    return EPOCH - timedelta(seconds=rng.randrange(SPAN_SECONDS))
+
+
+@dataclass
+class ChunkPlan:
+    """Everything needed to generate any movie chunk; picklable so workers can rebuild it."""
+    scale: SeedScale
+    seed: int
+    batch_size: int
+    genre_ids: List[int]
+    actor_start: int
+    user_start: int
+    movie_start: int
+    writer: object = None
+    _weights: Dict[str, List[float]] = field(default_factory=dict, repr=False)
+
+    def weights(self, name: str) -> List[float]:
+        if name not in self._weights:
+            count, exponent = {
+                'genres': (len(self.genre_ids), 0.8),
+                'actors': (self.scale.actors, self.scale.zipf_exponent),
+                'users': (self.scale.users, self.scale.zipf_exponent),
+            }[name]
+            self._weights[name] = zipf_cumulative(count, exponent)
+        return self._weights[name]
+
+    @property
+    def chunks(self) -> int:
+        return -(-self.scale.movies // CHUNK_MOVIES)
+
+
+class ChunkWriter:
+    """Generates one chunk of movies with their genre/actor links and reviews, and writes it."""
+
+    def __init__(self, plan: ChunkPlan):
+        self.plan = plan
+        self.scale = plan.scale
+        self.writer = plan.writer or default_writer()
+        self.genre_weights = plan.weights('genres')
+        self.actor_weights = plan.weights('actors')
+        self.user_weights = plan.weights('users')
+        # Reviews arrive within a year of release, at hour resolution
+        self.delays = [timedelta(hours=hour) for hour in range(365 * 24)]
+        self.rating_weights = list(accumulate(RATING_WEIGHTS))
+
+    def write_chunk(self, chunk: int) -> Dict[str, int]:
+        plan, scale = self.plan, self.scale
+        # Distinct, stable stream per chunk: independent of which worker runs it
+        rng = random.Random(plan.seed * 1_000_003 + chunk)
+        first = chunk * CHUNK_MOVIES
+        movies, genre_links, actor_links, reviews = [], [], [], []
+        append_review = reviews.append
+        random_, choice, randrange = rng.random, rng.choice, rng.randrange
+        delays, rating_weights, user_start = self.delays, self.rating_weights, plan.user_start
+        cast_size = min(scale.cast_size, scale.actors)
+
+        for movie_id in range(plan.movie_start + first, plan.movie_start + min(first + CHUNK_MOVIES, scale.movies)):
+            created = timestamp(rng)
+            title = f'{choice(WORDS).title()} {choice(WORDS)} {choice(WORDS)}'
+            rating_sum = rating_count = 0
+            # Reviews are most of the rows: keep their loop on local names
+            for user_rank in self.pick_distinct(rng, scale.users, self.user_weights, self.reviews_for_movie(rng)):
+                rating = bisect_left(rating_weights, random_() * rating_weights[-1]) + 1
+                rating_sum += rating
+                rating_count += 1
+                reviewed = created + delays[int(random_() * len(delays))]
+                append_review((new_uuid(rng), reviewed, reviewed, user_start + user_rank, movie_id, rating,
+                               REVIEW_TEXTS[int(random_() * len(REVIEW_TEXTS))]))
+            movies.append((
+                movie_id, new_uuid(rng), created, created, title, f'{slugify(title)}-{movie_id}',
+                ' '.join(rng.choices(WORDS, k=30)), created.year - randrange(3), None,
+                rating_sum, rating_count, rating_sum / rating_count if rating_count else None,
+            ))
+            genre_links.extend((movie_id, genre) for genre in self.pick_genres(rng))
+            cast_count = min(scale.actors, max(1, round(rng.gauss(cast_size, 1.5))))
+            actor_links.extend(
+                (movie_id, plan.actor_start + rank)
+                for rank in self.pick_distinct(rng, scale.actors, self.actor_weights, cast_count)
+            )
+
+        with transaction.atomic():
+            self.write_batched(Movie, MOVIE_COLUMNS, movies)
+            self.write_batched(Movie.genres.through, ('movie_id', 'genre_id'), genre_links)
+            self.write_batched(Movie.actors.through, ('movie_id', 'actor_id'), actor_links)
+            self.write_batched(Review, REVIEW_COLUMNS, reviews)
+        return {
+            'movies': len(movies),
+            'movie_genres': len(genre_links),
+            'movie_actors': len(actor_links),
+            'reviews': len(reviews),
+        }
+
+    def write_batched(self, model, columns: Sequence[str], rows: List[tuple]) -> None:
+        size = self.plan.batch_size
+        for start in range(0, len(rows), size):
+            self.writer.write(model, columns, rows[start:start + size])
+
+    def reviews_for_movie(self, rng: random.Random) -> int:
+        """Power-law review count with mean ``reviews_per_movie``, capped by the number of users."""
+        alpha = self.scale.review_alpha
+        # E[pareto - 1] = 1 / (alpha - 1)
+        scale = self.scale.reviews_per_movie * (alpha - 1)
+        return min(int(scale * (rng.paretovariate(alpha) - 1)), self.scale.users)
+
+    @staticmethod
+    def pick_distinct(rng: random.Random, population: int, cumulative: List[float], count: int) -> Iterable[int]:
+        """``count`` distinct ranks in ``range(population)`` drawn by weight; uniform once most are needed."""
+        if count * 4 > population:
+            return rng.sample(range(population), count)
+        chosen = {}
+        total = cumulative[-1]
+        random_ = rng.random
+        while len(chosen) < count:
+            chosen[bisect_left(cumulative, random_() * total)] = None
+        return chosen
+
+    def pick_genres(self, rng: random.Random) -> List[int]:
+        genre_ids, weights = self.plan.genre_ids, self.genre_weights
+        primary = bisect_left(weights, rng.random() * weights[-1])
+        picked = {primary}
+        for _ in range(rng.choice((0, 1, 1, 2, 2, 3))):
+            if rng.random() < 0.75:
+                neighbour = primary + rng.choice((-2, -1, 1, 2))
+                if 0 <= neighbour < len(genre_ids):
+                    picked.add(neighbour)
+            else:
+                picked.add(rng.randrange(len(genre_ids)))
+        return [genre_ids[index] for index in picked]
+
+
+_worker_chunks: Optional[ChunkWriter] = None
+
+
+def _init_worker(plan: ChunkPlan) -> None:
+    global _worker_chunks
+    _worker_chunks = ChunkWriter(plan)
+
+
+def _write_chunk_in_worker(chunk: int) -> Dict[str, int]:
+    return _worker_chunks.write_chunk(chunk)
+
+
+class CatalogGenerator:
+    """
+    Generates and writes a synthetic catalog.
+
+    Genres, actors and users are written first in one transaction, then
+    every movie chunk in its own; ``workers > 1`` spreads the chunks over
+    forked processes (PostgreSQL only, SQLite serializes writers anyway).
+    ``progress`` is called with the running row counts after every chunk.
+    """
+
+    def __init__(self, scale: SeedScale, seed: int = 1, batch_size: int = 5000, writer=None, workers: int = 1,
+                 progress: Optional[Callable[[Dict[str, int]], None]] = None):
+        self.scale = scale
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.writer = writer
+        self.workers = workers if connection.vendor == 'postgresql' else 1
+        self.progress = progress or (lambda rows: None)
+        self.rows: Dict[str, int] = {}
+
+    def run(self) -> SeedReport:
+        started = time.perf_counter()
+        with transaction.atomic():
+            plan = ChunkPlan(
+                scale=self.scale,
+                seed=self.seed,
+                batch_size=self.batch_size,
+                genre_ids=self.write_genres(),
+                actor_start=self.write_actors(),
+                user_start=self.write_users(),
+                movie_start=self.next_id(Movie),
+                writer=self.writer,
+            )
+        for counts in self.write_chunks(plan):
+            for table, count in counts.items():
+                self.rows[table] = self.rows.get(table, 0) + count
+            self.progress(dict(self.rows))
+        self.reset_sequences()
+        return SeedReport(rows=dict(self.rows), seconds=time.perf_counter() - started)
+
+    def write_chunks(self, plan: ChunkPlan) -> Iterable[Dict[str, int]]:
+        if self.workers <= 1:
+            chunk_writer = ChunkWriter(plan)
+            return (chunk_writer.write_chunk(chunk) for chunk in range(plan.chunks))
+        # Children must not share the parent's database socket
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(self.workers, _init_worker, (plan,))
+        return self._drain(pool, plan)
+
+    @staticmethod
+    def _drain(pool, plan: ChunkPlan) -> Iterable[Dict[str, int]]:
+        with pool:
+            yield from pool.imap_unordered(_write_chunk_in_worker, range(plan.chunks))
+
+    # Reference tables
+
+    def next_id(self, model) -> int:
+        return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+    def write(self, table: str, model, columns: Sequence[str], rows: Iterable[tuple]) -> None:
+        writer = self.writer or default_writer()
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                writer.write(model, columns, batch)
+                self.rows[table] = self.rows.get(table, 0) + len(batch)
+                batch = []
+        writer.write(model, columns, batch)
+        self.rows[table] = self.rows.get(table, 0) + len(batch)
+
+    def write_genres(self) -> List[int]:
+        """Missing genres of ``GENRES`` (plus numbered extras beyond it); returns ids in affinity order."""
+        names = [GENRES[i] if i < len(GENRES) else f'Genre {i + 1}' for i in range(self.scale.genres)]
+        existing = dict(Genre.objects.filter(name__in=names).values_list('name', 'pk'))
+        start = self.next_id(Genre)
+        rows = []
+        for genre_id, name in enumerate((name for name in names if name not in existing), start):
+            created = timestamp(self.rng)
+            rows.append((genre_id, new_uuid(self.rng), created, created, name, f'{slugify(name)}-{genre_id}', ''))
+            existing[name] = genre_id
+        self.write('genres', Genre, ('id', 'uuid', 'created_at', 'updated_at', 'name', 'slug', 'description'), rows)
+        return [existing[name] for name in names]
+
+    def write_actors(self) -> int:
+        """First actor id; ids follow popularity rank (most popular first)."""
+        start = self.next_id(Actor)
+        rng = self.rng
+
+        def rows():
+            for actor_id in range(start, start + self.scale.actors):
+                name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+                created = timestamp(rng)
+                born = EPOCH.date() - timedelta(days=rng.randrange(18 * 365, 90 * 365))
+                yield actor_id, new_uuid(rng), created, created, name, f'{slugify(name)}-{actor_id}', '', born
+
+        columns = ('id', 'uuid', 'created_at', 'updated_at', 'name', 'slug', 'bio', 'birth_date')
+        self.write('actors', Actor, columns, rows())
+        return start
+
+    def write_users(self) -> int:
+        """First user id; ids follow activity rank (most active first)."""
+        start = self.next_id(User)
+
+        def rows():
+            for user_id in range(start, start + self.scale.users):
+                # Unusable password: seeded accounts can never log in
+                yield (user_id, f'!seed{user_id}', None, False, f'seed-user-{user_id}', '', '', '',
+                       False, True, timestamp(self.rng))
+
+        columns = ('id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name',
+                   'email', 'is_staff', 'is_active', 'date_joined')
+        self.write('users', User, columns, rows())
+        return start
+
+    def reset_sequences(self) -> None:
+        """Ids were assigned explicitly; move the sequences past them (PostgreSQL, Oracle)."""
+        statements = connection.ops.sequence_reset_sql(no_style(), [Genre, Actor, User, Movie])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
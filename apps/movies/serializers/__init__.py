@@ -2,6 +2,12 @@ from .genre import GenreSerializer
 from .actor import ActorSerializer
 from .movie import MovieListSerializer, MovieDetailSerializer
 from .review import ReviewSerializer
+from .compiled import (
+    CompiledGenreSerializer,
+    CompiledActorSerializer,
+    CompiledMovieListSerializer,
+    CompiledReviewSerializer,
+)
 
 __all__ = [
     'GenreSerializer',
@@ -9,6 +15,10 @@ __all__ = [
     'MovieListSerializer',
     'MovieDetailSerializer',
     'ReviewSerializer',
+    'CompiledGenreSerializer',
+    'CompiledActorSerializer',
+    'CompiledMovieListSerializer',
+    'CompiledReviewSerializer',
 ]
 
 
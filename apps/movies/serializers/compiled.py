@@ -0,0 +1,46 @@
+"""
+Compiled read-only counterparts of the list serializers.
+
+Used by the list endpoints; the output is identical to the ModelSerializers
+(``tests.CompiledSerializerTest`` compares the rendered bytes).
+"""
+from apps.movies.posters import load_poster_variants
+from apps.shared.utils.compiled_serializer import CompiledSerializer
+from .genre import GenreSerializer
+from .actor import ActorSerializer
+from .movie import MovieListSerializer
+from .review import ReviewSerializer
+
+
+def average_rating(row):
+    """Same rounding as ``Movie.average_rating``, from the stored aggregates."""
+    if not row['rating_count']:
+        return None
+    return round(row['rating_sum'] / row['rating_count'], 1)
+
+
+class CompiledGenreSerializer(CompiledSerializer):
+    serializer_class = GenreSerializer
+
+
+class CompiledActorSerializer(CompiledSerializer):
+    serializer_class = ActorSerializer
+
+
+class CompiledMovieListSerializer(CompiledSerializer):
+    serializer_class = MovieListSerializer
+    nested = {'genres': CompiledGenreSerializer}
+    computed = {
+        'average_rating': (('rating_sum', 'rating_count'), average_rating),
+    }
+    loaded = {
+        'poster_variants': (('poster',), load_poster_variants),
+    }
+
+
+class CompiledReviewSerializer(CompiledSerializer):
+    serializer_class = ReviewSerializer
+    computed = {
+        # StringRelatedField: str(user) is the username
+        'user': (('user__username',), lambda row: row['user__username']),
+    }
@@ -3,6 +3,7 @@ Serializers for Movie model.
 """
 from rest_framework import serializers
 from apps.movies.models import Movie
+from apps.movies.posters import poster_variants_of
 from .genre import GenreSerializer
 from .actor import ActorSerializer
 
@@ -11,11 +12,12 @@ class MovieListSerializer(serializers.ModelSerializer):
     """Serializer for movie list view."""
     genres = GenreSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
+    poster_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Movie
         fields = [
-            'id', 'uuid', 'title', 'slug', 'poster', 'release_year',
+            'id', 'uuid', 'title', 'slug', 'poster', 'poster_variants', 'release_year',
             'genres', 'average_rating', 'created_at'
         ]
         read_only_fields = ['id', 'uuid', 'slug', 'created_at']
@@ -24,6 +26,10 @@ class MovieListSerializer(serializers.ModelSerializer):
         """Get average rating."""
         return obj.average_rating
 
+    def get_poster_variants(self, obj):
+        """Downscaled poster URLs by format and width."""
+        return poster_variants_of(obj, self.context.get('request'))
+
 
 class MovieDetailSerializer(serializers.ModelSerializer):
     """Serializer for movie detail view."""
@@ -31,12 +37,13 @@ class MovieDetailSerializer(serializers.ModelSerializer):
     actors = ActorSerializer(many=True, read_only=True)
     average_rating = serializers.SerializerMethodField()
     reviews_count = serializers.SerializerMethodField()
+    poster_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Movie
         fields = [
             'id', 'uuid', 'title', 'slug', 'description', 'release_year',
-            'poster', 'genres', 'actors', 'average_rating', 'reviews_count',
+            'poster', 'poster_variants', 'genres', 'actors', 'average_rating', 'reviews_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'uuid', 'slug', 'created_at', 'updated_at']
@@ -47,7 +54,11 @@ class MovieDetailSerializer(serializers.ModelSerializer):
 
     def get_reviews_count(self, obj):
         """Get reviews count."""
-        return obj.reviews.count()
+        return obj.rating_count
+
+    def get_poster_variants(self, obj):
+        """Downscaled poster URLs by format and width."""
+        return poster_variants_of(obj, self.context.get('request'))
 
 
 
@@ -0,0 +1,240 @@
+"""
+Signal handlers for the movies application.
+"""
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from .models import Movie, MovieSlugHistory, Genre, Actor, PosterVariant, Review
+from . import cache, ratings, tasks
+from .search import index_movies
+from .search.suggest import index_if_built
+from apps.jobs.registry import enqueue
+from apps.shared.utils import response_cache
+
+# Movies whose delete is cascading to their reviews in this thread
+_deleting = threading.local()
+
+
+def _movies_being_deleted() -> set:
+    if not hasattr(_deleting, 'movie_ids'):
+        _deleting.movie_ids = set()
+    return _deleting.movie_ids
+
+
+@receiver(pre_save, sender=Review, dispatch_uid='movies.review_pre_save_ratings')
+def load_rating_before_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ratings.load_stored_rating(instance)
+
+
+@receiver(post_save, sender=Review, dispatch_uid='movies.review_saved_ratings')
+def update_ratings_on_review_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    movie_ids = {instance.movie_id, getattr(instance, '_loaded_movie_id', None)}
+    ratings.review_saved(instance, created)
+    invalidate_rated_movies(movie_ids)
+
+
+@receiver(post_delete, sender=Review, dispatch_uid='movies.review_deleted_ratings')
+def update_ratings_on_review_delete(sender, instance, **kwargs):
+    if instance.movie_id in _movies_being_deleted():
+        # The movie row and its cache entries go away anyway; skip one UPDATE per review
+        return
+    ratings.review_deleted(instance)
+    invalidate_rated_movies({instance.movie_id})
+
+
+@receiver(pre_delete, sender=Movie, dispatch_uid='movies.movie_pre_delete_ratings')
+def remember_movie_being_deleted(sender, instance, **kwargs):
+    _movies_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=Movie, dispatch_uid='movies.movie_deleted_ratings')
+def forget_movie_being_deleted(sender, instance, **kwargs):
+    _movies_being_deleted().discard(instance.pk)
+
+
+def invalidate_rated_movies(movie_ids):
+    # Ratings are part of both the list cards and the detail payload
+    movie_ids = set(movie_ids) - {None}
+    rows = list(Movie.objects.filter(pk__in=movie_ids).values_list('pk', 'slug', 'rating_count'))
+    cache.invalidate_movies((pk, slug) for pk, slug, _ in rows)
+    # Suggestions rank movies by rating count
+    index = index_if_built()
+    if index is not None:
+        for pk, _, rating_count in rows:
+            index.set_popularity('movie', pk, rating_count)
+
+
+# Search index maintenance
+
+@receiver(post_save, sender=Movie, dispatch_uid='movies.movie_saved_search')
+def index_movie_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    index_movies([instance.pk])
+
+
+@receiver(m2m_changed, sender=Movie.genres.through, dispatch_uid='movies.movie_genres_search')
+@receiver(m2m_changed, sender=Movie.actors.through, dispatch_uid='movies.movie_actors_search')
+def index_movie_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        index_movies([instance.pk])
+    elif pk_set:
+        index_movies(pk_set)
+    elif action == 'post_clear':
+        index_movies(getattr(instance, '_search_cleared_movie_ids', []))
+
+
+@receiver(m2m_changed, sender=Movie.genres.through, dispatch_uid='movies.movie_genres_search_clear')
+@receiver(m2m_changed, sender=Movie.actors.through, dispatch_uid='movies.movie_actors_search_clear')
+def remember_movies_before_clear(sender, instance, action, reverse, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._search_cleared_movie_ids = list(instance.movies.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Genre, dispatch_uid='movies.genre_saved_search')
+@receiver(post_save, sender=Actor, dispatch_uid='movies.actor_saved_search')
+def reindex_movies_on_name_change(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    index_movies(instance.movies.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Genre, dispatch_uid='movies.genre_pre_delete_search')
+@receiver(pre_delete, sender=Actor, dispatch_uid='movies.actor_pre_delete_search')
+def remember_movies_before_delete(sender, instance, **kwargs):
+    instance._search_movie_ids = list(instance.movies.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Genre, dispatch_uid='movies.genre_deleted_search')
+@receiver(post_delete, sender=Actor, dispatch_uid='movies.actor_deleted_search')
+def reindex_movies_on_delete(sender, instance, **kwargs):
+    index_movies(getattr(instance, '_search_movie_ids', []))
+
+
+
+# Autocomplete index maintenance (only when this process has already built it)
+
+@receiver(post_save, sender=Movie, dispatch_uid='movies.movie_saved_suggest')
+def suggest_movie_saved(sender, instance, raw=False, **kwargs):
+    index = index_if_built()
+    if index is not None and not raw:
+        index.upsert('movie', instance.pk, instance.slug, instance.title, instance.rating_count)
+
+
+@receiver(post_save, sender=Genre, dispatch_uid='movies.genre_saved_suggest')
+@receiver(post_save, sender=Actor, dispatch_uid='movies.actor_saved_suggest')
+def suggest_name_saved(sender, instance, raw=False, **kwargs):
+    index = index_if_built()
+    if index is not None and not raw:
+        index.upsert(sender.__name__.lower(), instance.pk, instance.slug, instance.name)
+
+
+@receiver(post_delete, sender=Movie, dispatch_uid='movies.movie_deleted_suggest')
+@receiver(post_delete, sender=Genre, dispatch_uid='movies.genre_deleted_suggest')
+@receiver(post_delete, sender=Actor, dispatch_uid='movies.actor_deleted_suggest')
+def suggest_deleted(sender, instance, **kwargs):
+    index = index_if_built()
+    if index is not None:
+        index.remove(sender.__name__.lower(), instance.pk)
+
+
+# Slug history (before cache invalidation, which resets ``_loaded_slug``)
+
+@receiver(post_save, sender=Movie, dispatch_uid='movies.movie_saved_slugs')
+def record_slug_change(sender, instance, raw=False, **kwargs):
+    old_slug = getattr(instance, '_loaded_slug', None)
+    if not raw and old_slug and old_slug != instance.slug:
+        MovieSlugHistory.objects.update_or_create(slug=old_slug, defaults={'movie': instance})
+        # The slug is live again, possibly for another movie
+        MovieSlugHistory.objects.filter(slug=instance.slug).delete()
+
+
+# Response cache invalidation
+
+@receiver(post_save, sender=Movie, dispatch_uid='movies.movie_saved_cache')
+@receiver(post_delete, sender=Movie, dispatch_uid='movies.movie_deleted_cache')
+def invalidate_movie_cache(sender, instance, **kwargs):
+    response_cache.invalidate(
+        cache.MOVIES,
+        *cache.movie_namespaces(instance.pk, instance.slug, getattr(instance, '_loaded_slug', None))
+    )
+    instance._loaded_slug = instance.slug
+
+
+@receiver(m2m_changed, sender=Movie.genres.through, dispatch_uid='movies.movie_genres_cache')
+@receiver(m2m_changed, sender=Movie.actors.through, dispatch_uid='movies.movie_actors_cache')
+def invalidate_movie_cache_on_m2m_change(sender, instance, action, reverse, pk_set, model, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        cache.invalidate_movies([(instance.pk, instance.slug)])
+    else:
+        movie_ids = pk_set or getattr(instance, '_search_cleared_movie_ids', [])
+        cache.invalidate_movies(Movie.objects.filter(pk__in=movie_ids).values_list('pk', 'slug'))
+
+
+@receiver(post_save, sender=Genre, dispatch_uid='movies.genre_saved_cache')
+@receiver(post_save, sender=Actor, dispatch_uid='movies.actor_saved_cache')
+def invalidate_name_cache_on_save(sender, instance, created, **kwargs):
+    response_cache.invalidate(cache.GENRES if sender is Genre else cache.ACTORS)
+    if not created:
+        cache.invalidate_movies(instance.movies.values_list('pk', 'slug'))
+
+
+@receiver(post_delete, sender=Genre, dispatch_uid='movies.genre_deleted_cache')
+@receiver(post_delete, sender=Actor, dispatch_uid='movies.actor_deleted_cache')
+def invalidate_name_cache_on_delete(sender, instance, **kwargs):
+    response_cache.invalidate(cache.GENRES if sender is Genre else cache.ACTORS)
+    movie_ids = getattr(instance, '_search_movie_ids', [])
+    cache.invalidate_movies(Movie.objects.filter(pk__in=movie_ids).values_list('pk', 'slug'))
+
+
+# Posters and their variants
+
+def _release_file(storage, name):
+    # Content-addressed storage drops a reference; only once the change is committed
+    transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(pre_save, sender=Movie, dispatch_uid='movies.movie_pre_save_posters')
+def remember_poster_upload(sender, instance, raw=False, **kwargs):
+    instance._poster_uploaded = bool(instance.poster) and not instance.poster._committed
+
+
+@receiver(post_save, sender=Movie, dispatch_uid='movies.movie_saved_posters')
+def queue_poster_variants(sender, instance, raw=False, **kwargs):
+    poster = instance.poster.name or ''
+    old = getattr(instance, '_loaded_poster', '')
+    if raw or (poster == old and not getattr(instance, '_poster_uploaded', False)):
+        return
+    instance._loaded_poster = poster
+    if old:
+        # The upload took its own reference, even when it had the same bytes
+        _release_file(instance.poster.storage, old)
+    if poster == old:
+        return
+    if poster:
+        # Same transaction as the movie: the job exists exactly when the new poster does
+        enqueue(tasks.GENERATE_POSTER_VARIANTS, {'movie_id': instance.pk})
+    else:
+        instance.poster_variants.all().delete()
+
+
+@receiver(post_delete, sender=Movie, dispatch_uid='movies.movie_deleted_poster')
+def release_poster(sender, instance, **kwargs):
+    if instance.poster:
+        _release_file(instance.poster.storage, instance.poster.name)
+
+
+@receiver(post_delete, sender=PosterVariant, dispatch_uid='movies.poster_variant_deleted_file')
+def release_poster_variant_file(sender, instance, **kwargs):
+    if instance.file:
+        _release_file(instance.file.storage, instance.file.name)
@@ -0,0 +1,57 @@
+"""
+Background jobs of the movies application (run by ``run_workers``).
+"""
+from apps.jobs.files import job_files
+from apps.jobs.registry import task
+
+from .importing import DEFAULT_BATCH_SIZE, catalog_importer, refresh_catalog
+from .models import Movie
+from .posters import generate_variants
+from .ratings import reconcile_ratings
+from .search import rebuild_index
+
+IMPORT_CSV = 'movies.import_csv'
+RECONCILE_RATINGS = 'movies.reconcile_ratings'
+REBUILD_SEARCH_INDEX = 'movies.rebuild_search_index'
+GENERATE_POSTER_VARIANTS = 'movies.generate_poster_variants'
+
+
+# Batches already committed would be imported twice on a retry
+@task(IMPORT_CSV, max_attempts=1)
+def import_csv(job, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Import an uploaded CSV file, reporting the share of the file read as progress."""
+    storage = job_files()
+    try:
+        with storage.open(path, 'rb') as file:
+            total = storage.size(path)
+            importer = catalog_importer(batch_size)
+
+            def on_batch(batch):
+                refresh_catalog(batch)
+                job.set_progress(min(file.tell(), total), total)
+
+            importer.on_batch = on_batch
+            report = importer.import_file(file)
+            job.set_progress(total, total)
+    finally:
+        storage.delete(path)
+    return report.to_dict()
+
+
+@task(RECONCILE_RATINGS)
+def reconcile(job, batch_size: int = 1000):
+    return {'repaired': reconcile_ratings(batch_size=batch_size)}
+
+
+@task(REBUILD_SEARCH_INDEX)
+def rebuild_search_index(job):
+    return {'indexed': rebuild_index()}
+
+
+@task(GENERATE_POSTER_VARIANTS)
+def generate_poster_variants(job, movie_id: int):
+    """Downscale the movie's current poster; a deleted movie has nothing left to do."""
+    movie = Movie.objects.filter(pk=movie_id).first()
+    if movie is None:
+        return {'variants': 0}
+    return {'variants': len(generate_variants(movie))}
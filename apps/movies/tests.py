@@ -0,0 +1,893 @@
+"""
+Tests for the movies application.
+"""
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from .models import Movie, MovieSlugHistory, Genre, Actor, PosterVariant, Review
+from .ratings import reconcile_ratings
+from .search.suggest import SuggestIndex, get_suggest_index
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from .query_budgets import QUERY_BUDGETS
+from .urls import v1 as movie_urls
+from .serializers import (
+    GenreSerializer,
+    ActorSerializer,
+    MovieListSerializer,
+    ReviewSerializer,
+    CompiledGenreSerializer,
+    CompiledActorSerializer,
+    CompiledMovieListSerializer,
+    CompiledReviewSerializer,
+)
+from .benchmarks import SCENARIOS, BenchmarkRunner, ScenarioResult, baseline_path, compare
+from .exporting import export
+from .importing import MovieCsvImporter, catalog_importer
+from .seeding import CatalogGenerator, ChunkPlan, ChunkWriter, SeedScale, copy_formatter
+from .ratings import drifted_movies
+from .search import rebuild_index, search_movies
+from apps.jobs.worker import run_pending
+from apps.shared.models import MediaBlob
+from apps.shared.testing import QueryRecorder, assert_query_budget
+from apps.shared.utils import response_cache
+
+
+class CatalogTestCase(TestCase):
+    """Starts every test with an empty response cache."""
+
+    def setUp(self):
+        super().setUp()
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+
+class MovieRatingAggregateTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.create(
+            title='Test Movie',
+            description='Test Description',
+            release_year=2020
+        )
+        self.user = User.objects.create_user(username='testuser', password='testpass')
+        self.other = User.objects.create_user(username='user2', password='pass')
+
+    def test_create_update_delete_keep_aggregates(self):
+        review = Review.objects.create(user=self.user, movie=self.movie, rating=8, text='Great!')
+        Review.objects.create(user=self.other, movie=self.movie, rating=6, text='Good')
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.rating_sum, self.movie.rating_count), (14, 2))
+        self.assertEqual(self.movie.average_rating, 7.0)
+
+        review.rating = 10
+        review.save()
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_avg, 8.0)
+
+        review.delete()
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.rating_sum, self.movie.rating_count), (6, 1))
+
+        Review.objects.all().delete()
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 0)
+        self.assertIsNone(self.movie.rating_avg)
+        self.assertIsNone(self.movie.average_rating)
+
+    def test_moving_review_between_movies(self):
+        other_movie = Movie.objects.create(title='Other', description='x', release_year=2021)
+        review = Review.objects.create(user=self.user, movie=self.movie, rating=4, text='Meh')
+        review.movie = other_movie
+        review.save()
+        self.movie.refresh_from_db()
+        other_movie.refresh_from_db()
+        self.assertEqual(self.movie.rating_count, 0)
+        self.assertEqual((other_movie.rating_sum, other_movie.rating_count), (4, 1))
+
+    def test_saving_without_loaded_rating_applies_only_the_delta(self):
+        review = Review.objects.create(user=self.user, movie=self.movie, rating=8, text='Great!')
+
+        partial = Review.objects.only('text').get(pk=review.pk)
+        partial.text = 'Still great'
+        partial.save()
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.rating_sum, self.movie.rating_count), (8, 1))
+
+        Review(
+            pk=review.pk, user=self.user, movie=self.movie, rating=5, text='Less so', created_at=review.created_at
+        ).save()
+        self.movie.refresh_from_db()
+        self.assertEqual((self.movie.rating_sum, self.movie.rating_count), (5, 1))
+
+    def test_reconcile_repairs_drift(self):
+        Review.objects.create(user=self.user, movie=self.movie, rating=9, text='Wow')
+        Movie.objects.filter(pk=self.movie.pk).update(rating_sum=0, rating_count=0, rating_avg=None)
+        self.assertEqual(reconcile_ratings(dry_run=True), 1)
+        self.assertEqual(reconcile_ratings(), 1)
+        self.movie.refresh_from_db()
+        self.assertEqual(self.movie.average_rating, 9.0)
+        self.assertEqual(reconcile_ratings(), 0)
+
+    def test_rating_filter_uses_stored_average(self):
+        Review.objects.create(user=self.user, movie=self.movie, rating=9, text='Wow')
+        Movie.objects.create(title='Unrated', description='x', release_year=2019)
+        response = self.client.get('/api/v1/movies/', {'min_rating': 8})
+        self.assertEqual(response.status_code, 200)
+        titles = [movie['title'] for movie in response.json()['results']]
+        self.assertEqual(titles, ['Test Movie'])
+
+
+class MovieSearchTest(TestCase):
+    def setUp(self):
+        self.drama = Genre.objects.create(name='Drama')
+        self.hanks = Actor.objects.create(name='Tom Hanks')
+        self.forrest = Movie.objects.create(
+            title='Forrest Gump',
+            description='Life is like a box of chocolates.',
+            release_year=1994
+        )
+        self.forrest.genres.add(self.drama)
+        self.forrest.actors.add(self.hanks)
+        self.knight = Movie.objects.create(
+            title='The Dark Knight',
+            description='Gotham needs a hero. Tom meets the Joker.',
+            release_year=2008
+        )
+
+    def search(self, query, **params):
+        response = self.client.get('/api/v1/movies/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_cast_match_ranks_above_description_match(self):
+        data = self.search('tom')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([m['title'] for m in data['results']], ['Forrest Gump', 'The Dark Knight'])
+
+    def test_all_terms_must_match_and_last_is_prefix(self):
+        data = self.search('dark kni')
+        self.assertEqual([m['title'] for m in data['results']], ['The Dark Knight'])
+        self.assertEqual(self.search('dark chocolates')['count'], 0)
+
+    def test_index_follows_m2m_and_renames(self):
+        self.knight.genres.add(self.drama)
+        self.assertEqual(self.search('drama')['count'], 2)
+        self.drama.name = 'Melodrama'
+        self.drama.save()
+        self.assertEqual(self.search('drama')['count'], 0)
+        self.assertEqual(self.search('melodrama')['count'], 2)
+        self.hanks.delete()
+        self.assertEqual(self.search('hanks')['count'], 0)
+
+    def test_response_is_paginated(self):
+        data = self.search('tom')
+        self.assertIsNone(data['next'])
+        self.assertIsNone(data['previous'])
+        self.assertEqual(self.search('')['results'], [])
+
+    def test_cursor_mode_keeps_rank_order(self):
+        data = self.search('tom', cursor='')
+        self.assertNotIn('count', data)
+        self.assertEqual([m['title'] for m in data['results']], ['Forrest Gump', 'The Dark Knight'])
+
+
+class SuggestIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = SuggestIndex(top_per_node=2)
+        self.index.upsert('movie', 1, 'the-dark-knight', 'The Dark Knight', 50)
+        self.index.upsert('movie', 2, 'the-dark-crystal', 'The Dark Crystal', 5)
+        self.index.upsert('movie', 3, 'darkman', 'Darkman', 20)
+        self.index.upsert('actor', 4, 'tom-hardy', 'Tom Hardy', 10)
+
+    def labels(self, query, limit=8):
+        return [entry.label for entry in self.index.suggest(query, limit=limit)]
+
+    def test_prefix_matches_any_word_ordered_by_popularity(self):
+        self.assertEqual(self.labels('dark', limit=2), ['The Dark Knight', 'Darkman'])
+        self.assertEqual(self.labels('dark kn', limit=1), ['The Dark Knight'])
+
+    def test_removal_refills_truncated_nodes(self):
+        self.index.remove('movie', 1)
+        self.assertEqual(self.labels('dark', limit=2), ['Darkman', 'The Dark Crystal'])
+
+    def test_typos_fall_back_to_trigrams(self):
+        self.assertEqual(self.labels('darkmn')[0], 'Darkman')
+        self.assertIn('Tom Hardy', self.labels('tom hrady'))
+
+
+class SuggestViewTest(TestCase):
+    def test_suggest_is_served_without_queries(self):
+        Movie.objects.create(title='Inception', description='Dreams', release_year=2010)
+        get_suggest_index().build()
+        Genre.objects.create(name='Indie')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/movies/suggest/', {'q': 'in'})
+        self.assertEqual(response.status_code, 200)
+        labels = [item['label'] for item in response.json()['data']['results']]
+        self.assertEqual(sorted(labels), ['Inception', 'Indie'])
+
+    def test_stale_index_is_refreshed_off_the_request(self):
+        Movie.objects.create(title='Inception', description='x', release_year=2010)
+        index = get_suggest_index()
+        index.build()
+        built_at = index.built_at
+        index.built_at -= 3600
+        self.addCleanup(setattr, index, 'built_at', built_at)
+        with mock.patch.object(index, 'refresh_in_background') as refresh:
+            with self.assertNumQueries(0):
+                response = self.client.get('/api/v1/movies/suggest/', {'q': 'inc'})
+        self.assertEqual(response.json()['data']['results'][0]['label'], 'Inception')
+        refresh.assert_called_once_with()
+
+    def test_journal_carries_changes_into_the_rebuilt_index(self):
+        index = SuggestIndex()
+        original_insert = SuggestIndex._insert
+
+        def insert_during_build(target, entry):
+            if target is not index and not target.entries:
+                # Runs after the catalog was read: a concurrent signal handler
+                index.upsert('genre', 99, 'indie', 'Indie', 3)
+            original_insert(target, entry)
+
+        Movie.objects.create(title='Inception', description='x', release_year=2010)
+        with mock.patch.object(SuggestIndex, '_insert', insert_during_build):
+            index.build()
+        self.assertEqual([entry.label for entry in index.suggest('in')], ['Indie', 'Inception'])
+
+    def test_reviews_move_movies_up(self):
+        for title in ('Inception', 'Insomnia'):
+            Movie.objects.create(title=title, description='x', release_year=2002)
+        get_suggest_index().build()
+        user = User.objects.create_user(username='critic', password='pass')
+        Review.objects.create(user=user, movie=Movie.objects.get(title='Insomnia'), rating=7, text='Cold')
+        entries = get_suggest_index().suggest('in')
+        self.assertEqual([entry.label for entry in entries], ['Insomnia', 'Inception'])
+
+
+class KeysetPaginationTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(14):
+            Movie.objects.create(title=f'Movie {i:02d}', description='x', release_year=2000 + i % 3)
+
+    def walk(self, url):
+        titles = []
+        pages = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            titles.extend(movie['title'] for movie in data['results'])
+            pages.append(data)
+            url = data['next']
+        return titles, pages
+
+    def test_cursor_walk_matches_ordering(self):
+        titles, pages = self.walk('/api/v1/movies/?cursor=')
+        expected = list(Movie.objects.order_by('-created_at', '-id').values_list('title', flat=True))
+        self.assertEqual(titles, expected)
+        self.assertEqual(len(pages), 2)
+
+        titles, _ = self.walk('/api/v1/movies/?ordering=release_year&cursor=')
+        expected = list(Movie.objects.order_by('release_year', 'id').values_list('title', flat=True))
+        self.assertEqual(titles, expected)
+
+    def test_previous_link_returns_to_first_page(self):
+        _, pages = self.walk('/api/v1/movies/?ordering=-title&cursor=')
+        self.assertIsNone(pages[0]['previous'])
+        previous = self.client.get(pages[1]['previous']).json()
+        self.assertEqual(previous['results'], pages[0]['results'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/v1/movies/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class BoundedListTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        Actor.objects.bulk_create(
+            Actor(name=f'Actor {i:03d}', slug=f'actor-{i:03d}') for i in range(120)
+        )
+
+    def test_lists_are_paginated_with_capped_page_size(self):
+        data = self.client.get('/api/v1/movies/actors/', {'page_size': 1000}).json()['data']
+        self.assertEqual(data['count'], 120)
+        self.assertEqual(len(data['results']), 100)
+        self.assertIsNotNone(data['next'])
+
+    def test_stream_mode_returns_every_row(self):
+        response = self.client.get('/api/v1/movies/actors/', {'stream': '1'})
+        self.assertTrue(response.streaming)
+        body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(body['id'], 'SUCCESS')
+        self.assertEqual(len(body['data']), 120)
+        paged = self.client.get('/api/v1/movies/actors/', {'page_size': 2}).json()['data']
+        self.assertEqual(body['data'][:2], paged['results'])
+
+
+class ResponseCacheTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.create(title='Heat', description='x', release_year=1995)
+        self.user = User.objects.create_user(username='critic', password='pass')
+
+    def test_anonymous_gets_are_cached_until_a_write(self):
+        url = f'/api/v1/movies/{self.movie.slug}/'
+        first = self.client.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+
+        Review.objects.create(user=self.user, movie=self.movie, rating=8, text='Tense')
+        third = self.client.get(url)
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.json()['data']['average_rating'], 8.0)
+
+    def test_invalidation_is_scoped(self):
+        self.client.get('/api/v1/movies/actors/')
+        self.client.get('/api/v1/movies/genres/')
+        Genre.objects.create(name='Crime')
+        self.assertEqual(self.client.get('/api/v1/movies/actors/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/v1/movies/genres/')['X-Cache'], 'MISS')
+
+    def test_query_and_credentials_vary_the_entry(self):
+        self.client.get('/api/v1/movies/', {'page': 1, 'ordering': 'title'})
+        response = self.client.get('/api/v1/movies/', {'ordering': 'title', 'page': 1})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        # Pages carry absolute links, so another host gets its own entry
+        with self.settings(ALLOWED_HOSTS=['testserver', 'localhost']):
+            response = self.client.get('/api/v1/movies/', {'ordering': 'title', 'page': 1}, HTTP_HOST='localhost')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = self.client.get('/api/v1/movies/', HTTP_AUTHORIZATION='Bearer x')
+        self.assertNotIn('X-Cache', response)
+        self.assertGreaterEqual(response_cache.stats.snapshot()['hits'], 1)
+
+
+class ConditionalGetTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.genre = Genre.objects.create(name='Noir')
+        self.movie = Movie.objects.create(title='Chinatown', description='x', release_year=1974)
+        self.movie.genres.add(self.genre)
+
+    def assert_revalidates(self, url, change):
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        change()
+        refreshed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed['ETag'], etag)
+
+    def test_detail_revalidates_after_genre_rename(self):
+        def rename():
+            self.genre.name = 'Neo-noir'
+            self.genre.save()
+        self.assert_revalidates(f'/api/v1/movies/{self.movie.slug}/', rename)
+
+    def test_list_revalidates_after_new_review(self):
+        user = User.objects.create_user(username='viewer', password='pass')
+        self.assert_revalidates(
+            '/api/v1/movies/?ordering=title',
+            lambda: Review.objects.create(user=user, movie=self.movie, rating=7, text='Ok'),
+        )
+
+    def test_detail_with_reviews_revalidates_after_review_edit(self):
+        user = User.objects.create_user(username='viewer', password='pass')
+        review = Review.objects.create(user=user, movie=self.movie, rating=7, text='Ok')
+
+        def edit():
+            review.text = 'Better on a second watch'
+            review.save()
+        self.assert_revalidates(f'/api/v1/movies/{self.movie.slug}/?include=reviews', edit)
+
+    def test_not_modified_skips_serialization(self):
+        etag = self.client.get('/api/v1/movies/genres/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/movies/genres/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+class CompiledSerializerTest(TestCase):
+    def setUp(self):
+        drama = Genre.objects.create(name='Drama', description='Serious')
+        crime = Genre.objects.create(name='Crime')
+        actor = Actor.objects.create(name='Al Pacino', birth_date='1940-04-25')
+        Actor.objects.create(name='Nobody')
+        user = User.objects.create_user(username='critic', password='pass')
+        for i in range(5):
+            movie = Movie.objects.create(
+                title=f'Film {i}', description='x', release_year=1970 + i,
+                poster=f'posters/film-{i}.jpg' if i % 2 else None,
+            )
+            movie.genres.add(*([drama, crime] if i % 2 else [crime])[:i + 1])
+            movie.actors.add(actor)
+            if i:
+                Review.objects.create(user=user, movie=movie, rating=i + 4, text='Fine')
+            if movie.poster:
+                # Film 3's variants were made from a poster it no longer has
+                source = movie.poster.name if i == 1 else 'posters/replaced.jpg'
+                for variant_format, width in (('webp', 400), ('jpeg', 200), ('webp', 200)):
+                    PosterVariant.objects.create(
+                        movie=movie, source=source, format=variant_format, width=width, height=width * 3 // 2,
+                        file=f'posters/variants/film-{i}-{width}w.{variant_format}',
+                    )
+        self.request = RequestFactory().get('/api/v1/movies/')
+
+    def assert_identical(self, serializer_class, compiled_class, queryset):
+        context = {'request': self.request}
+        expected = serializer_class(queryset, many=True, context=context).data
+        compiled = compiled_class(compiled_class.rows(queryset), many=True, context=context).data
+        self.assertTrue(expected)
+        self.assertEqual(JSONRenderer().render(compiled), JSONRenderer().render(expected))
+
+    def test_output_is_byte_identical(self):
+        self.assert_identical(GenreSerializer, CompiledGenreSerializer, Genre.objects.all())
+        self.assert_identical(ActorSerializer, CompiledActorSerializer, Actor.objects.all())
+        self.assert_identical(
+            MovieListSerializer, CompiledMovieListSerializer,
+            Movie.objects.prefetch_related('genres').order_by('title'),
+        )
+        self.assert_identical(ReviewSerializer, CompiledReviewSerializer, Review.objects.select_related('user'))
+
+    def test_movie_genres_load_in_one_query(self):
+        rows = list(CompiledMovieListSerializer.rows(Movie.objects.all()))
+        # Genres, then poster variants (skipped for pages without posters)
+        with self.assertNumQueries(2):
+            data = CompiledMovieListSerializer(rows, many=True, context={'request': self.request}).data
+        variants = {movie['title']: movie['poster_variants'] for movie in data}
+        self.assertEqual(list(variants['Film 1']), ['jpeg', 'webp'])
+        self.assertEqual(list(variants['Film 1']['webp']), ['200', '400'])
+        self.assertEqual((variants['Film 0'], variants['Film 3']), ({}, {}))
+        without_posters = [row for row in rows if not row['poster']]
+        with self.assertNumQueries(1):
+            CompiledMovieListSerializer(without_posters, many=True).data
+
+
+class QueryBudgetTest(CatalogTestCase):
+    """Every v1 route stays within its budget at two data scales."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.enterContext(override_settings(JOB_FILES_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.genres = [Genre.objects.create(name=f'Genre {i}') for i in range(3)]
+        self.actors = [Actor.objects.create(name=f'Actor {i}') for i in range(3)]
+        self.rows = 0
+
+    def grow_to(self, rows):
+        """Add movies (each with genres, actors and reviews) until there are ``rows`` of each."""
+        while self.rows < rows:
+            self.rows += 1
+            user = User.objects.create_user(username=f'critic{self.rows}', password='pass')
+            self.genres.append(Genre.objects.create(name=f'Genre extra {self.rows}'))
+            self.actors.append(Actor.objects.create(name=f'Actor extra {self.rows}'))
+            movie = Movie.objects.create(title=f'Film {self.rows}', description='x', release_year=2000)
+            movie.genres.set(self.genres[-3:])
+            movie.actors.set(self.actors[-3:])
+            for other in Movie.objects.all():
+                Review.objects.get_or_create(user=user, movie=other, defaults={'rating': 7, 'text': 'Ok'})
+        self.target = Movie.objects.order_by('-id').first()
+        self.victim = Movie.objects.create(title=f'Doomed {rows}', description='x', release_year=2000)
+        self.victim.genres.set(self.genres)
+        for user in User.objects.exclude(pk=self.admin.pk):
+            Review.objects.create(user=user, movie=self.victim, rating=5, text='Meh')
+        self.reviewer = User.objects.create_user(username=f'newcomer{rows}', password='pass')
+
+    def routes(self):
+        page = {'page_size': 100}
+        return {
+            'movies:genre-list': ('get', None, page, None),
+            'movies:actor-list': ('get', None, page, None),
+            'movies:movie-list': ('get', None, page, None),
+            'movies:movie-search': ('get', None, {'q': 'film', **page}, None),
+            'movies:movie-suggest': ('get', None, {'q': 'fil'}, None),
+            'movies:movie-create': ('post', None, {'title': f'New {self.rows}', 'description': 'x', 'release_year': 2024}, self.admin),
+            'movies:movie-import': ('post', None, {'file': self.csv_upload()}, self.admin),
+            'movies:movie-export': ('get', None, {'format': 'jsonl'}, None),
+            'movies:review-list': ('get', None, page, None),
+            'movies:review-create': ('post', None, {'movie': self.target.pk, 'rating': 8, 'text': 'Good'}, self.reviewer),
+            'movies:movie-detail': ('get', {'slug': self.target.slug}, {'include': 'reviews', 'reviews_limit': 2}, None),
+            'movies:movie-update': ('patch', {'slug': self.target.slug}, {'description': 'y'}, self.admin),
+            'movies:movie-delete': ('delete', {'slug': self.victim.slug}, None, self.admin),
+        }
+
+    def csv_upload(self):
+        rows = ''.join(
+            f'Imported {self.rows}-{i},x,2001,"Genre 0,Genre new {self.rows}","Actor 1,Actor new {self.rows}-{i}"\n'
+            for i in range(3)
+        )
+        return SimpleUploadedFile('movies.csv', f'title,description,release_year,genres,actors\n{rows}'.encode())
+
+    def measure(self):
+        get_suggest_index()
+        recorders = {}
+        for url_name, (method, kwargs, data, user) in self.routes().items():
+            caches[settings.RESPONSE_CACHE_ALIAS].clear()
+            client = APIClient()
+            if user is not None:
+                client.force_authenticate(user)
+            with QueryRecorder() as recorder:
+                response = getattr(client, method)(reverse(url_name, kwargs=kwargs), data)
+                # Streamed bodies run their queries while being consumed
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+            self.assertLess(response.status_code, 300, f'{url_name}: {body[:200]}')
+            recorders[url_name] = recorder
+        return recorders
+
+    def test_routes_stay_within_budget(self):
+        declared = {f'movies:{pattern.name}' for pattern in movie_urls.urlpatterns}
+        self.assertEqual(set(QUERY_BUDGETS), declared)
+
+        self.grow_to(3)
+        small = self.measure()
+        self.assertEqual(set(small), declared)
+        self.grow_to(12)
+        large = self.measure()
+        for url_name, budget in QUERY_BUDGETS.items():
+            with self.subTest(url_name):
+                assert_query_budget(self, url_name, budget, small[url_name], large[url_name])
+
+
+class BenchmarkSuiteTest(CatalogTestCase):
+    def result(self, **overrides):
+        values = dict(name='movie-list', iterations=30, p50_ms=8.0, p95_ms=10.0, p99_ms=12.0, queries=4, alloc_kib=100.0)
+        values.update(overrides)
+        return ScenarioResult(**values)
+
+    def test_every_scenario_runs_and_stays_within_the_baseline_queries(self):
+        CatalogGenerator(SeedScale(movies=15, genres=5, actors=20, users=6), seed=3).run()
+        rebuild_index()
+        results = BenchmarkRunner(iterations=2, warmup=1, alloc_iterations=1).run(SCENARIOS)
+        self.assertEqual(set(results), {scenario.name for scenario in SCENARIOS})
+        path = baseline_path()
+        if not path.exists():
+            self.skipTest(f'No benchmark baseline recorded for {path.name}')
+        baseline = json.loads(path.read_text())
+        # Query counts do not depend on the catalog size; latency is not compared here
+        self.assertEqual(compare(results, baseline, threshold=float('inf')), [])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'calibration_ms': 20.0, 'scenarios': {'movie-list': self.result().to_dict()}}
+        self.assertEqual(compare({'movie-list': self.result(p50_ms=9.5, p99_ms=40.0)}, baseline, 0.25, 20.0), [])
+        regressions = compare(
+            {'movie-list': self.result(p50_ms=11.0, queries=5, alloc_kib=200.0)}, baseline, 0.25, 20.0
+        )
+        self.assertEqual(len(regressions), 3)
+        # A machine running twice as slow doubles the allowance
+        self.assertEqual(compare({'movie-list': self.result(p50_ms=16.0, p95_ms=20.0)}, baseline, 0.25, 40.0), [])
+
+
+class SeedCatalogTest(TestCase):
+    scale = SeedScale(movies=1500, actors=40, users=30, reviews_per_movie=4, genres=8)
+
+    def test_generated_catalog_is_consistent(self):
+        report = CatalogGenerator(self.scale, seed=5).run()
+        self.assertEqual(Movie.objects.count(), 1500)
+        self.assertEqual(report.rows['reviews'], Review.objects.count())
+        # Aggregates are written with the movies, not reconciled afterwards
+        self.assertFalse(drifted_movies().exists())
+        self.assertFalse(Movie.objects.filter(genres=None).exists())
+        self.assertFalse(Movie.objects.filter(actors=None).exists())
+        # Power law: the busiest movie has far more reviews than the mean
+        busiest = Movie.objects.order_by('-rating_count').first()
+        self.assertGreater(busiest.rating_count, 4 * self.scale.reviews_per_movie)
+
+    def test_rows_depend_only_on_seed_and_chunk(self):
+        class Capture:
+            def __init__(self):
+                self.rows = []
+
+            def write(self, model, columns, rows):
+                self.rows.extend(rows)
+
+        def generate(seed, chunks):
+            writer = Capture()
+            plan = ChunkPlan(
+                scale=self.scale, seed=seed, batch_size=500, genre_ids=list(range(1, 9)),
+                actor_start=1, user_start=1, movie_start=1, writer=writer,
+            )
+            chunk_writer = ChunkWriter(plan)
+            for chunk in chunks:
+                chunk_writer.write_chunk(chunk)
+            return sorted(writer.rows, key=repr)
+
+        self.assertEqual(generate(1, [0, 1]), generate(1, [1, 0]))
+        self.assertNotEqual(generate(1, [0]), generate(2, [0]))
+
+    def test_copy_formatter_escapes_text_and_nulls(self):
+        description = copy_formatter(Movie._meta.get_field('description'))
+        rating_avg = copy_formatter(Movie._meta.get_field('rating_avg'))
+        self.assertEqual(description('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+        self.assertEqual(rating_avg(None), '\\N')
+        self.assertEqual(rating_avg(7.5), '7.5')
+
+
+class MovieImportTest(CatalogTestCase):
+    HEADER = 'title,description,release_year,genres,actors\n'
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(username='admin', password='pass', is_staff=True)
+        self.enterContext(override_settings(JOB_FILES_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.drama = Genre.objects.create(name='Drama')
+        self.actor = Actor.objects.create(name='Ada Stone')
+
+    def upload(self, body, user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.admin)
+        upload = SimpleUploadedFile('movies.csv', (self.HEADER + body).encode())
+        return client.post(reverse('movies:movie-import'), {'file': upload})
+
+    def test_import_reuses_names_and_reports_bad_rows(self):
+        response = self.upload(
+            'Harbor,Two sisters,1999,"Drama, Noir","Ada Stone,Bruno Vale"\n'
+            ',No title,2000,Drama,\n'
+            'Harbor,A remake,nineteen,Drama,\n'
+            'Harbor,A remake,2021,"Drama,Drama",Bruno Vale\n'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['data']['status'], 'queued')
+        self.assertFalse(Movie.objects.exists())
+
+        self.assertEqual(run_pending(), 1)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        job = client.get(response['Location']).data['data']
+        self.assertEqual((job['status'], job['progress']['percent']), ('succeeded', 100.0))
+        data = job['result']
+        self.assertEqual((data['rows'], data['imported'], data['failed']), (4, 2, 2))
+        self.assertEqual([error['row'] for error in data['errors']], [3, 4])
+        self.assertEqual(os.listdir(Path(settings.JOB_FILES_ROOT) / 'imports'), [])
+
+        self.assertEqual(Genre.objects.count(), 2)
+        self.assertEqual(Actor.objects.filter(name='Bruno Vale').count(), 1)
+        first, remake = Movie.objects.filter(title='Harbor').order_by('release_year')
+        self.assertEqual(first.slug, 'harbor')
+        self.assertTrue(remake.slug.startswith('harbor-'))
+        self.assertEqual(set(first.genres.values_list('name', flat=True)), {'Drama', 'Noir'})
+        self.assertEqual(set(first.actors.all()), {self.actor, Actor.objects.get(name='Bruno Vale')})
+        self.assertEqual(list(remake.genres.all()), [self.drama])
+        # Bulk writes skip the signals; the importer indexes the new movies itself
+        self.assertEqual(search_movies('noir').count(), 1)
+
+    def test_batches_commit_independently(self):
+        rows = ''.join(f'Film {i},x,2000,Drama,"Ada Stone,Extra {i % 2}"\n' for i in range(7))
+        # Without a writer (as in the legacy app) rows go through bulk_create
+        for importer in (catalog_importer(batch_size=3), MovieCsvImporter(Movie, Genre, Actor, batch_size=3)):
+            batches = []
+            importer.on_batch = lambda batch: batches.append(len(batch.movies))
+            report = importer.import_file(io.BytesIO((self.HEADER + rows).encode()))
+            self.assertEqual(batches, [3, 3, 1])
+            self.assertEqual(report.imported, 7)
+        self.assertEqual(Movie.objects.filter(actors=self.actor).count(), 14)
+        self.assertEqual(Actor.objects.filter(name__startswith='Extra').count(), 2)
+        self.assertEqual(Movie.objects.values('slug').distinct().count(), 14)
+
+    def test_rejects_missing_columns_and_non_admins(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        upload = SimpleUploadedFile('movies.csv', b'name,year\nHarbor,1999\n')
+        response = client.post(reverse('movies:movie-import'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('release_year', str(response.data))
+
+        user = User.objects.create_user(username='viewer', password='pass')
+        self.assertEqual(self.upload('Harbor,x,1999,,\n', user=user).status_code, 403)
+        self.assertFalse(Movie.objects.exists())
+
+
+class MovieExportTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        drama, noir = Genre.objects.create(name='Drama'), Genre.objects.create(name='Noir')
+        ada = Actor.objects.create(name='Ada Stone')
+        self.movies = [
+            Movie.objects.create(title=f'Harbor {i}', description='Two, "quoted" sisters', release_year=1990 + i)
+            for i in range(5)
+        ]
+        for movie in self.movies[:3]:
+            movie.genres.set([noir, drama])
+            movie.actors.set([ada])
+        critic = User.objects.create_user(username='critic', password='pass')
+        Review.objects.create(user=critic, movie=self.movies[0], rating=8, text='Good')
+
+    def download(self, **params):
+        response = APIClient().get(reverse('movies:movie-export'), params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_jsonl_has_names_and_rating_aggregates(self):
+        response, body = self.download(format='jsonl')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([line['title'] for line in lines], [movie.title for movie in self.movies])
+        self.assertEqual(lines[0]['genres'], ['Drama', 'Noir'])
+        self.assertEqual(lines[0]['actors'], ['Ada Stone'])
+        self.assertEqual((lines[0]['rating_avg'], lines[0]['rating_count']), (8.0, 1))
+        self.assertEqual((lines[4]['genres'], lines[4]['rating_count']), ([], 0))
+
+    def test_csv_round_trips_through_the_importer(self):
+        response, body = self.download()
+        self.assertIn('movies.csv', response['Content-Disposition'])
+        Movie.objects.all().delete()
+        report = MovieCsvImporter(Movie, Genre, Actor).import_file(io.BytesIO(body.encode()))
+        self.assertEqual((report.imported, report.failed), (5, 0))
+        harbor = Movie.objects.get(title='Harbor 0')
+        self.assertEqual(harbor.description, 'Two, "quoted" sisters')
+        self.assertEqual(list(harbor.genres.order_by('name').values_list('name', flat=True)), ['Drama', 'Noir'])
+
+    def test_chunks_match_a_single_pass_and_bad_format_is_rejected(self):
+        self.assertEqual(''.join(export('jsonl', chunk_size=2)), ''.join(export('jsonl')))
+        self.assertEqual(len(list(export('csv', chunk_size=2))), 3)
+        output = io.StringIO()
+        call_command('export_movies', format='jsonl', chunk_size=2, stdout=output)
+        self.assertEqual(output.getvalue(), ''.join(export('jsonl')))
+
+        response = APIClient().get(reverse('movies:movie-export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(POSTER_VARIANT_WIDTHS=[100, 200, 800])
+class PosterVariantTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.movie = Movie.objects.create(title='Harbor', description='x', release_year=1999)
+
+    def poster(self, name='harbor.png', size=(300, 450)):
+        buffer = io.BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 128)).save(buffer, format='PNG')
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_upload_queues_variants_below_the_original_width(self):
+        self.movie.poster = self.poster()
+        self.movie.save()
+        self.assertFalse(self.movie.poster_variants.exists())
+        self.assertEqual(run_pending(), 1)
+
+        variants = list(self.movie.poster_variants.all())
+        self.assertEqual([(v.format, v.width, v.height) for v in variants], [
+            ('jpeg', 100, 150), ('jpeg', 200, 300), ('webp', 100, 150), ('webp', 200, 300),
+        ])
+        with Image.open(variants[-1].file.path) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (200, 300)))
+
+        data = APIClient().get(reverse('movies:movie-detail', kwargs={'slug': self.movie.slug})).data['data']
+        self.assertEqual(list(data['poster_variants']['webp']), ['100', '200'])
+        self.assertTrue(data['poster_variants']['jpeg']['200'].startswith('http://testserver/media/posters/variants/'))
+        listed = APIClient().get(reverse('movies:movie-list')).json()['results'][0]
+        self.assertEqual(listed['poster_variants'], data['poster_variants'])
+
+    def test_replacing_or_clearing_the_poster_drops_old_variants(self):
+        self.movie.poster = self.poster()
+        self.movie.save()
+        run_pending()
+        old_files = [v.file.name for v in self.movie.poster_variants.all()] + [self.movie.poster.name]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movie.poster = self.poster('harbor-2.png', size=(90, 120))
+            self.movie.save()
+        # Until the job runs, the stale variants are not served
+        data = APIClient().get(reverse('movies:movie-detail', kwargs={'slug': self.movie.slug})).data['data']
+        self.assertEqual(data['poster_variants'], {})
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending()
+        self.assertEqual([v.width for v in self.movie.poster_variants.all()], [90, 90])
+        # The old files lose their references and are left to gc_media
+        self.assertEqual(set(MediaBlob.objects.filter(name__in=old_files).values_list('refs', flat=True)), {0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movie.poster = None
+            self.movie.save()
+        self.assertFalse(PosterVariant.objects.exists())
+
+    def test_identical_posters_share_one_file(self):
+        other = Movie.objects.create(title='Harbor II', description='x', release_year=2001)
+        for movie in (self.movie, other):
+            movie.poster = self.poster()
+            movie.save()
+        run_pending()
+        self.assertEqual(self.movie.poster.name, other.poster.name)
+        self.assertRegex(self.movie.poster.name, r'^posters/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(MediaBlob.objects.get(name=self.movie.poster.name).refs, 2)
+        self.assertEqual(MediaBlob.objects.get(name=other.poster_variants.first().file.name).refs, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(MediaBlob.objects.get(name=self.movie.poster.name).refs, 1)
+        self.assertEqual(set(MediaBlob.objects.values_list('refs', flat=True)), {1})
+
+    def test_backfill_queues_posters_without_current_variants(self):
+        Movie.objects.filter(pk=self.movie.pk).update(poster=self.movie.poster.storage.save('posters/a.png', self.poster()))
+        Movie.objects.create(title='Bare', description='x', release_year=2000)
+        output = io.StringIO()
+        call_command('backfill_poster_variants', stdout=output)
+        self.assertIn('Queued poster variants for 1 movie(s)', output.getvalue())
+        run_pending()
+        call_command('backfill_poster_variants', stdout=output)
+        self.assertIn('Queued poster variants for 0 movie(s)', output.getvalue())
+        self.assertEqual(PosterVariant.objects.count(), 4)
+
+
+class MovieDetailTest(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.movie = Movie.objects.create(title='Heat', description='x', release_year=1995)
+        self.movie.genres.add(Genre.objects.create(name='Crime'))
+        # Another movie whose slug is this movie's id
+        self.decoy = Movie.objects.create(title=str(self.movie.pk), description='x', release_year=2000)
+        for i in range(7):
+            user = User.objects.create_user(username=f'critic{i}', password='pass')
+            Review.objects.create(user=user, movie=self.movie, rating=i + 3, text=f'Review {i}')
+
+    def get(self, lookup, **params):
+        return APIClient().get(reverse('movies:movie-detail', kwargs={'slug': lookup}), params)
+
+    def test_numeric_ids_go_straight_to_the_primary_key(self):
+        self.assertEqual(self.get(str(self.movie.pk)).data['data']['title'], 'Heat')
+        # A digit-only slug that is not an id falls back to the slug
+        Movie.objects.create(title='1917', description='x', release_year=2019)
+        self.assertEqual(self.get('1917').data['data']['title'], '1917')
+        other = Movie.objects.create(title='Ronin', description='x', release_year=1998)
+        # Validators, then the lookup and the genres and actors prefetches
+        with self.assertNumQueries(4):
+            response = self.get(str(other.pk))
+        self.assertEqual(response.data['data']['title'], 'Ronin')
+        # Same cost by slug: the slug index replaces the id lookup
+        with self.assertNumQueries(4):
+            response = self.get(other.slug)
+        self.assertEqual(response.data['data']['title'], 'Ronin')
+        self.assertEqual(self.get('missing').status_code, 404)
+
+    def test_renamed_slugs_redirect_permanently(self):
+        old_slug = self.movie.slug
+        self.movie.slug = 'heat-1995'
+        self.movie.save()
+        self.assertTrue(MovieSlugHistory.objects.filter(slug=old_slug, movie=self.movie).exists())
+        response = self.get(old_slug, include='reviews')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(
+            response['Location'],
+            reverse('movies:movie-detail', kwargs={'slug': 'heat-1995'}) + '?include=reviews'
+        )
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(username='admin', password='pass'))
+        response = client.patch(reverse('movies:movie-update', kwargs={'slug': old_slug}), {'title': 'Heat'})
+        self.assertEqual(response.status_code, 308)
+        # Taking the old slug back retires its history entry
+        self.movie.slug = old_slug
+        self.movie.save()
+        self.assertFalse(MovieSlugHistory.objects.filter(slug=old_slug).exists())
+        self.assertEqual(self.get(old_slug).status_code, 200)
+
+    def test_reviews_are_embedded_with_a_cursor_for_more(self):
+        data = self.get(self.movie.slug, include='reviews', reviews_limit=3).data['data']
+        self.assertEqual(data['reviews_count'], 7)
+        reviews = data['reviews']
+        self.assertEqual([review['text'] for review in reviews['results']], ['Review 6', 'Review 5', 'Review 4'])
+        self.assertEqual(reviews['results'][0]['user'], 'critic6')
+
+        rest = APIClient().get(reviews['next']).json()['data']
+        self.assertEqual([review['text'] for review in rest['results']], ['Review 3', 'Review 2', 'Review 1'])
+        last = self.get(self.movie.slug, include='reviews', reviews_limit=50).data['data']['reviews']
+        self.assertEqual((len(last['results']), last['next']), (7, None))
+        self.assertNotIn('reviews', self.get(self.movie.slug).data['data'])
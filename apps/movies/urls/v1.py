@@ -11,10 +11,16 @@ urlpatterns = [
     path('actors/', views.ActorListView.as_view(), name='actor-list'),
     path('', views.MovieListView.as_view(), name='movie-list'),
     path('search/', views.SearchMoviesView.as_view(), name='movie-search'),
+    path('suggest/', views.SuggestView.as_view(), name='movie-suggest'),
     path('create/', views.MovieCreateView.as_view(), name='movie-create'),
+    path('export/', views.MovieExportView.as_view(), name='movie-export'),
+    path('import/', views.MovieImportView.as_view(), name='movie-import'),
     path('reviews/', views.ReviewListView.as_view(), name='review-list'),
     path('reviews/create/', views.ReviewCreateView.as_view(), name='review-create'),
-    # Movie detail, update, delete - supports both slug and id
+    # Movie detail, update, delete - numeric ids are looked up by primary key
+    path('<int:pk>/', views.MovieDetailView.as_view(), name='movie-detail'),
+    path('<int:pk>/update/', views.MovieUpdateView.as_view(), name='movie-update'),
+    path('<int:pk>/delete/', views.MovieDeleteView.as_view(), name='movie-delete'),
     path('<str:slug>/', views.MovieDetailView.as_view(), name='movie-detail'),
     path('<str:slug>/update/', views.MovieUpdateView.as_view(), name='movie-update'),
     path('<str:slug>/delete/', views.MovieDeleteView.as_view(), name='movie-delete'),
@@ -2,11 +2,16 @@
 Views for the movies application.
 """
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import MultiPartParser
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Q, Avg, Count
 from django.contrib.auth.models import User
+from django.db.models import Max, OuterRef, Q, Subquery, prefetch_related_objects
+from django.http import HttpResponsePermanentRedirect, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import urlencode
 
 from .models import Movie, Genre, Actor, Review
 from .serializers import (
@@ -14,60 +19,91 @@ from .serializers import (
     ActorSerializer,
     MovieListSerializer,
     MovieDetailSerializer,
-    ReviewSerializer
+    ReviewSerializer,
+    CompiledGenreSerializer,
+    CompiledActorSerializer,
+    CompiledMovieListSerializer,
+    CompiledReviewSerializer,
 )
+from . import exporting, tasks
+from .importing import ImportFormatError, check_header
+from .resolver import MovieMoved, resolve_movie
+from .search import search_movies
+from .search.suggest import get_suggest_index
+from . import cache
+from apps.jobs.files import save_upload
+from apps.jobs.registry import enqueue
+from apps.jobs.serializers import JobSerializer
 from apps.shared.utils.custom_response import CustomResponse
+from apps.shared.utils.response_cache import CachedResponseMixin
+from apps.shared.utils.compiled_serializer import CompiledListMixin
+from apps.shared.utils.conditional import ConditionalGetMixin, queryset_state
+from apps.shared.utils.pagination import CatalogPagination
+from apps.shared.utils.streaming import StreamingListMixin
 
 
-class GenreListView(generics.ListAPIView):
+class GenreListView(ConditionalGetMixin, CachedResponseMixin, CompiledListMixin, StreamingListMixin, generics.ListAPIView):
     """List all genres."""
     serializer_class = GenreSerializer
+    compiled_serializer_class = CompiledGenreSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [SearchFilter]
     search_fields = ['name']
+    keyset_fields = ('name',)
+    keyset_default = 'name'
+
+    def get_cache_namespaces(self, request, *args, **kwargs):
+        return [cache.GENRES]
+
+    def get_validator_state(self, request, *args, **kwargs):
+        return queryset_state(self.filter_queryset(self.get_queryset()))
 
     def get_queryset(self):
         return Genre.objects.all()
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return CustomResponse.success(
-            message_key="SUCCESS_MESSAGE",
-            request=request,
-            data=serializer.data
-        )
-
 
-class ActorListView(generics.ListAPIView):
+class ActorListView(ConditionalGetMixin, CachedResponseMixin, CompiledListMixin, StreamingListMixin, generics.ListAPIView):
     """List all actors."""
     serializer_class = ActorSerializer
+    compiled_serializer_class = CompiledActorSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [SearchFilter]
     search_fields = ['name']
+    keyset_fields = ('name',)
+    keyset_default = 'name'
+
+    def get_cache_namespaces(self, request, *args, **kwargs):
+        return [cache.ACTORS]
+
+    def get_validator_state(self, request, *args, **kwargs):
+        return queryset_state(self.filter_queryset(self.get_queryset()))
 
     def get_queryset(self):
         return Actor.objects.all()
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return CustomResponse.success(
-            message_key="SUCCESS_MESSAGE",
-            request=request,
-            data=serializer.data
-        )
-
 
-class MovieListView(generics.ListAPIView):
+class MovieListView(ConditionalGetMixin, CachedResponseMixin, CompiledListMixin, generics.ListAPIView):
     """List all movies with filtering, search, and pagination."""
     serializer_class = MovieListSerializer
+    compiled_serializer_class = CompiledMovieListSerializer
     permission_classes = [permissions.AllowAny]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['genres', 'release_year']
     search_fields = ['title', 'description', 'actors__name']
     ordering_fields = ['title', 'release_year', 'created_at']
     ordering = ['-created_at']
+    keyset_fields = ('created_at', 'release_year', 'title')
+
+    def get_cache_namespaces(self, request, *args, **kwargs):
+        return [cache.MOVIES]
+
+    def get_validator_state(self, request, *args, **kwargs):
+        # Cards embed genres, so a genre rename must change the validators too
+        genres_latest = Genre.objects.order_by('-updated_at').values('updated_at')[:1]
+        return queryset_state(
+            self.filter_queryset(self.get_queryset()),
+            genres_latest=Max(Subquery(genres_latest)),
+        )
 
     def get_queryset(self):
         queryset = Movie.objects.all().prefetch_related('genres', 'actors')
@@ -76,24 +112,24 @@ class MovieListView(generics.ListAPIView):
         min_rating = self.request.query_params.get('min_rating', None)
         max_rating = self.request.query_params.get('max_rating', None)
         
-        if min_rating or max_rating:
-            queryset = queryset.annotate(avg_rating=Avg('reviews__rating'))
-            if min_rating:
-                queryset = queryset.filter(avg_rating__gte=float(min_rating))
-            if max_rating:
-                queryset = queryset.filter(avg_rating__lte=float(max_rating))
+        if min_rating:
+            queryset = queryset.filter(rating_avg__gte=float(min_rating))
+        if max_rating:
+            queryset = queryset.filter(rating_avg__lte=float(max_rating))
         
         return queryset
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        queryset = self.get_list_queryset()
+        serializer_class = self.get_list_serializer_class()
+        context = self.get_serializer_context()
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
+            serializer = serializer_class(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
         
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = serializer_class(queryset, many=True, context=context)
         return CustomResponse.success(
             message_key="SUCCESS_MESSAGE",
             request=request,
@@ -101,41 +137,117 @@ class MovieListView(generics.ListAPIView):
         )
 
 
-class MovieDetailView(generics.RetrieveAPIView):
-    """Get movie details by slug or id."""
+class PermanentMethodRedirect(HttpResponsePermanentRedirect):
+    status_code = 308
+
+
+class MovieLookupMixin:
+    """
+    ``get_object`` for the ``<int:pk>/`` and ``<str:slug>/`` movie routes.
+
+    Old slugs answer with a permanent redirect to the current slug (308 for
+    writes, so the method and body are kept).
+    """
+
+    def get_object(self):
+        try:
+            movie = resolve_movie(self.get_queryset(), pk=self.kwargs.get('pk'), slug=self.kwargs.get('slug'))
+        except Movie.DoesNotExist:
+            raise NotFound("Movie not found")
+        self.check_object_permissions(self.request, movie)
+        return movie
+
+    def handle_exception(self, exc):
+        if not isinstance(exc, MovieMoved):
+            return super().handle_exception(exc)
+        request = self.request
+        location = reverse(request.resolver_match.view_name, kwargs={'slug': exc.slug})
+        if request.META.get('QUERY_STRING'):
+            location = f"{location}?{request.META['QUERY_STRING']}"
+        redirect_class = HttpResponsePermanentRedirect if request.method in ('GET', 'HEAD') else PermanentMethodRedirect
+        return redirect_class(location)
+
+
+class MovieDetailView(MovieLookupMixin, ConditionalGetMixin, CachedResponseMixin, generics.RetrieveAPIView):
+    """
+    Get movie details by slug or id.
+
+    ``?include=reviews`` embeds the newest ``reviews_limit`` reviews and a
+    ``next`` link continuing in the review list, so a movie page needs one
+    round trip.
+    """
     serializer_class = MovieDetailSerializer
     permission_classes = [permissions.AllowAny]
+    default_reviews_limit = 5
+    max_reviews_limit = 50
+
+    def get_cache_namespaces(self, request, *args, **kwargs):
+        return [cache.movie_namespace(kwargs.get('slug') or kwargs.get('pk'))]
+
+    def includes_reviews(self, request) -> bool:
+        return 'reviews' in request.GET.get('include', '').split(',')
+
+    def get_validator_state(self, request, *args, **kwargs):
+        extra = {}
+        if self.includes_reviews(request):
+            # Edits that keep the rating do not touch the movie row
+            reviews_latest = Review.objects.filter(movie=OuterRef('pk')).order_by('-updated_at').values('updated_at')[:1]
+            extra['reviews_latest'] = Max(Subquery(reviews_latest))
+        lookup = Q(slug=kwargs['slug']) if 'slug' in kwargs else Q(pk=kwargs.get('pk'))
+        parts, timestamps = queryset_state(
+            Movie.objects.filter(lookup),
+            genres_latest=Max('genres__updated_at'),
+            actors_latest=Max('actors__updated_at'),
+            **extra
+        )
+        # Missing movies, old slugs and digit slugs fall through to get_object
+        return (parts, timestamps) if parts[0] == 1 else None
 
     def get_queryset(self):
-        return Movie.objects.all().prefetch_related('genres', 'actors', 'reviews')
+        return Movie.objects.all()
 
     def get_object(self):
-        """Get movie by slug or id."""
-        lookup_value = self.kwargs.get('slug') or self.kwargs.get('pk')
-        
-        if not lookup_value:
-            from rest_framework.exceptions import NotFound
-            raise NotFound("Movie identifier not provided")
-        
-        # Try to get by slug first
+        movie = super().get_object()
+        relations = ['genres', 'actors']
+        if movie.poster:
+            relations.append('poster_variants')
+        prefetch_related_objects([movie], *relations)
+        return movie
+
+    def get_reviews_limit(self, request) -> int:
         try:
-            return self.get_queryset().get(slug=lookup_value)
-        except Movie.DoesNotExist:
-            # If not found by slug, try by id
-            try:
-                return self.get_queryset().get(id=int(lookup_value))
-            except (ValueError, Movie.DoesNotExist):
-                # If still not found, raise 404
-                from rest_framework.exceptions import NotFound
-                raise NotFound("Movie not found")
+            limit = int(request.query_params.get('reviews_limit', self.default_reviews_limit))
+        except ValueError:
+            limit = self.default_reviews_limit
+        return max(1, min(limit, self.max_reviews_limit))
+
+    def get_reviews(self, request, movie) -> dict:
+        """The newest reviews, plus a cursor link into the review list for the rest."""
+        limit = self.get_reviews_limit(request)
+        queryset = movie.reviews.select_related('user').order_by('-created_at', '-id')
+        rows = list(CompiledReviewSerializer.rows(queryset)[:limit + 1])
+        next_link = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            cursor = CatalogPagination().encode_cursor([rows[-1]['created_at'], rows[-1]['id']])
+            query = urlencode({'movie': movie.pk, 'cursor': cursor, 'page_size': limit})
+            next_link = request.build_absolute_uri(f"{reverse('movies:review-list')}?{query}")
+        context = self.get_serializer_context()
+        return {
+            'results': CompiledReviewSerializer(rows, many=True, context=context).data,
+            'next': next_link,
+        }
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance)
+        data = serializer.data
+        if self.includes_reviews(request):
+            data['reviews'] = self.get_reviews(request, instance)
         return CustomResponse.success(
             message_key="SUCCESS_MESSAGE",
             request=request,
-            data=serializer.data
+            data=data
         )
 
 
@@ -160,7 +272,7 @@ class MovieCreateView(generics.CreateAPIView):
         )
 
 
-class MovieUpdateView(generics.UpdateAPIView):
+class MovieUpdateView(MovieLookupMixin, generics.UpdateAPIView):
     """Update a movie (admin only)."""
     serializer_class = MovieDetailSerializer
     permission_classes = [permissions.IsAdminUser]
@@ -168,22 +280,6 @@ class MovieUpdateView(generics.UpdateAPIView):
     def get_queryset(self):
         return Movie.objects.all()
 
-    def get_object(self):
-        """Get movie by slug or id."""
-        lookup_value = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field or 'slug')
-        
-        # Try to get by slug first
-        try:
-            return self.get_queryset().get(slug=lookup_value)
-        except Movie.DoesNotExist:
-            # If not found by slug, try by id
-            try:
-                return self.get_queryset().get(id=int(lookup_value))
-            except (ValueError, Movie.DoesNotExist):
-                # If still not found, raise 404
-                from rest_framework.exceptions import NotFound
-                raise NotFound("Movie not found")
-
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
@@ -201,33 +297,13 @@ class MovieUpdateView(generics.UpdateAPIView):
         )
 
 
-class MovieDeleteView(generics.DestroyAPIView):
+class MovieDeleteView(MovieLookupMixin, generics.DestroyAPIView):
     """Delete a movie (admin only)."""
     permission_classes = [permissions.IsAdminUser]
 
     def get_queryset(self):
         return Movie.objects.all()
 
-    def get_object(self):
-        """Get movie by slug or id."""
-        lookup_value = self.kwargs.get('slug') or self.kwargs.get('pk')
-        
-        if not lookup_value:
-            from rest_framework.exceptions import NotFound
-            raise NotFound("Movie identifier not provided")
-        
-        # Try to get by slug first
-        try:
-            return self.get_queryset().get(slug=lookup_value)
-        except Movie.DoesNotExist:
-            # If not found by slug, try by id
-            try:
-                return self.get_queryset().get(id=int(lookup_value))
-            except (ValueError, Movie.DoesNotExist):
-                # If still not found, raise 404
-                from rest_framework.exceptions import NotFound
-                raise NotFound("Movie not found")
-
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
@@ -238,41 +314,110 @@ class MovieDeleteView(generics.DestroyAPIView):
         )
 
 
+class MovieImportView(APIView):
+    """Queue an import of movies from an uploaded CSV file (admin only)."""
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return CustomResponse.validation_error(errors={'file': 'No file provided'}, request=request)
+        try:
+            check_header(upload)
+        except ImportFormatError as e:
+            return CustomResponse.validation_error(errors={'file': str(e)}, request=request)
+
+        # The import runs in a worker (run_workers); the client polls the job
+        job = enqueue(tasks.IMPORT_CSV, {'path': save_upload(upload, 'imports')}, user=request.user)
+        response = CustomResponse.success(
+            message_key="SUCCESS_MESSAGE",
+            request=request,
+            data=JobSerializer(job).data,
+            status_code=status.HTTP_202_ACCEPTED
+        )
+        response['Location'] = request.build_absolute_uri(reverse('jobs:job-detail', kwargs={'uuid': job.uuid}))
+        return response
+
+
+class MovieExportView(APIView):
+    """Stream the whole catalog as CSV or JSON lines (``?format=csv|jsonl``)."""
+    permission_classes = [permissions.AllowAny]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ``format`` selects the export, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('format', 'csv')
+        if export_format not in exporting.FORMATS:
+            return CustomResponse.validation_error(
+                errors={'format': f"Expected one of: {', '.join(exporting.FORMATS)}"},
+                request=request
+            )
+        response = StreamingHttpResponse(
+            exporting.export(export_format),
+            content_type=exporting.FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="movies.{export_format}"'
+        return response
+
+
 class SearchMoviesView(generics.ListAPIView):
-    """Search movies by query."""
+    """Search movies by query, ranked by relevance."""
     serializer_class = MovieListSerializer
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
         query = self.request.query_params.get('q', '').strip()
-        if not query:
-            return Movie.objects.none()
-        
-        return Movie.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(genres__name__icontains=query) |
-            Q(actors__name__icontains=query)
-        ).distinct().prefetch_related('genres')
+        return search_movies(query, queryset=Movie.objects.prefetch_related('genres', 'poster_variants'))
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
+        results = self.get_queryset()
+        page = self.paginate_queryset(results)
+        serializer = self.get_serializer(page, many=True)
         return CustomResponse.success(
             message_key="SUCCESS_MESSAGE",
             request=request,
             data={
                 'query': request.query_params.get('q', ''),
-                'results': serializer.data,
-                'count': len(serializer.data)
+                **self.paginator.get_paginated_data(serializer.data),
+            }
+        )
+
+
+class SuggestView(APIView):
+    """Autocomplete over movie titles, actor and genre names, served from memory."""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    default_limit = 8
+    max_limit = 20
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        entries = get_suggest_index().suggest(query, limit=limit) if query else []
+        return CustomResponse.success(
+            message_key="SUCCESS_MESSAGE",
+            request=request,
+            data={
+                'query': query,
+                'results': [entry.to_dict() for entry in entries],
             }
         )
 
 
-class ReviewListView(generics.ListAPIView):
+class ReviewListView(CompiledListMixin, StreamingListMixin, generics.ListAPIView):
     """List reviews for a movie."""
     serializer_class = ReviewSerializer
+    compiled_serializer_class = CompiledReviewSerializer
     permission_classes = [permissions.AllowAny]
+    keyset_fields = ('created_at',)
 
     def get_queryset(self):
         movie_id = self.request.query_params.get('movie', None)
@@ -281,15 +426,6 @@ class ReviewListView(generics.ListAPIView):
             queryset = queryset.filter(movie_id=movie_id)
         return queryset
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return CustomResponse.success(
-            message_key="SUCCESS_MESSAGE",
-            request=request,
-            data=serializer.data
-        )
-
 
 class ReviewCreateView(generics.CreateAPIView):
     """Create a review."""
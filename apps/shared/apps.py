@@ -5,6 +5,9 @@ class SharedConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.shared'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .i18n import get_catalog
 
-
-
+        # Load the message bundles once at startup instead of on the first request
+        get_catalog()
@@ -0,0 +1,120 @@
+"""
+JWT authentication without a user query on the hot path.
+
+``CachedJWTAuthentication`` validates the token (signature, expiry, user
+claim) without touching the database and hands DRF a lazy user, so
+anonymous-friendly routes (``IsAuthenticatedOrReadOnly`` GETs) never load
+it. When the user is needed it comes from a short-lived per-process cache
+keyed by user id and token version. The version is simplejwt's
+``REVOKE_TOKEN_CLAIM`` (a hash of the password at issue time), so a
+password change gives new tokens a new key and turns the old ones away.
+
+The ``apps.shared.signals`` receivers drop a user's entries when the user
+is saved or deleted in this process. Other processes notice within
+``AUTH_USER_CACHE_TTL`` seconds, which bounds how long a deactivated user
+or a replaced password keeps working there.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+MAX_USERS = 10000
+
+
+class UserCache:
+    """
+    ``(user id, token version) -> user`` for ``ttl`` seconds.
+
+    Entries are grouped by user id so every version of a user goes at
+    once; the least recently used user is evicted first. ``get`` returns a
+    copy, so a request changing its user never leaks into another one.
+    """
+
+    def __init__(self, ttl: float, max_users: int = MAX_USERS, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_users = max_users
+        self.clock = clock
+        self._users: 'OrderedDict[str, Dict[Optional[str], Tuple[float, object]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, version: Optional[str]):
+        with self._lock:
+            entry = self._users.get(user_id, {}).get(version)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires <= self.clock():
+                del self._users[user_id][version]
+                return None
+            self._users.move_to_end(user_id)
+        return copy.copy(user)
+
+    def put(self, user_id: str, version: Optional[str], user) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._users.setdefault(user_id, {})[version] = (self.clock() + self.ttl, copy.copy(user))
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def discard(self, user_id) -> None:
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache(settings.AUTH_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` with a lazily loaded, cached ``request.user``."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        # Errors loading the user surface as 401s where the view first uses it
+        return SimpleLazyObject(lambda: self.get_user(validated_token)), validated_token
+
+    def get_user(self, validated_token):
+        user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        version = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = self.load_user(user_id, version)
+            user_cache.put(user_id, version, user)
+        return user
+
+    def load_user(self, user_id: str, version: Optional[str]):
+        try:
+            user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # Tokens issued before versioning was switched on have no version and run out on their own
+        if api_settings.CHECK_REVOKE_TOKEN and version is not None and version != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -2,7 +2,7 @@
 Custom exception handler with Telegram alerts.
 """
 import logging
-import traceback
+import threading
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError as DjangoValidationError
@@ -10,29 +10,70 @@ from rest_framework.exceptions import ValidationError as DRFValidationError
 from django.conf import settings
 
 from apps.shared.utils.custom_response import CustomResponse
-from apps.shared.utils.telegram_alerts import alert_to_telegram
+from apps.shared.utils.telegram_alerts import view_label, alert_to_telegram
+from .registry import registry
 
+logger = logging.getLogger(__name__)
+
+_client_error_counts = {}
+_client_error_lock = threading.Lock()
 
-def custom_exception_handler(exc, context):
-    """Custom exception handler that sends alerts to Telegram."""
-    response = exception_handler(exc, context)
-    
-    request = context.get('request')
 
-    logger = logging.getLogger(__name__)
-    logger.error(f"Exception: {str(exc)}", exc_info=True)
+def _sampled(key) -> int:
+    """Occurrence number of ``key``; callers log the first and every Nth one."""
+    with _client_error_lock:
+        _client_error_counts[key] = _client_error_counts.get(key, 0) + 1
+        return _client_error_counts[key]
+
+
+def _log_client_error(exc, status_code, request):
+    """Expected 4xx: no traceback, and only a sample reaches the log."""
+    key = (type(exc).__name__, status_code)
+    seen = _sampled(key)
+    every = getattr(settings, 'CLIENT_ERROR_LOG_EVERY', 100)
+    if seen == 1 or (every and seen % every == 0):
+        logger.info(
+            f"Client error {status_code} {type(exc).__name__}: {exc} "
+            f"({getattr(request, 'path', '-')}, seen {seen} times)"
+        )
+
+
+def _handle_server_error(exc, request):
+    """Unexpected error: aggregate by fingerprint, log the traceback and alert once per fingerprint."""
+    view = view_label(request) if request is not None else 'unknown view'
+    record = registry.record(exc, view)
+    if record.count == 1:
+        logger.error(f"Exception: {str(exc)} [{record.fingerprint}]", exc_info=exc)
+    else:
+        logger.error(f"Exception: {type(exc).__name__} in {view} [{record.fingerprint}] x{record.count}")
 
     # Send Telegram alert only in production (not in DEBUG mode)
     if not getattr(settings, 'DEBUG', False):
         try:
             alert_to_telegram(
-                traceback_text=traceback.format_exc(),
+                traceback_text=record.traceback,
                 message=str(exc),
-                request=request
+                request=request,
+                exc=exc
             )
         except Exception as alert_error:
             logger.error(f"Failed to send Telegram alert: {str(alert_error)}")
 
+
+def custom_exception_handler(exc, context):
+    """Custom exception handler that sends alerts to Telegram."""
+    response = exception_handler(exc, context)
+    
+    request = context.get('request')
+
+    is_client_error = isinstance(exc, DjangoValidationError) or (
+        response is not None and response.status_code < 500
+    )
+    if is_client_error:
+        _log_client_error(exc, response.status_code if response is not None else 400, request)
+    else:
+        _handle_server_error(exc, request)
+
     # Handle validation errors
     if isinstance(exc, (DjangoValidationError, DRFValidationError)):
         errors = {}
@@ -68,6 +109,14 @@ def custom_exception_handler(exc, context):
                 request=request,
                 message_key="NOT_FOUND"
             )
+        elif status_code < 500:
+            # 405, 406, 415, 429, ...: keep DRF's status and detail
+            return CustomResponse.error(
+                request=request,
+                message_key="CLIENT_ERROR",
+                errors=response.data,
+                status_code=status_code
+            )
         elif status_code >= 500:
             return CustomResponse.internal_error(
                 request=request,
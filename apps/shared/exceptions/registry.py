@@ -0,0 +1,196 @@
+"""
+Aggregation of server errors by fingerprint across every worker process.
+
+Every unexpected exception is counted under its fingerprint (exception
+type + innermost frame + view); the traceback is formatted only the first
+time a process sees a fingerprint and kept as the sample. Counts and
+first/last-seen times go to the process's ``errors_<pid>.db`` in
+``METRICS_DIR`` (the mmap store behind ``/metrics``), and each sample to
+``error_samples/<fingerprint>.json`` there, written once. Recording never
+touches the database, which matters most when the database is the thing
+that is down; ``snapshot`` merges the files of all processes.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import traceback
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.utils import timezone
+
+from apps.shared.metrics.store import ProcessStore, metrics_dir, process_files
+from apps.shared.utils.alerts import fingerprint_exception
+
+logger = logging.getLogger(__name__)
+
+MAX_FINGERPRINTS = 500
+MAX_TRACEBACK_LENGTH = 8000
+
+
+@dataclass
+class ErrorRecord:
+    fingerprint: str
+    exception: str
+    view: str
+    message: str
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+    traceback: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _samples_dir() -> Path:
+    return metrics_dir() / 'error_samples'
+
+
+def _write_sample(record: ErrorRecord) -> None:
+    """Keep the first sample of a fingerprint for every process to read; later ones are dropped."""
+    path = _samples_dir() / f'{record.fingerprint}.json'
+    if path.exists():
+        return
+    sample = {
+        'exception': record.exception,
+        'view': record.view,
+        'message': record.message,
+        'traceback': record.traceback,
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(sample, handle)
+        os.replace(temporary, path)
+    except OSError as e:
+        logger.warning(f"Could not store error sample {record.fingerprint}: {str(e)}")
+
+
+def _read_sample(fingerprint: str) -> Optional[dict]:
+    try:
+        with open(_samples_dir() / f'{fingerprint}.json') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+class ErrorRegistry:
+    """
+    Records errors in this process's store and merges every process's on read.
+
+    ``record`` also keeps a bounded per-process fingerprint -> ErrorRecord
+    map (least recently seen evicted first), so the handler knows when this
+    process sees a fingerprint for the first time.
+    """
+
+    def __init__(self, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._records: 'OrderedDict[str, ErrorRecord]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = ProcessStore('errors')
+
+    def _count(self, record: ErrorRecord, first: bool) -> None:
+        now = record.last_seen.timestamp()
+        assignments = [(f'last|{record.fingerprint}', now)]
+        if first:
+            assignments.append((f'first|{record.fingerprint}', now))
+        try:
+            self._store.update(increments=[(f'count|{record.fingerprint}', 1)], assignments=assignments)
+        except OSError as e:
+            logger.warning(f"Could not count error {record.fingerprint}: {str(e)}")
+
+    def record(self, exc: BaseException, view: str) -> ErrorRecord:
+        """Count one occurrence; returns the record (``count == 1`` means first sighting)."""
+        fingerprint = fingerprint_exception(exc, view)
+        now = timezone.now()
+        with self._lock:
+            record = self._records.get(fingerprint)
+            if record is not None:
+                record.count += 1
+                record.last_seen = now
+                self._records.move_to_end(fingerprint)
+                self._count(record, first=False)
+                return record
+
+        # Formatted outside the lock, and only for new fingerprints
+        sample = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        record = ErrorRecord(
+            fingerprint=fingerprint,
+            exception=f'{type(exc).__module__}.{type(exc).__qualname__}',
+            view=view,
+            message=str(exc)[:500],
+            count=1,
+            first_seen=now,
+            last_seen=now,
+            traceback=sample[-MAX_TRACEBACK_LENGTH:],
+        )
+        with self._lock:
+            existing = self._records.get(fingerprint)
+            if existing is not None:
+                # Another thread recorded it meanwhile
+                existing.count += 1
+                existing.last_seen = now
+                self._count(existing, first=False)
+                return existing
+            self._records[fingerprint] = record
+            while len(self._records) > self.max_fingerprints:
+                self._records.popitem(last=False)
+            self._count(record, first=True)
+        _write_sample(record)
+        return record
+
+    def snapshot(self) -> List[Dict]:
+        """Records of every process by descending count, at most ``max_fingerprints``."""
+        counts: Dict[str, float] = {}
+        first_seen: Dict[str, float] = {}
+        last_seen: Dict[str, float] = {}
+        for entries in process_files('errors'):
+            for key, value in entries.items():
+                kind, _, fingerprint = key.partition('|')
+                if kind == 'count':
+                    counts[fingerprint] = counts.get(fingerprint, 0) + value
+                elif kind == 'first':
+                    first_seen[fingerprint] = min(value, first_seen.get(fingerprint, value))
+                elif kind == 'last':
+                    last_seen[fingerprint] = max(value, last_seen.get(fingerprint, value))
+
+        ranked = sorted(counts, key=lambda fingerprint: (-counts[fingerprint], fingerprint))
+        records = []
+        for fingerprint in ranked[:self.max_fingerprints]:
+            sample = _read_sample(fingerprint)
+            if sample is None:
+                with self._lock:
+                    local = self._records.get(fingerprint)
+                sample = local.to_dict() if local is not None else {
+                    'exception': '', 'view': '', 'message': '', 'traceback': '',
+                }
+            records.append({
+                'fingerprint': fingerprint,
+                'exception': sample['exception'],
+                'view': sample['view'],
+                'message': sample['message'],
+                'count': int(counts[fingerprint]),
+                'first_seen': datetime.fromtimestamp(first_seen.get(fingerprint, 0), tz=dt_timezone.utc),
+                'last_seen': datetime.fromtimestamp(last_seen.get(fingerprint, 0), tz=dt_timezone.utc),
+                'traceback': sample['traceback'],
+            })
+        return records
+
+    def clear(self) -> None:
+        """Forget every recorded error, in this and all other processes' files."""
+        with self._lock:
+            self._records.clear()
+            self._store.reset()
+        directory = metrics_dir()
+        for path in [*directory.glob('errors_*.db'), *_samples_dir().glob('*.json')]:
+            path.unlink(missing_ok=True)
+
+
+registry = ErrorRegistry()
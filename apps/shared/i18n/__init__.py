@@ -0,0 +1,11 @@
+"""
+Localized messages for the API response envelope.
+"""
+from .catalog import Message, MessageCatalog, get_catalog, negotiate_language
+
+__all__ = [
+    'Message',
+    'MessageCatalog',
+    'get_catalog',
+    'negotiate_language',
+]
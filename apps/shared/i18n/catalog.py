@@ -0,0 +1,105 @@
+"""
+Message catalog for the response envelope.
+
+Bundles live in ``locale/<language>.json``. ``en`` is the base bundle and
+defines every key with its ``id``, ``message`` and ``status_code``; other
+languages only translate ``message``. Bundles are read once per process
+and every lookup afterwards is a dict access.
+"""
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.conf import settings
+
+LOCALE_DIR = Path(__file__).resolve().parent / 'locale'
+BASE_LANGUAGE = 'en'
+FALLBACK_KEY = 'SUCCESS_MESSAGE'
+
+
+@dataclass(frozen=True)
+class Message:
+    id: str
+    message: str
+    status_code: int
+
+
+class MessageCatalog:
+    """Messages per language, with unknown keys falling back to ``SUCCESS_MESSAGE``."""
+
+    def __init__(self, bundles: Dict[str, Dict[str, dict]], default_language: str = BASE_LANGUAGE):
+        base = bundles[BASE_LANGUAGE]
+        self.default_language = default_language if default_language in bundles else BASE_LANGUAGE
+        self.messages: Dict[str, Dict[str, Message]] = {}
+        for language, bundle in bundles.items():
+            self.messages[language] = {
+                key: Message(
+                    id=entry['id'],
+                    message=bundle.get(key, {}).get('message', entry['message']),
+                    status_code=entry['status_code'],
+                )
+                for key, entry in base.items()
+            }
+
+    @classmethod
+    def load(cls, directory: Path = LOCALE_DIR, default_language: str = BASE_LANGUAGE) -> 'MessageCatalog':
+        bundles = {}
+        for path in sorted(directory.glob('*.json')):
+            with path.open(encoding='utf-8') as bundle:
+                bundles[path.stem] = json.load(bundle)
+        return cls(bundles, default_language=default_language)
+
+    @property
+    def languages(self):
+        return self.messages.keys()
+
+    def get(self, key: str, language: Optional[str] = None) -> Message:
+        bundle = self.messages.get(language) or self.messages[self.default_language]
+        return bundle.get(key) or bundle[FALLBACK_KEY]
+
+    def negotiate(self, accept_language: Optional[str]) -> str:
+        """
+        Best supported language for an ``Accept-Language`` value.
+
+        Honours q-values and falls back from a regional tag (``uz-UZ``) to
+        its primary subtag; anything unsupported gets the default language.
+        """
+        if not accept_language:
+            return self.default_language
+        candidates = []
+        for position, part in enumerate(accept_language.split(',')):
+            tag, _, params = part.strip().partition(';')
+            tag = tag.strip().lower()
+            if not tag:
+                continue
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    continue
+            if quality > 0:
+                candidates.append((-quality, position, tag))
+        for _, _, tag in sorted(candidates):
+            if tag in self.messages:
+                return tag
+            primary = tag.split('-')[0]
+            if primary in self.messages:
+                return primary
+        return self.default_language
+
+
+@lru_cache(maxsize=None)
+def get_catalog() -> MessageCatalog:
+    """Process-wide catalog, loaded on first use (``SharedConfig.ready`` loads it at startup)."""
+    default_language = getattr(settings, 'LANGUAGE_CODE', BASE_LANGUAGE).split('-')[0].lower()
+    return MessageCatalog.load(default_language=default_language)
+
+
+@lru_cache(maxsize=512)
+def negotiate_language(accept_language: Optional[str]) -> str:
+    """``MessageCatalog.negotiate`` memoized per distinct header value."""
+    return get_catalog().negotiate(accept_language)
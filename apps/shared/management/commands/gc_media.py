@@ -0,0 +1,39 @@
+"""
+Management command to delete unreferenced files from content-addressed media storage.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.shared.utils.media import collect_garbage, media_storage, recount_references
+
+
+class Command(BaseCommand):
+    help = 'Deletes media files that no row has referenced for the grace period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Keep unreferenced files this long (uploads in flight hold no reference yet)',
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='First rebuild reference counts from the rows that use each file (applied even with --dry-run)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        storage = media_storage()
+        if options['recount']:
+            changed = recount_references(storage)
+            self.stdout.write(f'Repaired reference counts of {changed} file(s)')
+        removed, freed = collect_garbage(
+            storage,
+            grace=timedelta(hours=options['grace_hours']),
+            dry_run=options['dry_run'],
+        )
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{action} {removed} file(s), {freed / 1024 / 1024:.1f} MiB'))
@@ -0,0 +1,14 @@
+"""
+Multi-process request metrics exposed in Prometheus text format.
+"""
+from .exposition import CONTENT_TYPE, render
+from .instruments import observe_request
+from .store import collect, store
+
+__all__ = [
+    'CONTENT_TYPE',
+    'collect',
+    'observe_request',
+    'render',
+    'store',
+]
@@ -0,0 +1,47 @@
+"""
+Prometheus text format (0.0.4) rendering of the aggregated store.
+"""
+from collections import defaultdict
+from typing import Dict
+
+from .instruments import METRICS
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _base_name(sample: str) -> str:
+    for suffix in ('_bucket', '_sum', '_count'):
+        if sample.endswith(suffix) and sample[:-len(suffix)] in METRICS:
+            return sample[:-len(suffix)]
+    return sample
+
+
+def render(values: Dict[str, float]) -> str:
+    """Group samples by metric, turning stored per-bucket counts into cumulative ``le`` buckets."""
+    samples = defaultdict(lambda: defaultdict(dict))
+    for key, value in values.items():
+        sample, labels, le = key.split('|')
+        samples[_base_name(sample)][labels][(sample, le)] = value
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        if name not in samples:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels in sorted(samples[name]):
+            series = samples[name][labels]
+            if kind != 'histogram':
+                lines.append(f'{name}{{{labels}}} {_format(series[(name, "")])}')
+                continue
+            cumulative = 0.0
+            for bound in [f'{bound:g}' for bound in buckets] + ['+Inf']:
+                cumulative += series.get((f'{name}_bucket', bound), 0.0)
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {_format(cumulative)}')
+            lines.append(f'{name}_sum{{{labels}}} {_format(series.get((f"{name}_sum", ""), 0.0))}')
+            lines.append(f'{name}_count{{{labels}}} {_format(series.get((f"{name}_count", ""), 0.0))}')
+    return '\n'.join(lines) + '\n'
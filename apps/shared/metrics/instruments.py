@@ -0,0 +1,77 @@
+"""
+Request metrics recorded by ``MetricsMiddleware``.
+
+Store keys are ``name|labels|le``: ``labels`` is the pre-rendered
+Prometheus label set and ``le`` is only set on histogram buckets. Buckets
+are stored non-cumulative (one increment per observation) and summed up
+at exposition time.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from .store import store
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Any other verb a client sends is recorded as OTHER, so clients cannot add label sets
+METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests by route, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency by route.', DURATION_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size by route.', SIZE_BUCKETS),
+    'db_queries_per_request': ('histogram', 'Database queries per request by route.', QUERY_COUNT_BUCKETS),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in database queries by route.', None),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def histogram_keys(name: str, labels: str, buckets) -> Tuple[List[str], str, str]:
+    bucket_keys = [f'{name}_bucket|{labels}|{bound:g}' for bound in buckets]
+    bucket_keys.append(f'{name}_bucket|{labels}|+Inf')
+    return bucket_keys, f'{name}_sum|{labels}|', f'{name}_count|{labels}|'
+
+
+class _RouteKeys:
+    """Every store key one (route, method, status) combination writes, built once."""
+
+    def __init__(self, route: str, method: str, status: int):
+        labels = f'route="{_escape(route)}",method="{_escape(method)}"'
+        self.requests = f'http_requests_total|{labels},status="{status}"|'
+        self.duration = histogram_keys('http_request_duration_seconds', labels, DURATION_BUCKETS)
+        self.size = histogram_keys('http_response_size_bytes', labels, SIZE_BUCKETS)
+        self.queries = histogram_keys('db_queries_per_request', labels, QUERY_COUNT_BUCKETS)
+        self.query_time = f'db_query_duration_seconds_total|{labels}|'
+
+
+_route_keys: Dict[Tuple[str, str, int], _RouteKeys] = {}
+
+
+def _observe(keys, buckets, value, increments) -> None:
+    bucket_keys, sum_key, count_key = keys
+    increments.append((bucket_keys[bisect_left(buckets, value)], 1))
+    increments.append((sum_key, value))
+    increments.append((count_key, 1))
+
+
+def observe_request(route: str, method: str, status: int, duration: float, size, queries: int,
+                    query_time: float) -> None:
+    """Record one request; ``size`` is None for streamed responses."""
+    if method not in METHODS:
+        method = 'OTHER'
+    keys = _route_keys.get((route, method, status))
+    if keys is None:
+        keys = _route_keys[(route, method, status)] = _RouteKeys(route, method, status)
+    increments = [(keys.requests, 1)]
+    _observe(keys.duration, DURATION_BUCKETS, duration, increments)
+    if size is not None:
+        _observe(keys.size, SIZE_BUCKETS, size, increments)
+    _observe(keys.queries, QUERY_COUNT_BUCKETS, queries, increments)
+    if query_time:
+        increments.append((keys.query_time, query_time))
+    store.increment_many(increments)
@@ -0,0 +1,59 @@
+"""
+Per-request instrumentation.
+"""
+import time
+
+from django.db import connection
+
+from .instruments import observe_request
+
+
+class _QueryTimer:
+    """``connection.execute_wrapper`` hook counting queries and their time."""
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+def route_of(request) -> str:
+    """URL pattern name, so labels stay bounded whatever paths clients send."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status, response size and DB queries for every request.
+
+    Should be the first middleware so the latency includes the rest of the
+    stack. Samples go to the per-process mmap store read by ``/metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        size = None if response.streaming else len(response.content)
+        observe_request(
+            route_of(request), request.method, response.status_code,
+            duration, size, timer.count, timer.duration,
+        )
+        return response
@@ -0,0 +1,188 @@
+"""
+Memory-mapped per-process metric files.
+
+Each worker process writes its own file ``metrics_<pid>.db`` in
+``METRICS_DIR``, so writers never contend across processes and recording a
+sample is a dict lookup plus ``struct.pack_into`` on the mapping. The
+``/metrics`` view reads every file in the directory and sums values per
+key, which aggregates all gunicorn workers (including ones that have
+exited: counters stay cumulative until the directory is cleaned at
+startup).
+
+File layout: an 8-byte header holding the number of used bytes, then
+entries of ``uint32 key length | key (utf-8, padded to 8 bytes) | float64``.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from django.conf import settings
+
+INITIAL_SIZE = 1 << 16
+_HEADER = struct.Struct('i4x')
+_KEY_LENGTH = struct.Struct('i')
+_VALUE = struct.Struct('d')
+
+
+def metrics_dir() -> Path:
+    configured = getattr(settings, 'METRICS_DIR', '')
+    return Path(configured) if configured else Path(tempfile.gettempdir()) / 'movie_api_metrics'
+
+
+def _padded_length(key: bytes) -> int:
+    # Align the float that follows the key to 8 bytes
+    return _KEY_LENGTH.size + len(key) + (8 - (_KEY_LENGTH.size + len(key)) % 8) % 8
+
+
+def _entry_positions(data, used: int) -> Iterator[Tuple[str, int]]:
+    """``(key, offset of its value)`` for every complete entry below ``used``."""
+    position = _HEADER.size
+    while position < used:
+        key_length = _KEY_LENGTH.unpack_from(data, position)[0]
+        key = bytes(data[position + _KEY_LENGTH.size:position + _KEY_LENGTH.size + key_length])
+        position += _padded_length(key)
+        if position + _VALUE.size > used:
+            return
+        yield key.decode('utf-8'), position
+        position += _VALUE.size
+
+
+def read_entries(data) -> Iterator[Tuple[str, float]]:
+    """Entries of one metric file's bytes."""
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    for key, position in _entry_positions(data, used):
+        yield key, _VALUE.unpack_from(data, position)[0]
+
+
+class MmapDict:
+    """String -> float map persisted in a memory-mapped file; a single process writes it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self._capacity = size
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._positions: Dict[str, int] = {}
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        if self._used == _HEADER.size:
+            _HEADER.pack_into(self._map, 0, self._used)
+        self._positions.update(_entry_positions(self._map, self._used))
+
+    def _add_key(self, key: str) -> int:
+        encoded = key.encode('utf-8')
+        entry_length = _padded_length(encoded) + _VALUE.size
+        while self._used + entry_length > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        _KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        position = self._used + _padded_length(encoded)
+        _VALUE.pack_into(self._map, position, 0.0)
+        self._used += entry_length
+        # Publish the entry only once it is complete, readers stop at `used`
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def increment(self, key: str, amount: float) -> None:
+        self.increment_many(((key, amount),))
+
+    def increment_many(self, increments) -> None:
+        # Hot path: locals instead of attribute lookups per pair
+        positions = self._positions
+        unpack_from, pack_into = _VALUE.unpack_from, _VALUE.pack_into
+        data = self._map
+        for key, amount in increments:
+            position = positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+                data = self._map
+            pack_into(data, position, unpack_from(data, position)[0] + amount)
+
+    def set_many(self, assignments) -> None:
+        data = self._map
+        for key, value in assignments:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._add_key(key)
+                data = self._map
+            _VALUE.pack_into(data, position, value)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class ProcessStore:
+    """
+    This process's ``<prefix>_<pid>.db`` file, reopened after fork so every
+    worker gets its own.
+    """
+
+    def __init__(self, prefix: str = 'metrics'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._pid = None
+        self._dict = None
+
+    def _current(self) -> MmapDict:
+        pid = os.getpid()
+        if self._pid != pid:
+            directory = metrics_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            self._dict = MmapDict(directory / f'{self.prefix}_{pid}.db')
+            self._pid = pid
+        return self._dict
+
+    def increment_many(self, increments) -> None:
+        """Apply ``(key, amount)`` pairs under one lock acquisition."""
+        with self._lock:
+            self._current().increment_many(increments)
+
+    def update(self, increments=(), assignments=()) -> None:
+        """Add ``increments`` and overwrite ``assignments`` (``(key, value)`` pairs) under one lock."""
+        with self._lock:
+            current = self._current()
+            current.increment_many(increments)
+            current.set_many(assignments)
+
+    def reset(self) -> None:
+        with self._lock:
+            if self._dict is not None:
+                self._dict.close()
+            self._pid = self._dict = None
+
+
+def process_files(prefix: str = 'metrics') -> Iterator[Dict[str, float]]:
+    """The entries of every ``<prefix>_<pid>.db`` file in ``METRICS_DIR``, one dict per process."""
+    directory = metrics_dir()
+    if not directory.exists():
+        return
+    for path in sorted(directory.glob(f'{prefix}_*.db')):
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        if len(data) >= _HEADER.size:
+            yield dict(read_entries(data))
+
+
+def collect() -> Dict[str, float]:
+    """Values summed across every process file in ``METRICS_DIR``."""
+    totals: Dict[str, float] = defaultdict(float)
+    for entries in process_files():
+        for key, value in entries.items():
+            totals[key] += value
+    return totals
+
+
+store = ProcessStore()
@@ -1,64 +1,80 @@
 """
 Custom CORS middleware for flexible origin handling.
 """
-from django.utils.deprecation import MiddlewareMixin
-from django.conf import settings
 import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
 
+DEFAULT_ALLOW_METHODS = ['DELETE', 'GET', 'OPTIONS', 'PATCH', 'POST', 'PUT']
+DEFAULT_ALLOW_HEADERS = [
+    'accept', 'authorization', 'content-type', 'origin', 'user-agent', 'x-csrftoken', 'x-requested-with',
+]
+ORIGIN_CACHE_SIZE = 1024
 
-class FlexibleCorsMiddleware(MiddlewareMixin):
+
+def compile_origin_patterns(patterns):
+    """Bitta regex: har bir pattern alohida guruhda, ``re.match`` semantikasi saqlanadi."""
+    sources = [getattr(pattern, 'pattern', pattern) for pattern in patterns]
+    if not sources:
+        return None
+    return re.compile('|'.join(f'(?:{source})' for source in sources))
+
+
+class FlexibleCorsMiddleware:
     """
-    Development rejimida barcha localhost va local network originlarini ruxsat beradi.
-    Production rejimida faqat belgilangan originlar ruxsat etiladi.
+    Yagona CORS komponenti (corsheaders o'rniga).
+
+    Sozlamalar ishga tushishda bir marta o'qiladi: aniq originlar ``set``
+    ga, ``CORS_ALLOWED_ORIGIN_REGEXES`` esa bitta regexga kompilyatsiya
+    qilinadi; har bir origin bo'yicha qaror cheklangan LRU keshda saqlanadi.
+    Preflight (``OPTIONS`` + ``Access-Control-Request-Method``) so'rovlariga
+    middleware o'zi bo'sh 200 javob qaytaradi, ular view larga yetib bormaydi.
     """
-    
-    def process_request(self, request):
-        """Request ni qayta ishlash."""
-        # CORS preflight request ni qayta ishlash
-        if request.method == 'OPTIONS':
-            origin = request.META.get('HTTP_ORIGIN', '')
-            if self._is_allowed_origin(origin):
-                return None
-        return None
-    
-    def process_response(self, request, response):
-        """Response ga CORS headerlarini qo'shish."""
-        origin = request.META.get('HTTP_ORIGIN', '')
-        
-        if self._is_allowed_origin(origin):
-            response['Access-Control-Allow-Origin'] = origin
-            response['Access-Control-Allow-Credentials'] = 'true'
-            response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-            response['Access-Control-Allow-Headers'] = (
-                'Content-Type, Authorization, X-CSRFToken, X-Requested-With, Accept'
-            )
-            response['Access-Control-Max-Age'] = '86400'
-        
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.allowed_origins = frozenset(getattr(settings, 'CORS_ALLOWED_ORIGINS', []))
+        self.origin_regex = compile_origin_patterns(getattr(settings, 'CORS_ALLOWED_ORIGIN_REGEXES', []))
+        self.allow_credentials = getattr(settings, 'CORS_ALLOW_CREDENTIALS', False)
+        self.allow_methods = ', '.join(getattr(settings, 'CORS_ALLOW_METHODS', DEFAULT_ALLOW_METHODS))
+        self.allow_headers = ', '.join(getattr(settings, 'CORS_ALLOW_HEADERS', DEFAULT_ALLOW_HEADERS))
+        self.expose_headers = ', '.join(getattr(settings, 'CORS_EXPOSE_HEADERS', []))
+        self.max_age = getattr(settings, 'CORS_PREFLIGHT_MAX_AGE', 86400)
+        self.is_allowed_origin = lru_cache(maxsize=ORIGIN_CACHE_SIZE)(self._is_allowed_origin)
+
+    def __call__(self, request):
+        origin = request.META.get('HTTP_ORIGIN')
+        if request.method == 'OPTIONS' and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in request.META:
+            # Preflight: qolgan middleware va DRF ni chetlab o'tamiz
+            response = HttpResponse(status=200)
+            response['Content-Length'] = '0'
+            if origin and self.is_allowed_origin(origin):
+                self.add_origin_headers(response, origin)
+                response['Access-Control-Allow-Methods'] = self.allow_methods
+                response['Access-Control-Allow-Headers'] = self.allow_headers
+                if self.max_age:
+                    response['Access-Control-Max-Age'] = str(self.max_age)
+            return response
+
+        response = self.get_response(request)
+        # Javob originga qarab farqlanadi, oraliq keshlar buni bilishi kerak
+        patch_vary_headers(response, ('Origin',))
+        if origin and self.is_allowed_origin(origin):
+            self.add_origin_headers(response, origin)
+            if self.expose_headers:
+                response['Access-Control-Expose-Headers'] = self.expose_headers
         return response
-    
+
+    def add_origin_headers(self, response, origin):
+        response['Access-Control-Allow-Origin'] = origin
+        if self.allow_credentials:
+            response['Access-Control-Allow-Credentials'] = 'true'
+
     def _is_allowed_origin(self, origin):
         """Origin ruxsat etilganligini tekshirish."""
-        if not origin:
-            return False
-        
-        # Production rejimida faqat belgilangan originlar
-        if not settings.DEBUG:
-            allowed_origins = getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
-            return origin in allowed_origins
-        
-        # Development rejimida localhost va local network
-        localhost_patterns = [
-            r'^http://localhost:\d+$',
-            r'^http://127\.0\.0\.1:\d+$',
-            r'^http://192\.168\.\d+\.\d+:\d+$',
-            r'^http://10\.\d+\.\d+\.\d+:\d+$',
-        ]
-        
-        for pattern in localhost_patterns:
-            if re.match(pattern, origin):
-                return True
-        
-        # Belgilangan originlar ham ruxsat etiladi
-        allowed_origins = getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
-        return origin in allowed_origins
-
+        if origin in self.allowed_origins:
+            return True
+        return self.origin_regex is not None and self.origin_regex.match(origin) is not None
@@ -20,5 +20,27 @@ class BaseModel(models.Model):
         ordering = ['-created_at']
 
 
+class MediaBlob(models.Model):
+    """
+    A file in content-addressed media storage and how many fields reference it.
 
+    Maintained by ``utils.media.ContentAddressedStorage``: saving an
+    identical file adds a reference instead of a copy, deleting drops one.
+    Files are only removed by ``gc_media`` once unreferenced for a while.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When refs last dropped to zero
+    released_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'media_blobs'
+        indexes = [
+            models.Index(fields=['refs', 'released_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refs})"
 
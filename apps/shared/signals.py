@@ -0,0 +1,16 @@
+"""
+Signal handlers for the shared application.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+
+
+# Authenticated user cache (password changes and deactivation are saves too)
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='shared.user_saved_auth_cache')
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL, dispatch_uid='shared.user_deleted_auth_cache')
+def forget_cached_user(sender, instance, **kwargs):
+    user_cache.discard(instance.pk)
@@ -0,0 +1,97 @@
+"""
+Query budgets: catch N+1 queries in tests.
+
+Each URL name declares the most queries one request may run. Tests call
+a route at two data scales with ``QueryRecorder`` and
+``assert_query_budget`` fails when the count exceeds the budget or grows
+with the number of rows. The failure report groups the SQL by shape and
+shows where in project code each query came from.
+"""
+import re
+import traceback
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connection
+
+PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+_THIS_FILE = str(Path(__file__).resolve())
+# Literals, numbers and IN lists vary between N+1 siblings; strip them to group by shape
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'IN \((?:\s*%s\s*,?)+\)|IN \((?:\s*\?\s*,?)+\)')
+
+
+@dataclass
+class CapturedQuery:
+    sql: str
+    origin: List[str] = field(default_factory=list)
+
+    @property
+    def shape(self) -> str:
+        return _IN_LISTS.sub('IN (...)', _LITERALS.sub('?', self.sql))
+
+
+def _project_origin(limit: int = 4) -> List[str]:
+    """Innermost project frames (no site-packages, not this module) of the current stack."""
+    frames = []
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = str(Path(frame.filename).resolve())
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and filename != _THIS_FILE
+            and 'site-packages' not in filename
+            and '/tests' not in filename
+        ):
+            relative = filename[len(PROJECT_ROOT) + 1:]
+            frames.append(f'{relative}:{frame.lineno} in {frame.name}')
+            if len(frames) == limit:
+                break
+    return frames
+
+
+class QueryRecorder:
+    """Context manager recording every query on the default connection with its origin."""
+
+    def __init__(self):
+        self.queries: List[CapturedQuery] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(CapturedQuery(sql=sql, origin=_project_origin()))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def report(self) -> str:
+        """Queries grouped by SQL shape, most repeated first, with their origins."""
+        groups: Dict[str, List[CapturedQuery]] = OrderedDict()
+        for query in self.queries:
+            groups.setdefault(query.shape, []).append(query)
+        lines = []
+        for shape, queries in sorted(groups.items(), key=lambda item: -len(item[1])):
+            lines.append(f'  {len(queries)}x {shape[:300]}')
+            for origin in queries[0].origin:
+                lines.append(f'       at {origin}')
+        return '\n'.join(lines)
+
+
+def assert_query_budget(testcase, url_name: str, budget: int, small: QueryRecorder, large: QueryRecorder):
+    """Fail when either scale exceeds ``budget`` or the query count grows with the data."""
+    problems = []
+    if len(large) > len(small):
+        problems.append(f'query count grows with rows: {len(small)} -> {len(large)}')
+    if max(len(small), len(large)) > budget:
+        problems.append(f'{max(len(small), len(large))} queries over a budget of {budget}')
+    if problems:
+        testcase.fail(f"{url_name}: {'; '.join(problems)}\nQueries at the larger scale:\n{large.report()}")
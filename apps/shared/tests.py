@@ -0,0 +1,427 @@
+"""
+Tests for the shared application.
+"""
+import re
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.core.files.base import ContentFile
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import MethodNotAllowed, NotFound
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import metrics
+from .authentication import UserCache, user_cache
+from .exceptions.handler import custom_exception_handler
+from .metrics.store import MmapDict
+from .exceptions.registry import registry
+from .i18n import get_catalog, negotiate_language
+from .utils.alerts import Alert, AlertDispatcher, MemoryTransport
+from .utils.custom_response import CustomResponse
+from .models import MediaBlob
+from .utils.media import ContentAddressedStorage, RangeNotSatisfiable, byte_range, collect_garbage, recount_references
+
+
+class MessageCatalogTest(SimpleTestCase):
+    def test_negotiation_honours_quality_and_regions(self):
+        self.assertEqual(negotiate_language('ru-RU,ru;q=0.9,en;q=0.8'), 'ru')
+        self.assertEqual(negotiate_language('de;q=1.0, uz;q=0.5, ru;q=0.7'), 'ru')
+        self.assertEqual(negotiate_language('uz-UZ'), 'uz')
+        self.assertEqual(negotiate_language('ru;q=0, de'), 'en')
+        self.assertEqual(negotiate_language(None), 'en')
+
+    def test_translations_share_ids_and_status_codes(self):
+        catalog = get_catalog()
+        english = catalog.get('NOT_FOUND', 'en')
+        uzbek = catalog.get('NOT_FOUND', 'uz')
+        self.assertEqual((uzbek.id, uzbek.status_code), (english.id, english.status_code))
+        self.assertNotEqual(uzbek.message, english.message)
+        self.assertEqual(catalog.get('UNKNOWN_KEY', 'ru').id, 'SUCCESS')
+
+    def test_envelope_is_localized(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_LANGUAGE='uz,en;q=0.5')
+        response = CustomResponse.not_found(request=request)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data, {'id': 'NOT_FOUND', 'message': 'Topilmadi'})
+
+
+class FlexibleCorsMiddlewareTest(SimpleTestCase):
+    def make_middleware(self):
+        from .middleware.cors_middleware import FlexibleCorsMiddleware
+
+        self.calls = 0
+
+        def view(request):
+            self.calls += 1
+            return HttpResponse('ok')
+
+        return FlexibleCorsMiddleware(view)
+
+    @override_settings(
+        CORS_ALLOWED_ORIGINS=['https://app.example.com'],
+        CORS_ALLOWED_ORIGIN_REGEXES=[r'^http://localhost:\d+$', re.compile(r'^https://\w+\.preview\.dev$')],
+        CORS_ALLOW_CREDENTIALS=True,
+    )
+    def test_origin_matching(self):
+        middleware = self.make_middleware()
+        for origin in ('https://app.example.com', 'http://localhost:3000', 'https://pr1.preview.dev'):
+            response = middleware(RequestFactory().get('/', HTTP_ORIGIN=origin))
+            self.assertEqual(response['Access-Control-Allow-Origin'], origin)
+            self.assertEqual(response['Access-Control-Allow-Credentials'], 'true')
+        response = middleware(RequestFactory().get('/', HTTP_ORIGIN='http://localhost:3000.evil.com'))
+        self.assertFalse(response.has_header('Access-Control-Allow-Origin'))
+        self.assertIn('Origin', response['Vary'])
+
+    @override_settings(CORS_ALLOWED_ORIGINS=['https://app.example.com'], CORS_ALLOWED_ORIGIN_REGEXES=[])
+    def test_preflight_is_answered_without_calling_the_view(self):
+        middleware = self.make_middleware()
+        response = middleware(RequestFactory().options(
+            '/api/v1/movies/', HTTP_ORIGIN='https://app.example.com', HTTP_ACCESS_CONTROL_REQUEST_METHOD='POST',
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertIn('POST', response['Access-Control-Allow-Methods'])
+        self.assertEqual(self.calls, 0)
+
+        rejected = middleware(RequestFactory().options(
+            '/api/v1/movies/', HTTP_ORIGIN='https://other.example.com', HTTP_ACCESS_CONTROL_REQUEST_METHOD='POST',
+        ))
+        self.assertFalse(rejected.has_header('Access-Control-Allow-Origin'))
+        self.assertEqual(self.calls, 0)
+
+
+class AlertDispatcherTest(SimpleTestCase):
+    def make_dispatcher(self, **kwargs):
+        self.now = 0.0
+        self.transport = MemoryTransport()
+        return AlertDispatcher(self.transport, clock=lambda: self.now, **kwargs)
+
+    def alert(self, name='OperationalError', where='MovieListView'):
+        return Alert(fingerprint=f'{name}|{where}', summary=f'{name} in {where}', text=f'{name} details')
+
+    def test_repeats_are_folded_into_one_digest(self):
+        dispatcher = self.make_dispatcher()
+        for _ in range(500):
+            dispatcher.process(self.alert())
+        dispatcher.process(self.alert('KeyError', 'GenreListView'))
+        self.assertEqual(self.transport.messages, ['OperationalError details', 'KeyError details'])
+
+        self.now = 60.0
+        dispatcher.flush()
+        self.assertEqual(self.transport.messages[-1], '500x OperationalError in MovieListView in last 60s')
+
+        dispatcher.process(self.alert())
+        self.assertEqual(self.transport.messages[-1], 'OperationalError details')
+
+    def test_rate_limit_moves_new_groups_to_the_digest(self):
+        dispatcher = self.make_dispatcher(max_per_window=1)
+        dispatcher.process(self.alert('A'))
+        dispatcher.process(self.alert('B'))
+        self.assertEqual(len(self.transport.messages), 1)
+        dispatcher.flush()
+        self.assertIn('1x B in MovieListView in last 60s', self.transport.messages[-1])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        dispatcher = self.make_dispatcher(queue_size=2)
+        dispatcher._ensure_worker = lambda: None
+        results = [dispatcher.submit(self.alert()) for _ in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertIn('3 alert(s) dropped', dispatcher.digest())
+
+    def test_worker_thread_delivers(self):
+        transport = MemoryTransport()
+        dispatcher = AlertDispatcher(transport, window=0.05)
+        dispatcher.submit(self.alert())
+        dispatcher.submit(self.alert())
+        deadline = time.monotonic() + 2
+        while len(transport.messages) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(transport.messages, ['OperationalError details', '2x OperationalError in MovieListView in last 0.05s'])
+
+
+class ExceptionHandlerTest(TestCase):
+    def setUp(self):
+        self.directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(METRICS_DIR=self.directory))
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.factory = APIRequestFactory()
+
+    def call(self, exc):
+        request = self.factory.get('/api/v1/movies/')
+        try:
+            raise exc
+        except Exception as raised:
+            return custom_exception_handler(raised, {'request': request})
+
+    def test_client_errors_skip_tracebacks_and_registry(self):
+        with mock.patch('apps.shared.exceptions.registry.traceback.format_exception') as format_exception:
+            response = self.call(NotFound())
+            method = self.call(MethodNotAllowed('PATCH'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(method.status_code, 405)
+        format_exception.assert_not_called()
+        self.assertEqual(registry.snapshot(), [])
+
+    def test_server_errors_are_aggregated_by_fingerprint(self):
+        def fail():
+            raise OperationalError('database is down')
+
+        for _ in range(3):
+            with self.assertLogs('apps.shared.exceptions.handler', 'ERROR'):
+                try:
+                    fail()
+                except OperationalError as exc:
+                    response = custom_exception_handler(exc, {'request': self.factory.get('/')})
+        self.assertEqual(response.status_code, 500)
+        [record] = registry.snapshot()
+        self.assertEqual(record['count'], 3)
+        self.assertEqual(record['exception'], 'django.db.utils.OperationalError')
+        self.assertIn('database is down', record['traceback'])
+        self.assertLessEqual(record['first_seen'], record['last_seen'])
+
+    def test_counts_of_all_processes_are_merged(self):
+        self.call(KeyError('boom'))
+        [record] = registry.snapshot()
+        fingerprint = record['fingerprint']
+        # Another worker saw the same error earlier and more recently
+        other = MmapDict(Path(self.directory) / 'errors_99999.db')
+        first, last = record['first_seen'].timestamp(), record['last_seen'].timestamp()
+        other.increment(f'count|{fingerprint}', 4)
+        other.set_many([(f'first|{fingerprint}', first - 60), (f'last|{fingerprint}', last + 60)])
+        other.close()
+        [merged] = registry.snapshot()
+        self.assertEqual(merged['count'], 5)
+        self.assertEqual(merged['first_seen'].timestamp(), first - 60)
+        self.assertEqual(merged['last_seen'].timestamp(), last + 60)
+        self.assertIn('KeyError', merged['traceback'])
+
+    def test_endpoint_is_staff_only(self):
+        self.call(KeyError('boom'))
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='ops', password='pass'))
+        self.assertEqual(client.get('/api/v1/ops/errors/').status_code, 403)
+
+        client.force_authenticate(User.objects.create_user(username='admin', password='pass', is_staff=True))
+        data = client.get('/api/v1/ops/errors/').json()['data']
+        self.assertEqual(data['total'], 1)
+        self.assertNotIn('traceback', data['results'][0])
+        data = client.get('/api/v1/ops/errors/', {'traceback': '1'}).json()['data']
+        self.assertIn('KeyError', data['results'][0]['traceback'])
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        override = override_settings(METRICS_DIR=self.directory.name, METRICS_TOKEN='scrape')
+        override.enable()
+        self.addCleanup(override.disable)
+        metrics.store.reset()
+        self.addCleanup(metrics.store.reset)
+
+    def test_requests_are_exposed_in_prometheus_format(self):
+        for _ in range(2):
+            self.client.get('/api/v1/movies/genres/')
+        body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').content.decode()
+        labels = 'route="movies:genre-list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', body)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', body)
+        self.assertIn('# TYPE db_queries_per_request histogram', body)
+
+    def test_endpoint_needs_the_token_outside_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        with self.settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            with self.settings(DEBUG=True):
+                self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('FOO123', 'BAR456'):
+            self.client.generic(method, '/api/v1/movies/genres/')
+        body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').content.decode()
+        self.assertIn('http_requests_total{route="movies:genre-list",method="OTHER",status="405"} 2', body)
+        self.assertNotIn('FOO123', body)
+
+    def test_files_of_all_processes_are_summed(self):
+        for pid, amount in ((101, 2), (102, 3)):
+            store = MmapDict(Path(self.directory.name) / f'metrics_{pid}.db')
+            for index in range(3000):
+                # Enough keys to force the file to grow past its initial size
+                store.increment(f'k{index}|x|', 1)
+            store.increment('http_requests_total|route="r",method="GET",status="200"|', amount)
+            store.close()
+        totals = metrics.collect()
+        self.assertEqual(totals['http_requests_total|route="r",method="GET",status="200"|'], 5)
+        self.assertEqual(totals['k2999|x|'], 2)
+
+    def test_recording_stays_in_microseconds(self):
+        metrics.observe_request('movies:movie-list', 'GET', 200, 0.01, 2048, 2, 0.001)
+        runs = 5000
+        started = time.perf_counter()
+        for _ in range(runs):
+            metrics.observe_request('movies:movie-list', 'GET', 200, 0.01, 2048, 2, 0.001)
+        self.assertLess((time.perf_counter() - started) / runs, 50e-6)
+
+
+class MediaViewTest(TestCase):
+    def setUp(self):
+        root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=root, MEDIA_ACCEL=''))
+        self.storage = ContentAddressedStorage(location=root)
+        self.name = self.storage.save('posters/harbor.jpg', ContentFile(b'0123456789'))
+        Path(root, 'posters', 'plain.jpg').write_bytes(b'plain')
+        Path(root, 'private.txt').write_bytes(b'secret')
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', **headers)
+
+    def test_hashed_files_are_immutable_and_revalidate(self):
+        response = self.get(self.name)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.get(self.name, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        plain = self.get('posters/plain.jpg')
+        self.assertNotIn('immutable', plain['Cache-Control'])
+        self.assertIn('max-age=3600', plain['Cache-Control'])
+
+    def test_ranges(self):
+        response = self.get(self.name, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(b''.join(self.get(self.name, HTTP_RANGE='bytes=-3').streaming_content), b'789')
+        self.assertEqual(self.get(self.name, HTTP_RANGE='bytes=10-').status_code, 416)
+        # A stale If-Range gets the whole (new) file
+        stale = self.get(self.name, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+
+        self.assertEqual(byte_range('bytes=0-0,5-6', 10), None)
+        self.assertEqual(byte_range('bytes=4-', 10), (4, 9))
+        with self.assertRaises(RangeNotSatisfiable):
+            byte_range('bytes=5-4', 10)
+
+    def test_only_served_folders_are_reachable(self):
+        for name in ('private.txt', 'posters/../private.txt', 'posters/.hidden', 'posters/missing.jpg', 'posters'):
+            with self.subTest(name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+    def test_transfer_is_handed_to_the_proxy(self):
+        with override_settings(MEDIA_ACCEL='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.get(self.name)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+        self.assertIn('immutable', response['Cache-Control'])
+        with override_settings(MEDIA_ACCEL='x-sendfile'):
+            response = self.get(self.name)
+        self.assertEqual(response['X-Sendfile'], self.storage.path(self.name))
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.root = self.enterContext(tempfile.TemporaryDirectory())
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def test_identical_content_is_stored_once_and_counted(self):
+        name = self.storage.save('posters/harbor.JPG', ContentFile(b'poster'))
+        self.assertRegex(name, r'^posters/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.jpg$')
+        self.assertEqual(self.storage.save('posters/copy.jpg', ContentFile(b'poster')), name)
+        self.assertNotEqual(self.storage.save('posters/harbor.jpg', ContentFile(b'other')), name)
+        self.assertEqual(MediaBlob.objects.get(name=name).refs, 2)
+
+        self.storage.delete(name)
+        self.storage.delete(name)
+        blob = MediaBlob.objects.get(name=name)
+        self.assertEqual(blob.refs, 0)
+        self.assertIsNotNone(blob.released_at)
+        # Deleting drops references only; the bytes stay until collected
+        self.assertTrue(self.storage.exists(name))
+
+    def test_collection_honours_the_grace_period(self):
+        kept = self.storage.save('posters/a.jpg', ContentFile(b'kept'))
+        released = self.storage.save('posters/b.jpg', ContentFile(b'released'))
+        self.storage.delete(released)
+        orphan = 'posters/00/00/' + '0' * 64 + '.jpg'
+        Path(self.root, orphan).parent.mkdir(parents=True)
+        Path(self.root, orphan).write_bytes(b'rolled back')
+
+        self.assertEqual(collect_garbage(self.storage, timedelta(hours=1)), (0, 0))
+        self.assertEqual(collect_garbage(self.storage, timedelta(0), dry_run=True), (2, 19))
+        self.assertTrue(self.storage.exists(released))
+        self.assertEqual(collect_garbage(self.storage, timedelta(0)), (2, 19))
+        self.assertFalse(self.storage.exists(released) or self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(kept))
+        self.assertEqual(list(MediaBlob.objects.values_list('name', flat=True)), [kept])
+
+    def test_recount_drops_references_no_row_holds(self):
+        name = self.storage.save('posters/a.jpg', ContentFile(b'poster'))
+        with override_settings(MEDIA_ROOT=self.root):
+            self.assertEqual(recount_references(self.storage), 1)
+        self.assertEqual(MediaBlob.objects.get(name=name).refs, 0)
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(username='critic', password='pass')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def user_queries(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if '"auth_user"' in query['sql']]
+
+    def test_user_is_loaded_lazily_and_cached(self):
+        client = self.client_for(self.user)
+        self.assertEqual(self.user_queries(client, '/api/v1/movies/genres/'), [])
+        self.assertEqual(len(self.user_queries(client, '/api/v1/auth/profile/')), 1)
+        self.assertEqual(self.user_queries(client, '/api/v1/auth/profile/'), [])
+        self.assertEqual(client.get('/api/v1/auth/profile/').json()['data']['username'], 'critic')
+
+    def test_saves_invalidate_and_password_changes_revoke(self):
+        client = self.client_for(self.user)
+        client.get('/api/v1/auth/profile/')
+        self.user.email = 'critic@example.com'
+        self.user.save()
+        self.assertEqual(client.get('/api/v1/auth/profile/').json()['data']['email'], 'critic@example.com')
+
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertEqual(client.get('/api/v1/auth/profile/').status_code, 401)
+        # Reads that never touch the user still go through
+        self.assertEqual(client.get('/api/v1/movies/genres/').status_code, 200)
+        self.assertEqual(self.client_for(self.user).get('/api/v1/auth/profile/').status_code, 200)
+
+    def test_deactivated_users_are_turned_away(self):
+        client = self.client_for(self.user)
+        client.get('/api/v1/auth/profile/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(client.get('/api/v1/auth/profile/').status_code, 401)
+
+    def test_entries_expire(self):
+        now = [0.0]
+        cache = UserCache(ttl=30, clock=lambda: now[0])
+        cache.put('1', 'v1', self.user)
+        self.assertEqual(cache.get('1', 'v1').username, 'critic')
+        self.assertIsNot(cache.get('1', 'v1'), self.user)
+        self.assertIsNone(cache.get('1', 'v2'))
+        now[0] = 31
+        self.assertIsNone(cache.get('1', 'v1'))
@@ -0,0 +1,172 @@
+"""
+Bounded, deduplicating alert dispatcher.
+
+Producers (request threads) only ``put_nowait`` onto a bounded queue; one
+long-lived worker per process talks to the transport. Alerts are grouped
+by fingerprint (exception type + innermost frame): the first alert of a
+group in a window is sent in full, repeats are counted and reported in
+one digest per window ("500x OperationalError in MovieListView in last
+60s"). When the queue is full alerts are dropped and counted, so an
+incident can never pile up threads or memory.
+"""
+import hashlib
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Alert:
+    fingerprint: str
+    summary: str
+    text: str
+
+
+def fingerprint_exception(exc: BaseException, label: str = '') -> str:
+    """Exception type plus innermost frame; line-level, so distinct bugs stay distinct."""
+    frames = traceback.extract_tb(exc.__traceback__) if exc.__traceback__ else []
+    top = f'{frames[-1].filename}:{frames[-1].lineno}:{frames[-1].name}' if frames else ''
+    raw = '|'.join([type(exc).__module__, type(exc).__qualname__, top, label])
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def fingerprint_text(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class MemoryTransport:
+    """Collects messages in a list; local stand-in for tests and development."""
+
+    def __init__(self):
+        self.messages: List[str] = []
+
+    def send(self, text: str) -> None:
+        self.messages.append(text)
+
+
+@dataclass
+class _Group:
+    summary: str
+    count: int = 0
+    sent: bool = False
+
+
+class AlertDispatcher:
+    """
+    Deduplicate and rate-limit alerts, delivering them from a single worker thread.
+
+    ``transport`` is any object with ``send(text)``. ``max_per_window``
+    caps the full alerts sent per window; everything beyond it (and every
+    repeat) only shows up in the window's digest.
+    """
+
+    def __init__(
+            self,
+            transport,
+            queue_size: int = 1000,
+            window: float = 60.0,
+            max_per_window: int = 10,
+            clock: Callable[[], float] = time.monotonic
+    ):
+        self.transport = transport
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.window = window
+        self.max_per_window = max_per_window
+        self.clock = clock
+        self.dropped = 0
+        self._groups: Dict[str, _Group] = {}
+        self._sent_in_window = 0
+        self._window_start = clock()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+
+    # Producer side
+
+    def submit(self, alert: Alert) -> bool:
+        """Queue an alert without blocking; returns False when it had to be dropped."""
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(alert)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _ensure_worker(self) -> None:
+        # Forked workers (gunicorn) inherit the object but not the thread
+        if self._worker is not None and self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+            self._worker.start()
+
+    # Worker side
+
+    def _run(self) -> None:
+        while True:
+            timeout = max(0.0, self._window_start + self.window - self.clock())
+            try:
+                alert = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                alert = None
+            try:
+                if alert is not None:
+                    self.process(alert)
+                if self.clock() >= self._window_start + self.window:
+                    self.flush()
+            except Exception:
+                logger.exception('Alert dispatcher failed')
+
+    def process(self, alert: Alert) -> None:
+        """Send the first alert of a group in full (within the rate limit), count the rest."""
+        group = self._groups.get(alert.fingerprint)
+        if group is None:
+            group = self._groups[alert.fingerprint] = _Group(summary=alert.summary)
+        group.count += 1
+        if group.sent or self._sent_in_window >= self.max_per_window:
+            return
+        group.sent = True
+        self._sent_in_window += 1
+        self._deliver(alert.text)
+
+    def digest(self) -> Optional[str]:
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        lines = [
+            f'{group.count}x {group.summary}'
+            for group in sorted(self._groups.values(), key=lambda group: -group.count)
+            if group.count > 1 or not group.sent
+        ]
+        if dropped:
+            lines.append(f'{dropped} alert(s) dropped, queue full')
+        if not lines:
+            return None
+        window = f'{self.window:g}s'
+        return '\n'.join(f'{line} in last {window}' for line in lines)
+
+    def flush(self) -> None:
+        """Close the current window: send its digest and start counting afresh."""
+        text = self.digest()
+        self._groups = {}
+        self._sent_in_window = 0
+        self._window_start = self.clock()
+        if text:
+            self._deliver(text)
+
+    def _deliver(self, text: str) -> None:
+        try:
+            self.transport.send(text)
+        except Exception as error:
+            logger.error(f"Failed to deliver alert: {error}")
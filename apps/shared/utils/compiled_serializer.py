@@ -0,0 +1,288 @@
+"""
+Read-only serializers compiled from DRF ModelSerializers.
+
+DRF walks a tree of Field objects for every row, resolving each attribute
+through ``get_attribute`` on a model instance. On large list pages that
+machinery (plus instantiating every model and prefetched relation) costs
+more than the queries. A compiled serializer inspects the ModelSerializer's
+fields once, reads ``values()`` rows instead of instances and applies
+per-field converters that mirror DRF's ``to_representation``, so the
+rendered JSON is byte-identical to the ModelSerializer's.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+# field name -> (value columns, function of the row)
+Computed = Dict[str, Tuple[Tuple[str, ...], Callable[[dict], Any]]]
+# field name -> (value columns, function of (all rows, context) returning {pk: value} for every row)
+Loaded = Dict[str, Tuple[Tuple[str, ...], Callable[[List[dict], dict], Dict[Any, Any]]]]
+
+# DRF fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+def _datetime_converter(field: serializers.DateTimeField) -> Optional[Callable]:
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None:
+        return None
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    fallback = field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.tzinfo is None:
+            return fallback(value)
+        text = value.astimezone(field_timezone).isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        return text
+
+    return convert
+
+
+def _date_converter(field: serializers.DateField) -> Optional[Callable]:
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601:
+        return field.to_representation
+    return lambda value: value if isinstance(value, str) else value.isoformat()
+
+
+def _file_converter(field: serializers.FileField, model_field, request) -> Callable:
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+    storage = model_field.storage
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+
+    return convert
+
+
+class CompiledSerializer:
+    """
+    Serialize ``values()`` rows the way ``serializer_class`` serializes instances.
+
+    Subclasses set ``serializer_class`` and describe what cannot be read
+    from a column: ``computed`` maps method or string-related fields to
+    the columns they need and a function of the row, ``loaded`` does the
+    same for fields read from other tables with a function of all rows
+    (one query per page), and ``nested`` maps many-to-many fields to the
+    compiled serializer of their child.
+    Instances mimic the serializer call signature, so they can stand in
+    wherever a list view passes ``(rows, many=True, context=...)``.
+    """
+    serializer_class = None
+    computed: Computed = {}
+    loaded: Loaded = {}
+    nested: Dict[str, type] = {}
+
+    _plans: Dict[type, tuple] = {}
+
+    def __init__(self, instance=None, many: bool = False, context: Optional[dict] = None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    # Compilation (once per class)
+
+    @classmethod
+    def model(cls):
+        return cls.serializer_class.Meta.model
+
+    @classmethod
+    def plan(cls):
+        """``(fields, columns)``: one ``(name, kind, source, field)`` per readable field."""
+        if cls not in CompiledSerializer._plans:
+            CompiledSerializer._plans[cls] = cls._compile()
+        return CompiledSerializer._plans[cls]
+
+    @classmethod
+    def _compile(cls):
+        model = cls.model()
+        fields = []
+        columns = [model._meta.pk.attname]
+        for field in cls.serializer_class().fields.values():
+            if field.write_only:
+                continue
+            name = field.field_name
+            if name in cls.computed:
+                needed, _ = cls.computed[name]
+                fields.append((name, 'computed', None, field))
+                columns.extend(needed)
+            elif name in cls.loaded:
+                needed, _ = cls.loaded[name]
+                fields.append((name, 'loaded', None, field))
+                columns.extend(needed)
+            elif isinstance(field, serializers.ListSerializer):
+                if name not in cls.nested:
+                    raise ImproperlyConfigured(f'{cls.__name__}: no compiled serializer for nested field {name!r}')
+                relation = model._meta.get_field(field.source)
+                if not isinstance(relation, models.ManyToManyField):
+                    raise ImproperlyConfigured(f'{cls.__name__}: {name!r} must be a forward many-to-many field')
+                fields.append((name, 'nested', field.source, field))
+            elif isinstance(field, serializers.RelatedField) and not isinstance(
+                    field, serializers.PrimaryKeyRelatedField):
+                raise ImproperlyConfigured(f'{cls.__name__}: declare {name!r} in `computed`')
+            elif isinstance(field, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(f'{cls.__name__}: declare {name!r} in `computed`')
+            else:
+                fields.append((name, 'column', field.source, field))
+                columns.append(field.source)
+        return fields, list(dict.fromkeys(columns))
+
+    @classmethod
+    def columns(cls) -> List[str]:
+        return cls.plan()[1]
+
+    @classmethod
+    def rows(cls, queryset):
+        """The ``values()`` queryset the compiled serializer reads, keeping filters and ordering."""
+        return queryset.prefetch_related(None).values(*cls.columns())
+
+    # Binding (once per call: converters depend on the request and timezone)
+
+    def _converter(self, field, source) -> Optional[Callable]:
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return None if field.pk_field is None else field.pk_field.to_representation
+        if isinstance(field, serializers.DateTimeField):
+            return _datetime_converter(field)
+        if isinstance(field, serializers.DateField):
+            return _date_converter(field)
+        if isinstance(field, serializers.UUIDField):
+            return str if field.uuid_format == 'hex_verbose' else field.to_representation
+        if isinstance(field, serializers.FileField):
+            return _file_converter(field, self.model()._meta.get_field(source), self.context.get('request'))
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+        return field.to_representation
+
+    def bind(self, prefix: str = ''):
+        """Accessors ``(name, key, converter, computed)`` for rows whose columns carry ``prefix``."""
+        accessors = []
+        nested = []
+        for name, kind, source, field in self.plan()[0]:
+            if kind == 'computed':
+                _, function = self.computed[name]
+                if prefix:
+                    function = self._prefixed(function, prefix, self.computed[name][0])
+                accessors.append((name, None, None, function))
+            elif kind in ('nested', 'loaded'):
+                # Filled in by ``serialize`` once the rows are known
+                accessors.append((name, None, None, None))
+                nested.append((name, source))
+            else:
+                accessors.append((name, prefix + source, self._converter(field, source), None))
+        return accessors, nested
+
+    @staticmethod
+    def _prefixed(function, prefix, needed):
+        return lambda row: function({column: row[prefix + column] for column in needed})
+
+    # Serialization
+
+    def _load_nested(self, name: str, source: str, owner_ids: list) -> Dict[Any, list]:
+        """Children of every owner in one query on the through table, in the child's default ordering."""
+        relation = self.model()._meta.get_field(source)
+        child_class = self.nested[name]
+        owner = relation.m2m_field_name()
+        target = relation.m2m_reverse_field_name()
+        prefix = f'{target}__'
+        ordering = [
+            ('-' if order.startswith('-') else '') + prefix + order.lstrip('-')
+            for order in child_class.model()._meta.ordering
+        ]
+        rows = (
+            relation.remote_field.through.objects
+            .filter(**{f'{owner}__in': owner_ids})
+            .values(owner, *[prefix + column for column in child_class.columns()])
+            .order_by(*ordering)
+        )
+        child = child_class(context=self.context)
+        accessors, child_nested = child.bind(prefix)
+        if child_nested:
+            raise ImproperlyConfigured(f'{child_class.__name__}: nested and loaded fields are only supported one level deep')
+        grouped: Dict[Any, list] = {owner_id: [] for owner_id in owner_ids}
+        for row in rows:
+            grouped[row[owner]].append(self._serialize_row(row, accessors))
+        return grouped
+
+    def _load_related(self, name: str, source: Optional[str], rows: List[dict], owner_ids: list) -> Dict[Any, Any]:
+        if source is None:
+            _, function = self.loaded[name]
+            return function(rows, self.context)
+        return self._load_nested(name, source, owner_ids)
+
+    @staticmethod
+    def _serialize_row(row: dict, accessors) -> dict:
+        data = {}
+        for name, key, convert, function in accessors:
+            if function is not None:
+                data[name] = function(row)
+                continue
+            value = row[key]
+            data[name] = value if value is None or convert is None else convert(value)
+        return data
+
+    def serialize(self, rows: Iterable[dict]) -> List[dict]:
+        rows = list(rows)
+        accessors, nested = self.bind()
+        if nested:
+            pk = self.model()._meta.pk.attname
+            owner_ids = [row[pk] for row in rows]
+            loaded = {
+                name: self._load_related(name, source, rows, owner_ids) if owner_ids else {}
+                for name, source in nested
+            }
+            accessors = [
+                (accessor[0], None, None, self._children_getter(loaded[accessor[0]], pk))
+                if accessor[0] in loaded else accessor
+                for accessor in accessors
+            ]
+        serialize_row = self._serialize_row
+        return [serialize_row(row, accessors) for row in rows]
+
+    @staticmethod
+    def _children_getter(children: Dict[Any, list], pk: str):
+        return lambda row: children[row[pk]]
+
+    @property
+    def data(self):
+        if self.many:
+            return self.serialize(self.instance)
+        return self.serialize([self.instance])[0]
+
+
+class CompiledListMixin:
+    """
+    List views: paginate ``values()`` rows and serialize them with ``compiled_serializer_class``.
+
+    ``serializer_class`` stays the regular ModelSerializer for everything
+    else (metadata, writes, browsable API).
+    """
+    compiled_serializer_class = None
+
+    def get_list_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.compiled_serializer_class is None:
+            return queryset
+        return self.compiled_serializer_class.rows(queryset)
+
+    def get_list_serializer_class(self):
+        return self.compiled_serializer_class or self.get_serializer_class()
@@ -0,0 +1,102 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304) for API views.
+"""
+import hashlib
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .response_cache import request_language
+
+Validators = Tuple[str, Optional[int]]
+
+
+def build_validators(request, parts: Iterable, timestamps: Iterable[Optional[datetime]]) -> Validators:
+    """
+    Weak ETag over the request's representation key and the given state, plus Last-Modified.
+
+    ``parts`` should capture everything that changes the payload besides the
+    timestamps (row counts, ids); path, query string and language are
+    always mixed in.
+    """
+    latest = max((ts for ts in timestamps if ts is not None), default=None)
+    digest = hashlib.md5(usedforsecurity=False)
+    for value in (request.get_full_path(), request_language(request), latest, *parts):
+        digest.update(str(value).encode())
+        digest.update(b'\0')
+    etag = 'W/' + quote_etag(digest.hexdigest())
+    last_modified = int(latest.timestamp()) if latest is not None else None
+    return etag, last_modified
+
+
+def queryset_state(queryset, **extra_aggregates):
+    """Row count and newest ``updated_at`` of a queryset (plus any extra aggregates) in one query."""
+    state = queryset.order_by().aggregate(
+        _total=Count('pk', distinct=True),
+        _latest=Max('updated_at'),
+        **extra_aggregates
+    )
+    total = state.pop('_total')
+    timestamps = [state.pop('_latest'), *state.values()]
+    return [total], timestamps
+
+
+def has_conditional_headers(request) -> bool:
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` / ``If-Modified-Since`` with 304 before any serialization.
+
+    Views implement ``get_validator_state`` returning ``(parts, timestamps)``
+    from one cheap aggregate query, or ``None`` when the object does not
+    exist. Validators are only computed when the client sends conditional
+    headers or when a fresh 200 response needs them, so cached responses
+    (which keep their ETag) cost nothing extra.
+    """
+    _validators: Optional[Validators] = None
+
+    def get_validator_state(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+    def get_validators(self, request, *args, **kwargs) -> Optional[Validators]:
+        if self._validators is None:
+            state = self.get_validator_state(request, *args, **kwargs)
+            if state is None:
+                return None
+            parts, timestamps = state
+            self._validators = build_validators(request, parts, timestamps)
+        return self._validators
+
+    def dispatch(self, request, *args, **kwargs):
+        self._validators = None
+        if request.method in ('GET', 'HEAD') and has_conditional_headers(request):
+            # Filter backends read self.request, which DRF only sets inside dispatch
+            self.args, self.kwargs = args, kwargs
+            self.request = self.initialize_request(request, *args, **kwargs)
+            validators = self.get_validators(self.request, *args, **kwargs)
+            if validators is not None:
+                etag, last_modified = validators
+                not_modified = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified
+                )
+                if not_modified is not None:
+                    if not_modified.status_code == 304:
+                        not_modified['ETag'] = etag
+                    return not_modified
+        return super().dispatch(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200 and not response.has_header('ETag'):
+            validators = self.get_validators(request, *args, **kwargs)
+            if validators is not None:
+                etag, last_modified = validators
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+        return response
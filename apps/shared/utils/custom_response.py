@@ -3,10 +3,13 @@ Custom response utilities for consistent API responses.
 """
 import logging
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Dict, Any, Optional, Union
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from apps.shared.i18n import Message, get_catalog, negotiate_language
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,40 +23,23 @@ class ResponseBody:
         """Get language from request."""
         if self.request and hasattr(self.request, 'lang'):
             return self.request.lang
-        if self.request and hasattr(self.request, 'headers'):
-            accept_lang = self.request.headers.get('Accept-Language', 'en')
-            lang = accept_lang.split(';')[0].split(',')[0].strip()
-            return lang
-        return 'en'
+        if self.request is not None:
+            return negotiate_language(self.request.META.get('HTTP_ACCEPT_LANGUAGE'))
+        return get_catalog().default_language
+
+    @cached_property
+    def message(self) -> Message:
+        """Catalog entry for the key, resolved once per response."""
+        return get_catalog().get(self.message_key, self.get_language())
 
     def to_dict(self, **kwargs) -> Dict[str, Any]:
         """Convert to dictionary."""
-        lang = self.get_language()
-        message = self._get_message(self.message_key, lang)
-        response_body = {
-            "id": message.get("id", "SUCCESS"),
-            "message": message.get("message", "Success"),
-            **kwargs
-        }
-        return response_body
+        message = self.message
+        return {"id": message.id, "message": message.message, **kwargs}
 
     def get_status_code(self) -> int:
         """Get status code for message."""
-        lang = self.get_language()
-        message = self._get_message(self.message_key, lang)
-        return message.get("status_code", 200)
-
-    def _get_message(self, key: str, lang: str) -> Dict[str, Any]:
-        """Get message detail."""
-        messages = {
-            "SUCCESS_MESSAGE": {"id": "SUCCESS", "message": "Success", "status_code": 200},
-            "NOT_FOUND": {"id": "NOT_FOUND", "message": "Not found", "status_code": 404},
-            "UNAUTHORIZED": {"id": "UNAUTHORIZED", "message": "Unauthorized", "status_code": 401},
-            "PERMISSION_DENIED": {"id": "PERMISSION_DENIED", "message": "Permission denied", "status_code": 403},
-            "VALIDATION_ERROR": {"id": "VALIDATION_ERROR", "message": "Validation error", "status_code": 400},
-            "INTERNAL_SERVER_ERROR": {"id": "INTERNAL_SERVER_ERROR", "message": "Internal server error", "status_code": 500},
-        }
-        return messages.get(key, messages["SUCCESS_MESSAGE"])
+        return self.message.status_code
 
 
 class CustomResponse:
@@ -170,6 +156,22 @@ class CustomResponse:
             **kwargs
         )
 
+    @staticmethod
+    def internal_error(
+            message_key: str = "INTERNAL_SERVER_ERROR",
+            request: Request = None,
+            context: Dict[str, Any] = None,
+            **kwargs
+    ) -> Response:
+        """Create internal server error response."""
+        return CustomResponse.error(
+            message_key=message_key,
+            request=request,
+            context=context,
+            status_code=500,
+            **kwargs
+        )
+
 
 
 
@@ -0,0 +1,338 @@
+"""
+Media storage and delivery.
+
+Uploads are stored under the SHA-256 of their content (deduplicated and
+reference counted, see ``ContentAddressedStorage``), so the bytes behind
+a URL never change and responses can be cached for a year as ``immutable``.
+The view only serves files under ``MEDIA_SERVED_PREFIXES``. With
+``MEDIA_ACCEL`` set it answers with headers only and the front proxy
+sends the file (nginx ``X-Accel-Redirect`` to an ``internal`` location
+aliasing ``MEDIA_ROOT``, or ``X-Sendfile`` for Apache/lighttpd);
+otherwise it streams a ``FileResponse`` with single-range support.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils import timezone
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from apps.shared.models import MediaBlob
+
+# Hashed names from before content addressing: <name>.<16 hex>[_<7 chars>].<ext>
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{16}(?:_[A-Za-z0-9]{7})?(?:\.[A-Za-z0-9]+)?$')
+CONTENT_ADDRESSED_RE = re.compile(r'^[0-9a-f]{64}(?:\.[A-Za-z0-9]+)?$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+GC_BATCH_SIZE = 1000
+
+
+def content_hash(content) -> str:
+    """Hex SHA-256 of a file's bytes, read in chunks; the file is rewound afterwards."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_addressed(name: str) -> bool:
+    return bool(CONTENT_ADDRESSED_RE.match(posixpath.basename(name)))
+
+
+def is_content_hashed(name: str) -> bool:
+    return is_content_addressed(name) or bool(HASHED_NAME_RE.search(posixpath.basename(name)))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores files at ``<folder>/<h[:2]>/<h[2:4]>/<sha256>.<ext>``.
+
+    Identical uploads share one file and ``MediaBlob`` counts the fields
+    referencing it: ``save`` adds a reference, ``delete`` drops one. Files
+    are only removed by ``collect_garbage`` after staying unreferenced
+    for a grace period, so a concurrent save of the same bytes never
+    loses its file.
+    """
+
+    def content_name(self, name: str, content) -> str:
+        digest = content_hash(content)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(posixpath.dirname(name), digest[:2], digest[2:4], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        validate_file_name(name, allow_relative_path=True)
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(f'Storage name {name!r} is longer than {max_length} characters')
+
+        with transaction.atomic():
+            # The row lock serializes saves and collection of the same content
+            blob, _ = MediaBlob.objects.select_for_update().get_or_create(name=name, defaults={'size': content.size})
+            MediaBlob.objects.filter(pk=blob.pk).update(refs=F('refs') + 1, released_at=None)
+            if not self.exists(name):
+                self._save(name, content)
+        return name
+
+    def delete(self, name):
+        """Drop one reference; files saved before content addressing are deleted outright."""
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        if not is_content_addressed(name):
+            return super().delete(name)
+        MediaBlob.objects.filter(name=name, refs__gt=0).update(
+            refs=F('refs') - 1,
+            released_at=Case(When(refs=1, then=Value(timezone.now())), default=F('released_at')),
+        )
+
+    def purge(self, name):
+        """Remove the file itself, whatever references it."""
+        super().delete(name)
+
+
+def media_storage() -> ContentAddressedStorage:
+    """Storage for uploaded media; a callable keeps the class out of migrations."""
+    return ContentAddressedStorage()
+
+
+# Garbage collection
+
+def referenced_names() -> Counter:
+    """How many rows reference each file, over every FileField using content-addressed storage."""
+    counts = Counter()
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if not isinstance(field, models.FileField) or not isinstance(field.storage, ContentAddressedStorage):
+                continue
+            rows = (
+                model._base_manager.exclude(**{field.attname: ''})
+                .exclude(**{f'{field.attname}__isnull': True})
+                .values_list(field.attname)
+                .annotate(total=Count('pk'))
+                .order_by()
+            )
+            counts.update(dict(rows))
+    return counts
+
+
+def recount_references(storage: ContentAddressedStorage) -> int:
+    """Repair ``MediaBlob.refs`` from the rows that actually reference each file; returns the blobs changed."""
+    counts = referenced_names()
+    changed = 0
+    now = timezone.now()
+    known = set()
+    for pk, name, refs in MediaBlob.objects.values_list('pk', 'name', 'refs').iterator():
+        known.add(name)
+        actual = counts.get(name, 0)
+        if refs != actual:
+            MediaBlob.objects.filter(pk=pk).update(refs=actual, released_at=None if actual else now)
+            changed += 1
+    missing = [
+        MediaBlob(name=name, size=storage.size(name), refs=refs)
+        for name, refs in counts.items()
+        if name not in known and is_content_addressed(name) and storage.exists(name)
+    ]
+    MediaBlob.objects.bulk_create(missing, ignore_conflicts=True)
+    return changed + len(missing)
+
+
+def _stored_files(storage: ContentAddressedStorage) -> Iterator[Tuple[str, float, int]]:
+    """``(name, mtime, size)`` of every file in the content-addressed layout."""
+    root = storage.location
+    for directory, _, files in os.walk(root):
+        for filename in files:
+            if CONTENT_ADDRESSED_RE.match(filename):
+                path = os.path.join(directory, filename)
+                status = os.stat(path)
+                name = os.path.relpath(path, root).replace(os.sep, '/')
+                yield name, status.st_mtime, status.st_size
+
+
+def collect_garbage(storage: ContentAddressedStorage, grace: timedelta, dry_run: bool = False) -> Tuple[int, int]:
+    """
+    Delete files unreferenced for longer than ``grace``, and files older
+    than that without any blob (their save rolled back). Returns
+    ``(files, bytes)`` removed, or that would be with ``dry_run``.
+    """
+    cutoff = timezone.now() - grace
+    removed = freed = 0
+    released = MediaBlob.objects.filter(refs=0, released_at__lt=cutoff).values_list('pk', flat=True)
+    for pk in list(released.iterator()):
+        with transaction.atomic():
+            # A save may have taken a new reference since
+            blob = MediaBlob.objects.select_for_update().filter(pk=pk, refs=0).first()
+            if blob is None:
+                continue
+            if not dry_run:
+                storage.purge(blob.name)
+                blob.delete()
+        removed += 1
+        freed += blob.size
+
+    cutoff_timestamp = cutoff.timestamp()
+    old_files = (entry for entry in _stored_files(storage) if entry[1] < cutoff_timestamp)
+    while True:
+        batch = list(islice(old_files, GC_BATCH_SIZE))
+        if not batch:
+            break
+        known = set(MediaBlob.objects.filter(name__in=[name for name, _, _ in batch]).values_list('name', flat=True))
+        for name, _, size in batch:
+            if name in known:
+                continue
+            if not dry_run:
+                storage.purge(name)
+            removed += 1
+            freed += size
+    return removed, freed
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    ``(start, end)`` (inclusive) of a single-range ``Range`` header, or None
+    to send the whole file (no header, multiple ranges or another unit).
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class _FileRange:
+    """Read-only view of ``length`` bytes of ``file`` from ``start``.
+
+    No ``fileno``: a WSGI file wrapper would sendfile() the rest of the file.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _is_served(name: str) -> bool:
+    parts = name.split('/')
+    if any(part.startswith('.') or not part for part in parts):
+        return False
+    return any(name.startswith(prefix) for prefix in settings.MEDIA_SERVED_PREFIXES)
+
+
+def _range_is_current(request, etag: str, mtime: int) -> bool:
+    """Whether ``If-Range`` (if any) still names this version of the file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def serve_media(request, name: str) -> HttpResponse:
+    """Response for the media file ``name`` (relative to ``MEDIA_ROOT``); 404 outside the served folders."""
+    if not _is_served(name):
+        raise Http404('Not found')
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+        status = os.stat(path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404('Not found')
+    if not stat.S_ISREG(status.st_mode):
+        raise Http404('Not found')
+
+    mtime = int(status.st_mtime)
+    etag = quote_etag(f'{status.st_mtime_ns:x}-{status.st_size:x}')
+    response = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if response is None:
+        response = _transfer(request, name, path, status.st_size, etag, mtime)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    if is_content_hashed(name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
+
+
+def _transfer(request, name: str, path: str, size: int, etag: str, mtime: int) -> HttpResponse:
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    accel = settings.MEDIA_ACCEL
+    if accel == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+        return response
+    if accel == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+
+    requested = None
+    if 'HTTP_RANGE' in request.META and _range_is_current(request, etag, mtime):
+        try:
+            requested = byte_range(request.META['HTTP_RANGE'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = open(path, 'rb')
+    if requested is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = requested
+        response = FileResponse(_FileRange(file, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,190 @@
+"""
+Pagination classes shared by the API views.
+"""
+import base64
+import json
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# (field name, descending)
+Ordering = List[Tuple[str, bool]]
+
+
+def keyset_filter(ordering: Ordering, position: Sequence[Any], after: bool = True) -> Q:
+    """
+    Rows strictly after (or before) ``position`` in ``ordering``.
+
+    For ``[('created_at', True), ('id', True)]`` this expands to
+    ``created_at < v0 OR (created_at = v0 AND id < v1)``, which the matching
+    composite index answers with a single range scan.
+    """
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(ordering, position):
+        lookup = 'lt' if descending == after else 'gt'
+        condition |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class CatalogPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    Passing ``?cursor=`` (empty for the first page) switches to keyset
+    pagination over the view's ordering plus ``id`` as a tie-breaker: no
+    ``COUNT(*)`` and no ``OFFSET``, so deep pages cost the same as the first.
+    Views declare ``keyset_fields`` (orderings allowed in cursor mode) and
+    ``keyset_default`` (used when the requested ordering is not allowed).
+    ``?page_size=`` is honoured in both modes but capped at ``max_page_size``.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.keyset = False
+        self.ordering: Ordering = []
+
+    def is_keyset_request(self, request) -> bool:
+        return self.cursor_query_param in request.query_params
+
+    # Cursor encoding
+
+    def encode_cursor(self, position: Sequence[Any], backwards: bool = False) -> str:
+        payload = {'p': [self._encode_value(value) for value in position]}
+        if backwards:
+            payload['b'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, request) -> Optional[Tuple[list, bool]]:
+        encoded = request.query_params.get(self.cursor_query_param, '')
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            position = payload['p']
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+            return position, bool(payload.get('b'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _encode_value(value):
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    def _decode_position(self, model, position: list) -> list:
+        values = []
+        for (field, _), value in zip(self.ordering, position):
+            try:
+                values.append(model._meta.get_field(field).to_python(value))
+            except Exception:
+                # Annotations such as search rank are plain numbers
+                values.append(value)
+        return values
+
+    # Ordering
+
+    def get_keyset_ordering(self, queryset, view) -> Ordering:
+        allowed = getattr(view, 'keyset_fields', ('created_at',))
+        default = getattr(view, 'keyset_default', '-created_at')
+        if hasattr(queryset, 'keyset_ordering'):
+            return queryset.keyset_ordering
+        requested = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        first = requested[0] if requested else default
+        if first.lstrip('-') not in allowed:
+            first = default
+        descending = first.startswith('-')
+        return [(first.lstrip('-'), descending), ('id', descending)]
+
+    def position_of(self, obj) -> list:
+        if isinstance(obj, dict):
+            # values() rows read by compiled serializers
+            return [obj[field] for field, _ in self.ordering]
+        return [obj.pk if field == 'id' else getattr(obj, field) for field, _ in self.ordering]
+
+    # Pagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.is_keyset_request(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_keyset_ordering(queryset, view)
+        cursor = self.decode_cursor(request)
+
+        position, backwards = (None, False) if cursor is None else cursor
+        if position is not None and hasattr(queryset, 'model'):
+            position = self._decode_position(queryset.model, position)
+
+        if hasattr(queryset, 'keyset_slice'):
+            rows = queryset.keyset_slice(position, backwards, self.page_size + 1)
+        else:
+            ordered = queryset.order_by(
+                *[('-' if descending else '') + field for field, descending in self.ordering]
+            )
+            if position is not None:
+                ordered = ordered.filter(keyset_filter(self.ordering, position, after=not backwards))
+            if backwards:
+                ordered = ordered.reverse()
+            rows = list(ordered[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not backwards else True
+        self.has_previous = position is not None if not backwards else has_more
+        self.page_rows = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self._cursor_link(self.position_of(self.page_rows[-1]))
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self._cursor_link(self.position_of(self.page_rows[0]), backwards=True)
+
+    def _cursor_link(self, position, backwards=False):
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, backwards))
+
+    def get_paginated_data(self, data) -> OrderedDict:
+        """Pagination envelope without wrapping it in a response."""
+        if self.keyset:
+            return OrderedDict([
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ])
+        return OrderedDict([
+            ('count', self.page.paginator.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
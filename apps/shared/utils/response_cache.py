@@ -0,0 +1,175 @@
+"""
+Cache of rendered responses for anonymous GET requests.
+
+Entries are keyed by scheme and host (payloads hold absolute ``next`` and
+media URLs), normalized path, query string and language plus the current
+version of every namespace the view depends on (e.g. ``movies`` or
+``movie:42``). Invalidation never deletes entries: it replaces the
+namespace version, so every key built from the old version simply stops
+being looked up and ages out of the backend. Versions are only shared as
+far as the backend is, which is why it defaults to the file cache.
+"""
+import hashlib
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from apps.shared.i18n import negotiate_language
+
+VERSION_PREFIX = 'rcv:'
+ENTRY_PREFIX = 'rc:'
+CACHE_HEADER = 'X-Cache'
+# Validators set by ConditionalGetMixin are stored with the body so hits keep them
+STORED_HEADERS = ('ETag', 'Last-Modified')
+
+
+class _Stats:
+    """Per-process hit/miss counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = self.misses = self.stores = self.invalidations = 0
+
+
+stats = _Stats()
+
+
+def is_enabled() -> bool:
+    return getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _new_version() -> int:
+    return time.time_ns()
+
+
+def get_versions(namespaces: Iterable[str]) -> List[int]:
+    """Current version of each namespace, creating missing ones."""
+    namespaces = list(namespaces)
+    cache = get_cache()
+    keys = [VERSION_PREFIX + namespace for namespace in namespaces]
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def invalidate(*namespaces: str) -> None:
+    """Give each namespace a fresh version, orphaning every entry built from the old one."""
+    namespaces = {namespace for namespace in namespaces if namespace}
+    if not namespaces or not is_enabled():
+        return
+    version = _new_version()
+    get_cache().set_many(
+        {VERSION_PREFIX + namespace: version for namespace in namespaces},
+        timeout=None,
+    )
+    stats.incr('invalidations', len(namespaces))
+
+
+def request_language(request) -> str:
+    """Negotiated catalog language, so equivalent headers share one entry."""
+    return negotiate_language(request.META.get('HTTP_ACCEPT_LANGUAGE'))
+
+
+def is_cacheable_request(request) -> bool:
+    """Only anonymous GETs: anything carrying credentials bypasses the cache."""
+    return (
+        is_enabled()
+        and request.method == 'GET'
+        and 'HTTP_AUTHORIZATION' not in request.META
+    )
+
+
+def build_key(request, namespaces: Iterable[str]) -> str:
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    versions = get_versions(namespaces)
+    raw = '|'.join([
+        request.scheme, request.get_host(), request.path, query, request_language(request), *map(str, versions)
+    ])
+    return ENTRY_PREFIX + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def lookup(key: str) -> Optional[HttpResponse]:
+    cached = get_cache().get(key)
+    if cached is None:
+        stats.incr('misses')
+        return None
+    stats.incr('hits')
+    status, content_type, content, headers = cached
+    response = HttpResponse(content, content_type=content_type, status=status)
+    for name, value in headers.items():
+        response[name] = value
+    response[CACHE_HEADER] = 'HIT'
+    return response
+
+
+def store(key: str, response, timeout: Optional[int] = None) -> None:
+    response[CACHE_HEADER] = 'MISS'
+    if response.status_code != 200 or getattr(response, 'streaming', False):
+        return
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    if timeout is None:
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+    headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+    get_cache().set(key, (response.status_code, response['Content-Type'], response.content, headers), timeout)
+    stats.incr('stores')
+
+
+class CachedResponseMixin:
+    """
+    Serve anonymous GETs from the response cache, skipping DRF entirely on a hit.
+
+    Views list the namespaces their output depends on in
+    ``get_cache_namespaces``; writes invalidate those namespaces.
+    """
+    cache_timeout: Optional[int] = None
+
+    def get_cache_namespaces(self, request, *args, **kwargs) -> List[str]:
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = build_key(request, self.get_cache_namespaces(request, *args, **kwargs))
+        cached = lookup(key)
+        if cached is not None:
+            return cached
+
+        response = super().dispatch(request, *args, **kwargs)
+        store(key, response, timeout=self.cache_timeout)
+        return response
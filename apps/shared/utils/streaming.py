@@ -0,0 +1,92 @@
+"""
+Constant-memory JSON streaming for large list reads.
+"""
+import json
+from itertools import islice
+from typing import Any, Dict, Iterator, Optional
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .custom_response import CustomResponse, ResponseBody
+
+STREAM_QUERY_PARAM = 'stream'
+DEFAULT_CHUNK_SIZE = 500
+
+
+def wants_stream(request) -> bool:
+    return request.query_params.get(STREAM_QUERY_PARAM, '').lower() in ('1', 'true', 'yes')
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def stream_json_response(
+        queryset,
+        serializer_class,
+        request=None,
+        context: Optional[Dict[str, Any]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        message_key: str = "SUCCESS_MESSAGE"
+) -> StreamingHttpResponse:
+    """
+    Stream ``{"id", "message", "data": [...]}`` without materializing the list.
+
+    Rows come from a server-side cursor (``iterator(chunk_size=...)``) and
+    are serialized one chunk at a time, so memory stays flat however many
+    rows are read.
+    """
+    envelope = ResponseBody(message_key=message_key, request=request).to_dict()
+
+    def generate() -> Iterator[str]:
+        head = _dumps(envelope)
+        yield head[:-1] + ',"data":['
+        rows = queryset.iterator(chunk_size=chunk_size)
+        separator = ''
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            items = serializer_class(chunk, many=True, context=context).data
+            yield separator + ','.join(_dumps(item) for item in items)
+            separator = ','
+        yield ']}'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+class StreamingListMixin:
+    """
+    ``list()`` for envelope-style endpoints: paginated by default, streamed on ``?stream=1``.
+
+    Page size is bounded by the paginator's ``max_page_size``; streaming is
+    the explicit escape hatch for intentionally large reads.
+    """
+    stream_chunk_size = DEFAULT_CHUNK_SIZE
+
+    def get_list_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_list_serializer_class(self):
+        return self.get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset()
+        serializer_class = self.get_list_serializer_class()
+        if wants_stream(request):
+            return stream_json_response(
+                queryset,
+                serializer_class,
+                request=request,
+                context=self.get_serializer_context(),
+                chunk_size=self.stream_chunk_size,
+            )
+
+        page = self.paginate_queryset(queryset)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return CustomResponse.success(
+            message_key="SUCCESS_MESSAGE",
+            request=request,
+            data=self.paginator.get_paginated_data(serializer.data)
+        )
@@ -4,7 +4,13 @@ Telegram bot integration for error alerts.
 import html
 import logging
 import threading
+from typing import Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
 from core import config
+from .alerts import Alert, AlertDispatcher, fingerprint_exception, fingerprint_text
 
 bot = None
 if config.TELEGRAM_BOT_TOKEN and ':' in config.TELEGRAM_BOT_TOKEN:
@@ -15,26 +21,80 @@ if config.TELEGRAM_BOT_TOKEN and ':' in config.TELEGRAM_BOT_TOKEN:
         logging.warning("pyTelegramBotAPI is not installed. Telegram alerts will be disabled.")
 
 
-def _send_telegram_message(text: str):
-    """Send message to Telegram channel."""
-    if not bot:
-        return
-    try:
-        bot.send_message(
-            chat_id=config.TELEGRAM_CHANNEL_ID,
+class TelegramTransport:
+    """Delivers alert texts to the configured Telegram channel."""
+
+    def __init__(self, telegram_bot=None, chat_id=None):
+        self.bot = telegram_bot or bot
+        self.chat_id = chat_id or config.TELEGRAM_CHANNEL_ID
+
+    def send(self, text: str):
+        """Send message to Telegram channel."""
+        self.bot.send_message(
+            chat_id=self.chat_id,
             text=text,
             parse_mode='HTML',
             disable_web_page_preview=True
         )
-    except Exception as e:
-        logging.error(f"Failed to send alert to Telegram: {str(e)}")
 
 
-def send_alert(text: str):
-    """Send alert to Telegram in background thread."""
-    if not bot:
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> Optional[AlertDispatcher]:
+    """
+    Process-wide dispatcher, or None when alerts are disabled.
+
+    ``ALERT_TRANSPORT`` (dotted path) replaces Telegram, e.g. with
+    ``apps.shared.utils.alerts.MemoryTransport`` in tests.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                transport_path = getattr(settings, 'ALERT_TRANSPORT', None)
+                if transport_path:
+                    transport = import_string(transport_path)()
+                elif bot:
+                    transport = TelegramTransport()
+                else:
+                    return None
+                _dispatcher = AlertDispatcher(
+                    transport,
+                    queue_size=getattr(settings, 'ALERT_QUEUE_SIZE', 1000),
+                    window=getattr(settings, 'ALERT_DIGEST_WINDOW', 60),
+                    max_per_window=getattr(settings, 'ALERT_MAX_PER_WINDOW', 10),
+                )
+    return _dispatcher
+
+
+def reset_dispatcher():
+    """Forget the dispatcher so the next alert builds one from current settings."""
+    global _dispatcher
+    _dispatcher = None
+
+
+def send_alert(text: str, fingerprint: str = None, summary: str = None):
+    """Queue an alert for the dispatcher; never blocks the caller."""
+    dispatcher = get_dispatcher()
+    if dispatcher is None:
         return
-    threading.Thread(target=_send_telegram_message, args=(text,), daemon=True).start()
+    dispatcher.submit(Alert(
+        fingerprint=fingerprint or fingerprint_text(text),
+        summary=html.escape(summary or text.splitlines()[0][:100]),
+        text=text,
+    ))
+
+
+def view_label(request) -> str:
+    """Name of the view that handled the request, for digests."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return getattr(request, 'path', '') or 'unknown view'
+    func = match.func
+    view_class = getattr(func, 'view_class', None) or getattr(func, 'cls', None)
+    return view_class.__name__ if view_class else match.view_name or func.__name__
 
 
 def alert_to_telegram(
@@ -42,10 +102,11 @@ def alert_to_telegram(
     message: str = "No message provided",
     request=None,
     ip: str = None,
-    port: str = None
+    port: str = None,
+    exc: BaseException = None
 ):
     """Send error alert to Telegram with details."""
-    if not bot:
+    if get_dispatcher() is None:
         return
     
     if not isinstance(message, str):
@@ -73,7 +134,14 @@ def alert_to_telegram(
         f"🌐 <b>IP Address/Port:</b> <code>{safe_ip}:{safe_port}</code>\n"
     )
     
-    send_alert(text)
+    label = view_label(request) if request is not None else 'background task'
+    if exc is not None:
+        fingerprint = fingerprint_exception(exc, label)
+        summary = f"{type(exc).__name__} in {label}"
+    else:
+        fingerprint = fingerprint_text(f"{traceback_text.strip().splitlines()[-1:]}|{label}")
+        summary = f"{message[:80]} in {label}"
+    send_alert(text, fingerprint=fingerprint, summary=summary)
 
 
 
@@ -0,0 +1,58 @@
+"""
+Operational views for staff, and media delivery.
+"""
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from apps.shared import metrics
+from apps.shared.exceptions.registry import registry
+from apps.shared.utils.custom_response import CustomResponse
+from apps.shared.utils.media import serve_media
+
+
+class ErrorFingerprintListView(APIView):
+    """Server errors aggregated by fingerprint across every worker process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        records = registry.snapshot()
+        if request.query_params.get('traceback', '').lower() not in ('1', 'true', 'yes'):
+            for record in records:
+                record.pop('traceback')
+        return CustomResponse.success(
+            message_key="SUCCESS_MESSAGE",
+            request=request,
+            data={
+                'total': sum(record['count'] for record in records),
+                'results': records,
+            }
+        )
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, aggregated across every worker process.
+
+    Requires ``METRICS_TOKEN`` as a bearer token; without one configured it
+    is only open in DEBUG.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=403)
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return HttpResponse(status=401)
+    return HttpResponse(metrics.render(metrics.collect()), content_type=metrics.CONTENT_TYPE)
+
+
+@require_GET
+def media_view(request, path):
+    """Uploaded media; see ``apps.shared.utils.media`` for proxy hand-off and caching."""
+    return serve_media(request, path)
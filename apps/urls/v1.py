@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
 from apps.shared.utils.custom_response import CustomResponse
+from apps.shared.views import ErrorFingerprintListView
 
 
 @api_view(['POST'])
@@ -87,6 +88,8 @@ urlpatterns = [
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('auth/profile/', profile, name='profile'),
     path('movies/', include('apps.movies.urls.v1')),
+    path('jobs/', include('apps.jobs.urls.v1')),
+    path('ops/errors/', ErrorFingerprintListView.as_view(), name='error-fingerprints'),
 ]
 
 
@@ -12,6 +12,7 @@ python manage.py collectstatic --noinput
 
 echo "Running migrations..."
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 echo "Build completed successfully!"
 
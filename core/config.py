@@ -41,10 +41,14 @@ else:
 # Static and Media
 STATIC_ROOT = decouple_config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
 MEDIA_ROOT = decouple_config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+MEDIA_ACCEL = decouple_config('MEDIA_ACCEL', default='')  # '', 'x-accel-redirect' or 'x-sendfile'
+MEDIA_ACCEL_PREFIX = decouple_config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+MEDIA_CACHE_MAX_AGE = decouple_config('MEDIA_CACHE_MAX_AGE', default=3600, cast=int)  # seconds, names without a hash
 
 # JWT Settings
 JWT_ACCESS_LIFETIME = decouple_config('JWT_ACCESS_LIFETIME', default=60*24, cast=int)  # minutes
 JWT_REFRESH_LIFETIME = decouple_config('JWT_REFRESH_LIFETIME', default=60*24*7, cast=int)  # minutes
+AUTH_USER_CACHE_TTL = decouple_config('AUTH_USER_CACHE_TTL', default=30, cast=int)  # seconds, 0 disables
 
 # CORS Settings
 # Development va production uchun moslashuvchan CORS sozlamalari
@@ -70,7 +74,35 @@ else:
     # Comma-separated list ni array ga aylantirish
     FRONTEND_URLS = [url.strip() for url in CORS_ORIGINS_STR.split(',') if url.strip()]
 
+# Response Cache Settings (backend: file, db or locmem - locmem only with a single process)
+RESPONSE_CACHE_ENABLED = decouple_config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_BACKEND = decouple_config('RESPONSE_CACHE_BACKEND', default='file')
+RESPONSE_CACHE_LOCATION = decouple_config('RESPONSE_CACHE_LOCATION', default='')
+RESPONSE_CACHE_TIMEOUT = decouple_config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+
+# Search Settings
+SUGGEST_INDEX_TTL = decouple_config('SUGGEST_INDEX_TTL', default=300, cast=int)  # seconds
+
 # Telegram Bot Settings
 TELEGRAM_BOT_TOKEN = decouple_config('TELEGRAM_BOT_TOKEN', default=None)
 TELEGRAM_CHANNEL_ID = decouple_config('TELEGRAM_CHANNEL_ID', default=None)
 
+# Metrics Settings
+METRICS_DIR = decouple_config('METRICS_DIR', default='')  # empty: <tmp>/movie_api_metrics
+METRICS_TOKEN = decouple_config('METRICS_TOKEN', default='')  # bearer token for /metrics; without it /metrics only answers in DEBUG
+
+# Alert dispatcher Settings
+ALERT_QUEUE_SIZE = decouple_config('ALERT_QUEUE_SIZE', default=1000, cast=int)
+ALERT_DIGEST_WINDOW = decouple_config('ALERT_DIGEST_WINDOW', default=60, cast=int)  # seconds
+ALERT_MAX_PER_WINDOW = decouple_config('ALERT_MAX_PER_WINDOW', default=10, cast=int)
+
+# Background job Settings
+JOB_LEASE_SECONDS = decouple_config('JOB_LEASE_SECONDS', default=300, cast=int)
+JOB_RETRY_DELAY = decouple_config('JOB_RETRY_DELAY', default=10, cast=int)  # seconds, doubled per attempt
+JOB_RETRY_MAX_DELAY = decouple_config('JOB_RETRY_MAX_DELAY', default=3600, cast=int)
+JOB_FILES_ROOT = decouple_config('JOB_FILES_ROOT', default=str(BASE_DIR / 'job_files'))
+
+# Poster variant Settings
+POSTER_VARIANT_WIDTHS = decouple_config('POSTER_VARIANT_WIDTHS', default='200,400,800', cast=Csv(int))
+POSTER_VARIANT_QUALITY = decouple_config('POSTER_VARIANT_QUALITY', default=80, cast=int)
+
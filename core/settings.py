@@ -24,17 +24,21 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
-    'corsheaders',
     
     # Local apps
     'apps.shared',
     'apps.movies',
+    'apps.jobs',
 ]
 
 MIDDLEWARE = [
+    # First, so recorded latency covers the whole stack
+    'apps.shared.metrics.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Preflight so'rovlariga shu yerning o'zida javob beradi
+    'apps.shared.middleware.cors_middleware.FlexibleCorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -124,6 +128,13 @@ STATIC_ROOT = config.STATIC_ROOT
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = config.MEDIA_ROOT
+# Media is served by apps.shared.views.media_view, and only below these folders.
+# MEDIA_ACCEL hands the transfer to the front proxy: 'x-accel-redirect' (nginx, with an
+# internal location at MEDIA_ACCEL_PREFIX aliasing MEDIA_ROOT) or 'x-sendfile'
+MEDIA_SERVED_PREFIXES = ['posters/']
+MEDIA_ACCEL = config.MEDIA_ACCEL
+MEDIA_ACCEL_PREFIX = config.MEDIA_ACCEL_PREFIX
+MEDIA_CACHE_MAX_AGE = config.MEDIA_CACHE_MAX_AGE
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -131,12 +142,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.shared.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.shared.utils.pagination.CatalogPagination',
     'PAGE_SIZE': 12,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -162,7 +173,11 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Tokens carry a hash of the password; changing it revokes them
+    'CHECK_REVOKE_TOKEN': True,
 }
+# Per-process cache of authenticated users (apps.shared.authentication)
+AUTH_USER_CACHE_TTL = config.AUTH_USER_CACHE_TTL
 
 # CORS settings - Moslashuvchan sozlamalar
 import re
@@ -216,10 +231,63 @@ if not DEBUG:
 # WhiteNoise settings
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Caches
+# The response cache stores rendered anonymous GET responses (apps.shared.utils.response_cache).
+# Namespace versions live in the same backend, so it must be shared by every gunicorn worker and
+# job worker that writes: file (one host, the default) or db (build.sh runs createcachetable).
+# locmem keeps versions per process and only suits a single process, e.g. runserver.
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'responses'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache' / 'responses')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'response_cache'),
+}
+_response_cache_backend, _response_cache_location = RESPONSE_CACHE_BACKENDS[config.RESPONSE_CACHE_BACKEND]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': _response_cache_backend,
+        'LOCATION': config.RESPONSE_CACHE_LOCATION or _response_cache_location,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_ENABLED = config.RESPONSE_CACHE_ENABLED
+RESPONSE_CACHE_TIMEOUT = config.RESPONSE_CACHE_TIMEOUT
+
+# Autocomplete index: seconds before a worker rebuilds it from the database
+SUGGEST_INDEX_TTL = config.SUGGEST_INDEX_TTL
+
 # Telegram Bot Settings
 TELEGRAM_BOT_TOKEN = config.TELEGRAM_BOT_TOKEN
 TELEGRAM_CHANNEL_ID = config.TELEGRAM_CHANNEL_ID
 
+# Alerts go through one bounded queue per process; repeats within a window become a digest
+ALERT_QUEUE_SIZE = config.ALERT_QUEUE_SIZE
+ALERT_DIGEST_WINDOW = config.ALERT_DIGEST_WINDOW
+ALERT_MAX_PER_WINDOW = config.ALERT_MAX_PER_WINDOW
+
+# Background jobs (apps.jobs): running jobs without a heartbeat for JOB_LEASE_SECONDS are requeued;
+# failed attempts are retried after JOB_RETRY_DELAY * 2**n seconds, at most JOB_RETRY_MAX_DELAY
+JOB_LEASE_SECONDS = config.JOB_LEASE_SECONDS
+JOB_RETRY_DELAY = config.JOB_RETRY_DELAY
+JOB_RETRY_MAX_DELAY = config.JOB_RETRY_MAX_DELAY
+# Uploads waiting for a job (CSV imports); outside MEDIA_ROOT so they are never served
+JOB_FILES_ROOT = config.JOB_FILES_ROOT
+
+# Downscaled JPEG and WebP copies of every poster, generated by a job after upload
+POSTER_VARIANT_WIDTHS = config.POSTER_VARIANT_WIDTHS
+POSTER_VARIANT_QUALITY = config.POSTER_VARIANT_QUALITY
+
+# Per-process metric files aggregated by /metrics (start.sh empties the directory on boot)
+METRICS_DIR = config.METRICS_DIR
+METRICS_TOKEN = config.METRICS_TOKEN
+
+# Expected 4xx are logged without traceback: the first and then every Nth per exception type
+CLIENT_ERROR_LOG_EVERY = 100
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -0,0 +1,28 @@
+"""
+Settings for recording and checking the benchmark baseline (``bench_api``).
+
+A local SQLite file, so the committed ``baseline.sqlite.json`` can be
+reproduced anywhere; see ``apps.movies.benchmarks`` for the commands.
+The suite runs in one process, so the response cache stays in memory.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, CACHES
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(BASE_DIR / 'bench.sqlite3'),
+    }
+}
+
+# The local apps have no committed migrations; ``migrate --run-syncdb`` creates their tables
+MIGRATION_MODULES = {'shared': None, 'movies': None, 'jobs': None}
+
+CACHES = {
+    **CACHES,
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
@@ -1,19 +1,25 @@
 """
 URL configuration for core project.
 """
+import re
+
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 
+from apps.shared.views import media_view, metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('apps.urls.v1')),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), media_view, name='media'),
+]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Health check endpoint
@@ -24,6 +30,7 @@ def health_check(request):
 
 urlpatterns += [
     path('health/', health_check, name='health-check'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 
@@ -8,6 +8,11 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
 
+# Build the per-worker autocomplete index before the first request arrives
+from apps.movies.search.suggest import warm_suggest_index  # noqa: E402
+
+warm_suggest_index()
+
 
 
 
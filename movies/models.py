@@ -56,9 +56,10 @@ class Movie(models.Model):
     @property
     def average_rating(self):
         """Calculate average rating from reviews."""
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return round(sum(r.rating for r in reviews) / reviews.count(), 1)
+        # Evaluated once in Python so a prefetch_related('reviews') is reused
+        reviews = list(self.reviews.all())
+        if reviews:
+            return round(sum(r.rating for r in reviews) / len(reviews), 1)
         return None
 
 
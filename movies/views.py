@@ -5,7 +5,7 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
-from django.db.models import Q, Avg
+from django.db.models import Q, Avg, Prefetch
 try:
     from django_filters.rest_framework import DjangoFilterBackend
 except ImportError:
@@ -15,16 +15,16 @@ from .serializers import (
     MovieSerializer, GenreSerializer, ActorSerializer,
     ReviewSerializer, UserSerializer
 )
-import csv
-from django.http import HttpResponse
-from io import StringIO
+from apps.movies.importing import ImportFormatError, MovieCsvImporter
 
 
 class MovieViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Movie model with search, filter, and sorting.
     """
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.prefetch_related(
+        'genres', 'actors', Prefetch('reviews', queryset=Review.objects.select_related('user'))
+    )
     serializer_class = MovieSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     if DjangoFilterBackend:
@@ -70,7 +70,7 @@ class MovieViewSet(viewsets.ModelViewSet):
     def reviews(self, request, pk=None):
         """Get all reviews for a specific movie."""
         movie = self.get_object()
-        reviews = movie.reviews.all()
+        reviews = movie.reviews.select_related('user')
         serializer = ReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
@@ -83,44 +83,14 @@ class MovieViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        file = request.FILES['file']
-        decoded_file = file.read().decode('utf-8')
-        csv_reader = csv.DictReader(StringIO(decoded_file))
-        
-        imported = 0
-        errors = []
-        
-        for row in csv_reader:
-            try:
-                # Create or get genres
-                genre_names = [g.strip() for g in row.get('genres', '').split(',') if g.strip()]
-                genres = []
-                for genre_name in genre_names:
-                    genre, _ = Genre.objects.get_or_create(name=genre_name)
-                    genres.append(genre)
-                
-                # Create or get actors
-                actor_names = [a.strip() for a in row.get('actors', '').split(',') if a.strip()]
-                actors = []
-                for actor_name in actor_names:
-                    actor, _ = Actor.objects.get_or_create(name=actor_name)
-                    actors.append(actor)
-                
-                # Create movie
-                movie = Movie.objects.create(
-                    title=row.get('title', ''),
-                    description=row.get('description', ''),
-                    release_year=int(row.get('release_year', 0)),
-                )
-                movie.genres.set(genres)
-                movie.actors.set(actors)
-                imported += 1
-            except Exception as e:
-                errors.append(f"Row {row.get('title', 'unknown')}: {str(e)}")
-        
+        try:
+            report = MovieCsvImporter(Movie, Genre, Actor).import_file(request.FILES['file'])
+        except ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         return Response({
-            'imported': imported,
-            'errors': errors
+            'imported': report.imported,
+            'errors': [str(error) for error in report.errors]
         })
 
 
@@ -142,7 +112,7 @@ class ActorViewSet(viewsets.ReadOnlyModelViewSet):
 
 class ReviewViewSet(viewsets.ModelViewSet):
     """ViewSet for Review model."""
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('user')
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
 
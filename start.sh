@@ -3,6 +3,18 @@
 
 set -o errexit  # Exit on error
 
+# Metric files from previous runs would otherwise be summed into the new counters
+METRICS_DIR=${METRICS_DIR:-$(python -c "import tempfile; print(tempfile.gettempdir())")/movie_api_metrics}
+export METRICS_DIR
+rm -rf "$METRICS_DIR"
+mkdir -p "$METRICS_DIR"
+
+# Background jobs (imports, index rebuilds) run beside the web workers and share their disk
+if [ "${RUN_JOB_WORKERS:-true}" = "true" ]; then
+    echo "Starting job workers..."
+    python manage.py run_workers --processes ${JOB_PROCESSES:-1} --threads ${JOB_THREADS:-2} &
+fi
+
 echo "Starting Gunicorn..."
 exec gunicorn core.wsgi:application \
     --bind 0.0.0.0:${PORT:-8000} \